@@ -1,10 +1,21 @@
 import time
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime
 from multiprocessing import Queue
 import threading
 import json
+from queue import Empty
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rateLimiter import RateLimiter
+from snapshotFile import SnapshotReader
+from positionBook import PositionBook, TAKE_PROFIT_LADDER, STOP_LOSS
+from queueManager import QueueManager, PriceFeed, send_pin
+from tradeJournal import TradeJournal, JOURNAL_FILE
+
+MISSING_FRAMES_BEFORE_API = 2  # Frames a held token may be absent from before its price is fetched from the API
 
 class TokenSaleDecision:
     def __init__(self, bought_price, initial_price):
@@ -24,37 +35,54 @@ class TokenSaleDecision:
         current_profit = ((self.current_price - self.bought_price) / self.bought_price) * 100
         time_held = datetime.now() - self.buy_time
         
-        if current_profit <= -45:
-            return True, "STOP LOSS (-45%)"
-            
-        if time_held >= timedelta(minutes=8):
-            return current_profit >= 5, "5% Target (8m+)"
-        elif time_held >= timedelta(minutes=7):
-            return current_profit >= 10, "10% Target (7m+)"
-        elif time_held >= timedelta(minutes=5):
-            return current_profit >= 15, "15% Target (5m+)"
-        else:
-            return current_profit >= 20, "20% Target"
+        if current_profit <= STOP_LOSS:
+            return True, f"STOP LOSS ({STOP_LOSS:g}%)"
+            
+        held_seconds = time_held.total_seconds()
+        for min_held, target, reason in TAKE_PROFIT_LADDER:
+            if held_seconds >= min_held:
+                return current_profit >= target, reason
+        return False, None
 
 class TokenMonitor:
-    def __init__(self, queue):
+    """Exit decisions for bought tokens.
+
+    With a ``feed`` (queueManager.PriceFeed) decisions run on every price
+    frame jupitersPrices publishes, with no file reads; the API is only
+    asked for held tokens the frames have lacked for a while. Without one,
+    prices are polled from the snapshot file every 2s.
+
+    With a ``journal`` (tradeJournal.TradeJournal) opens and sells are
+    journaled and positions still open at the last run are restored.
+
+    With ``pins`` (the manager's pin queue) every open position is pinned
+    in jupitersPrices, so it stays in the frames until it is sold.
+    """
+    def __init__(self, queue, feed=None, journal=None, pins=None):
         self.queue = queue
-        self.token_decisions = {}
+        self.feed = feed
+        self.journal = journal
+        self.pins = pins
+        self.book = PositionBook()  # Every open position, exits evaluated in one vectorized step
+        self.book_lock = threading.Lock()
+        if journal is not None:
+            for token_id, bought_price, bought_time in journal.open_positions():
+                self.book.open(token_id, bought_price, now=bought_time)
+                self.pin(token_id)
         self.running = True
         self.last_update = 0
         self.update_interval = 2.0  # Strict 2-second interval
-        self.api_call_lock = threading.Lock()
-        self.last_api_call = 0
         self.min_api_delay = 2.0  # 2 seconds between API calls (30/minute max)
+        self.rate_limiter = RateLimiter({'jupiter_price': (1 / self.min_api_delay, 1)})
+        self.snapshot_reader = SnapshotReader('token_prices.bin')
         
+    def pin(self, token_id, pinned=True):
+        if self.pins is not None:
+            send_pin(self.pins, token_id, pinned)
+
     def rate_limited_api_call(self):
         """Ensure we don't exceed 30 API calls/minute"""
-        with self.api_call_lock:
-            current_time = time.time()
-            elapsed = current_time - self.last_api_call
-            if elapsed < self.min_api_delay:
-                time.sleep(self.min_api_delay - elapsed)
-            self.last_api_call = time.time()
+        self.rate_limiter.acquire('jupiter_price')
     
     def get_token_prices(self, token_ids):
         """Fetch prices with strict rate limiting"""
@@ -69,6 +97,7 @@ class TokenMonitor:
                 timeout=15,
                 headers={'User-Agent': 'JupiterSaleMonitor/2.0'}
             )
+            self.rate_limiter.record_response('jupiter_price', response)
             response.raise_for_status()
             data = response.json().get('data', {})
             
@@ -84,6 +113,11 @@ class TokenMonitor:
     def get_prices_from_file(self):
         """Read prices from jupPrice.py's output with freshness check"""
         try:
+            # Binary snapshot: mmap'd lookups, freshness from the writer's timestamp.
+            # A missing, invalid or stale one (e.g. left over from SNAPSHOT_FORMAT = 'binary') falls back to JSON
+            if self.snapshot_reader.refresh() and self.snapshot_reader.age() <= 3:
+                return self.snapshot_reader.prices()
+
             if not os.path.exists('token_prices.json'):
                 return None
                 
@@ -94,9 +128,9 @@ class TokenMonitor:
             with open('token_prices.json', 'r') as f:
                 data = json.load(f)
                 return {
-                    item['ID']: float(item['Price'])
+                    item.get('ID', item.get('id')): float(item.get('Price', item.get('price')))
                     for item in data
-                    if 'ID' in item and 'Price' in item
+                    if ('ID' in item or 'id' in item) and ('Price' in item or 'price' in item)
                 }
         except Exception as e:
             print(f"⚠ File read error: {str(e)}")
@@ -112,6 +146,16 @@ class TokenMonitor:
                         token_id = message['token_id']
                         bought_price = message['price']
                         
+                        if self.feed is not None:
+                            # The next frame prices it
+                            with self.book_lock:
+                                self.book.open(token_id, bought_price)
+                            self.pin(token_id)
+                            if self.journal is not None:
+                                self.journal.buy(token_id, bought_price)
+                            print(f"✔ Monitoring {token_id[:6]}... | Buy: {bought_price:.6f}")
+                            continue
+                        
                         # Try file first
                         prices = self.get_prices_from_file()
                         
@@ -120,7 +164,11 @@ class TokenMonitor:
                             prices = self.get_token_prices([token_id])
                         
                         if prices and token_id in prices:
-                            self.token_decisions[token_id] = TokenSaleDecision(bought_price, prices[token_id])
+                            with self.book_lock:
+                                self.book.open(token_id, bought_price, prices[token_id])
+                            self.pin(token_id)
+                            if self.journal is not None:
+                                self.journal.buy(token_id, bought_price)
                             print(f"✔ Monitoring {token_id[:6]}... | Buy: {bought_price:.6f} | Current: {prices[token_id]:.6f}")
                         else:
                             print(f"⏳ Price not available for {token_id[:6]}..., will retry")
@@ -133,8 +181,50 @@ class TokenMonitor:
                     
             time.sleep(0.1)
             
+    def report(self, sells, profits):
+        for token_id, price, profit, reason in sells:
+            self.pin(token_id, pinned=False)
+            if self.journal is not None:
+                self.journal.sell(token_id, price, profit, reason)
+            print(f"🚀 SELL {token_id[:6]}... at {price:.6f} ({profit:.2f}% profit) - {reason}")
+        if profits:
+            best = max(profits, key=profits.get)
+            print(f"⏳ HOLD {len(profits)} positions | Best {best[:6]}... {profits[best]:.2f}%")
+
+    def monitor_frames(self):
+        """Evaluate every position on each price frame pushed by jupitersPrices"""
+        while self.running:
+            try:
+                records = self.feed.get_records(timeout=1.0)
+            except Empty:
+                continue
+            except Exception as e:
+                print(f"⚠ Price feed error: {str(e)}")
+                time.sleep(1)
+                continue
+            
+            with self.book_lock:
+                self.book.update_frame(records)
+                stale = self.book.stale(MISSING_FRAMES_BEFORE_API)
+            
+            # Held tokens the frames lack (e.g. not tracked yet), rate limited
+            if stale and time.time() - self.last_update >= self.update_interval:
+                self.last_update = time.time()
+                api_prices = self.get_token_prices(stale)
+                if api_prices:
+                    with self.book_lock:
+                        self.book.update_prices(api_prices, count_missing=False)
+            
+            with self.book_lock:
+                sells = self.book.evaluate()
+                profits = self.book.profits()
+            self.report(sells, profits)
+            
     def monitor_tokens(self):
         """Monitor tokens with strict 2-second intervals"""
+        if self.feed is not None:
+            self.monitor_frames()
+            return
         while self.running:
             current_time = time.time()
             
@@ -147,15 +237,13 @@ class TokenMonitor:
             
             # Get prices (file first, then API)
             prices = self.get_prices_from_file()
-            missing_tokens = []
             
             if not prices:
                 prices = {}
             
             # Check which tokens need API lookup
-            for token_id in list(self.token_decisions.keys()):
-                if token_id not in prices:
-                    missing_tokens.append(token_id)
+            with self.book_lock:
+                missing_tokens = [token_id for token_id in self.book.positions() if token_id not in prices]
             
             # Fetch missing prices in one batch if needed
             if missing_tokens:
@@ -163,20 +251,12 @@ class TokenMonitor:
                 if api_prices:
                     prices.update(api_prices)
             
-            # Process decisions
-            for token_id, decision in list(self.token_decisions.items()):
-                if token_id in prices:
-                    decision.update_price(prices[token_id])
-                    sell, reason = decision.should_sell()
-                    
-                    if sell:
-                        profit = ((prices[token_id] - decision.bought_price) / decision.bought_price) * 100
-                        print(f"🚀 SELL {token_id[:6]}... at {prices[token_id]:.6f} ({profit:.2f}% profit) - {reason}")
-                        del self.token_decisions[token_id]
-                    else:
-                        profit = ((prices[token_id] - decision.bought_price) / decision.bought_price) * 100
-                        print(f"⏳ HOLD {token_id[:6]}... | Price: {prices[token_id]:.6f} | Profit: {profit:.2f}%")
-                
+            # Process decisions for every position at once
+            with self.book_lock:
+                self.book.update_prices(prices)
+                sells = self.book.evaluate()
+                profits = self.book.profits()
+            self.report(sells, profits)
             
             time.sleep(0.05)
             
@@ -209,9 +289,31 @@ if __name__ == "__main__":
     
     print(f"✓ API working | SOL price: {sol_prices[sol_token]}")
     
+    # Live price frames from jupitersPrices.py, if the queue manager is up
+    feed = None
+    pins = None
+    try:
+        QueueManager.register('get_price_feed')
+        QueueManager.register('get_pin_queue')
+        manager = QueueManager(address=('localhost', 50000), authkey=b'abc123')
+        manager.connect()
+        feed = PriceFeed(manager)
+        print("✓ Subscribed to live price frames")
+        pins = manager.get_pin_queue()
+    except Exception as e:
+        if feed is None:
+            print(f"⚠ No price feed ({str(e)}), polling the snapshot file")
+        else:
+            print(f"⚠ Pin queue unavailable ({str(e)}), held tokens may be evicted from frames")
+    
+    # Positions still open when the monitor last stopped
+    journal = TradeJournal(JOURNAL_FILE, source='jupitersEdge')
+    
     # Main monitor
     input_queue = Queue()
-    monitor = TokenMonitor(input_queue)
+    monitor = TokenMonitor(input_queue, feed, journal, pins)
+    if len(monitor.book):
+        print(f"📒 Restored {len(monitor.book)} open positions")
     monitor.start()
 
     try:
@@ -236,4 +338,5 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\n🛑 Stopping monitor...")
     finally:
-        monitor.stop()
\ No newline at end of file
+        monitor.stop()
+        journal.close()
@@ -0,0 +1,224 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class WindowedLRU:
+    """Keys seen within the last ``window`` seconds, capped at ``max_size``.
+
+    Entries are kept in insertion order, so expiring is popping from the
+    front until the oldest entry is inside the window.
+    """
+    def __init__(self, window=600.0, max_size=100_000):
+        self.window = window
+        self.max_size = max_size
+        self.entries = OrderedDict()  # key -> first seen (epoch seconds)
+
+    def _expire(self, now):
+        entries = self.entries
+        cutoff = now - self.window
+        while entries:
+            key, seen = next(iter(entries.items()))
+            if seen >= cutoff and len(entries) <= self.max_size:
+                break
+            entries.popitem(last=False)
+
+    def check_and_add(self, key, now=None):
+        """True if ``key`` was seen inside the window, else record it"""
+        now = time.time() if now is None else now
+        self._expire(now)
+        if key in self.entries:
+            return True
+        self.entries[key] = now
+        return False
+
+    def discard(self, key):
+        self.entries.pop(key, None)
+
+    def __contains__(self, key):
+        seen = self.entries.get(key)
+        return seen is not None and seen >= time.time() - self.window
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def _hash_pair(key):
+    """Two 64-bit hashes of ``key`` for double hashing (h2 is odd)"""
+    digest = hashlib.blake2b(key.encode() if isinstance(key, str) else key, digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter over a bytearray, double hashing with blake2b"""
+    def __init__(self, capacity, error_rate):
+        self.capacity = int(capacity)
+        self.error_rate = error_rate
+        self.bits = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / self.capacity * math.log(2)))
+        self.array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, hashes):
+        h1, h2 = hashes
+        bits = self.bits
+        return [(h1 + i * h2) % bits for i in range(self.hashes)]
+
+    def add(self, key, hashes=None):
+        """Add ``key``; returns True if it was (probably) already present"""
+        array = self.array
+        present = True
+        for pos in self._positions(hashes or _hash_pair(key)):
+            mask = 1 << (pos & 7)
+            if not array[pos >> 3] & mask:
+                present = False
+                array[pos >> 3] |= mask
+        if not present:
+            self.count += 1
+        return present
+
+    def contains(self, key, hashes=None):
+        h1, h2 = hashes or _hash_pair(key)
+        array, bits = self.array, self.bits
+        # Probe lazily: a new key usually misses on the first bit or two
+        for i in range(self.hashes):
+            pos = (h1 + i * h2) % bits
+            if not array[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def __contains__(self, key):
+        return self.contains(key)
+
+    @property
+    def nbytes(self):
+        return len(self.array)
+
+
+class ScalableBloomFilter:
+    """Bloom filter that grows by adding slices as it fills.
+
+    Each new slice has ``growth`` times the capacity and a tighter error rate
+    (``tightening`` times the previous), so the overall false-positive rate
+    stays below ``error_rate`` however many keys are added.
+    """
+    def __init__(self, initial_capacity=100_000, error_rate=0.001, growth=2, tightening=0.8):
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = [BloomFilter(initial_capacity, error_rate * (1 - tightening))]
+
+    def __contains__(self, key):
+        hashes = _hash_pair(key)
+        return any(bloom.contains(key, hashes) for bloom in self.filters)
+
+    def add(self, key):
+        """Add ``key``; returns True if it was (probably) already present"""
+        hashes = _hash_pair(key)
+        if any(bloom.contains(key, hashes) for bloom in self.filters):
+            return True
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(current.capacity * self.growth, current.error_rate * self.tightening)
+            self.filters.append(current)
+        current.add(key, hashes)
+        return False
+
+    def __len__(self):
+        return sum(bloom.count for bloom in self.filters)
+
+    @property
+    def nbytes(self):
+        return sum(bloom.nbytes for bloom in self.filters)
+
+
+class Deduper:
+    """Thread-safe "have we already handled this mint" check.
+
+    A windowed LRU answers exactly for recent keys; the optional scalable
+    Bloom filter remembers every key ever seen in a few bits each (with a
+    small false-positive rate), so repeats older than the window are caught
+    too. ``seen`` records the key and reports whether it was a repeat.
+    """
+    def __init__(self, window=600.0, max_recent=100_000, remember_all=True,
+                 initial_capacity=100_000, error_rate=0.001):
+        self.recent = WindowedLRU(window, max_recent)
+        self.bloom = ScalableBloomFilter(initial_capacity, error_rate) if remember_all else None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def seen(self, key):
+        with self.lock:
+            repeat = self.recent.check_and_add(key)
+            if self.bloom is not None:
+                repeat = self.bloom.add(key) or repeat
+            if repeat:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return repeat
+
+    def forget(self, key):
+        """Let ``key`` through again; only possible without the Bloom filter"""
+        if self.bloom is not None:
+            raise ValueError("Can't forget keys with remember_all=True: Bloom filters don't support removal")
+        with self.lock:
+            self.recent.discard(key)
+
+
+if __name__ == "__main__":
+    # Benchmark: memory and throughput for 1M distinct mints
+    import random
+    import tracemalloc
+    alphabet = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+    rng = random.Random(0)
+    total = 1_000_000
+    mints = [''.join(rng.choices(alphabet, k=40)) + 'pump' for _ in range(total)]
+
+    def run(label, make):
+        deduper = make()
+        start = time.perf_counter()
+        for mint in mints:
+            deduper.seen(mint)
+        insert = time.perf_counter() - start
+        false_positives = deduper.hits
+        start = time.perf_counter()
+        caught = sum(deduper.seen(mint) for mint in mints[:100_000])
+        lookup = time.perf_counter() - start
+        bloom = f"{deduper.bloom.nbytes / 1e6:.1f}MB" if deduper.bloom else "-"
+        del deduper
+
+        # Memory in a second, traced pass (tracing slows the timed one down)
+        tracemalloc.start()
+        deduper = make()
+        for mint in mints:
+            deduper.seen(mint)
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del deduper
+        print(f"{label:<20} {total / insert / 1e3:>8.0f}k {100_000 / lookup / 1e3:>8.0f}k "
+              f"{retained / 1e6:>9.1f}MB {bloom:>8} {caught:>9} {false_positives:>7}")
+
+    class SetDeduper:
+        """Baseline: an unbounded set of every mint"""
+        bloom = None
+
+        def __init__(self):
+            self.keys = set()
+            self.hits = 0
+
+        def seen(self, key):
+            if key in self.keys:
+                self.hits += 1
+                return True
+            self.keys.add(key)
+            return False
+
+    print(f"🔬 {total:,} distinct mints, then 100k repeats of the oldest ones")
+    print(f"{'Deduper':<20} {'New/s':>9} {'Repeat/s':>9} {'Retained':>11} {'Bloom':>8} {'Caught':>9} {'FP':>7}")
+    run("set()", SetDeduper)
+    run("LRU window only", lambda: Deduper(remember_all=False))
+    run("LRU window + Bloom", Deduper)
@@ -1,12 +1,91 @@
 from playwright.sync_api import sync_playwright
 from multiprocessing.managers import BaseManager
+import threading
 import time
 import signal
 import sys
+import os
+from dedup import Deduper
+from latencyTrace import Tracer, new_trace_id
 
 class QueueManager(BaseManager):
     pass
 
+# Configuration
+PUMP_FUN_URL = "https://pump.fun/advanced?include-nsfw=true"
+SCRAPE_MODE = 'headless'  # 'headless' (hardened observer page), 'stream' (observer, full rendering) or 'poll' (visible rows every POLL_INTERVAL)
+POLL_INTERVAL = 10      # Seconds between polls in 'poll' mode
+HEADLESS = True
+HEADLESS_VIEWPORT = {"width": 1280, "height": 2000}  # Tall, 1x scale: more rows rendered, cheaper paints
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media'}  # Never downloaded in 'headless' mode
+DEDUP_WINDOW = 3600     # Seconds a sent mint is remembered (exactly, no Bloom filter false positives)
+TRACE_LATENCY = True    # Give every mint a trace ID and log its discovery (see latencyTrace.py)
+HEALTH_INTERVAL = 5     # Seconds between crashed/closed page checks in 'headless' mode
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+FIXTURE_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pumpFunList.html')
+
+tracer = Tracer('funPump', enabled=TRACE_LATENCY)
+
+# Reads one list row (div[data-index]) into a coin dict, or null
+EXTRACT_COIN_JS = '''(item) => {
+    const coinDiv = item.matches('div[data-coin-mint]') ? item : item.querySelector('div[data-coin-mint]');
+    if (!coinDiv) return null;
+    const nameElement = item.querySelector('div.truncate.font-semibold.text-gray-300') ||
+                        item.querySelector('div.font-semibold.text-gray-300');
+    const symbolElement = item.querySelector('div.mr-2.truncate.font-bold.text-white') ||
+                          item.querySelector('div.font-bold.text-white');
+    return {
+        mint: coinDiv.getAttribute('data-coin-mint'),
+        name: nameElement?.innerText,
+        symbol: symbolElement?.innerText,
+        img: item.querySelector('img[alt="coin"]')?.src,
+        timestamp: new Date().toISOString()
+    };
+}'''
+
+# Injected before any page script runs: reports every complete coin row the
+# moment it is inserted (or a recycled row gets a new mint) via __onNewCoin.
+# Each mint is reported once; jupitersPrices retries mints it cannot price yet
+OBSERVER_JS = '''(() => {
+    if (window.__coinObserverInstalled) return;
+    window.__coinObserverInstalled = true;
+    const extractCoin = ''' + EXTRACT_COIN_JS + ''';
+    const seen = new Set();
+
+    const report = (element) => {
+        const item = element.closest('div[data-index]') || element;
+        const coin = extractCoin(item);
+        // Incomplete rows are retried by the mutation that completes them
+        if (!coin || !coin.mint || !coin.name || !coin.symbol || !coin.img || seen.has(coin.mint)) return;
+        seen.add(coin.mint);
+        const created = Number(item.getAttribute('data-created'));  // Fixture rows only
+        if (created) coin.latency_ms = Date.now() - created;
+        window.__onNewCoin(coin);
+    };
+    const scan = (node) => {
+        if (node.nodeType !== Node.ELEMENT_NODE) return;
+        if (node.matches('div[data-coin-mint]')) report(node);
+        node.querySelectorAll('div[data-coin-mint]').forEach(report);
+    };
+    const start = () => {
+        scan(document.body);
+        new MutationObserver((mutations) => {
+            for (const mutation of mutations) {
+                const target = mutation.target.nodeType === Node.ELEMENT_NODE
+                    ? mutation.target : mutation.target.parentElement;
+                const item = target && target.closest('div[data-index]');
+                if (item) scan(item);
+                mutation.addedNodes.forEach(scan);
+            }
+        }).observe(document.body, {
+            childList: true, subtree: true, characterData: true,
+            attributes: true, attributeFilter: ['data-coin-mint', 'src']
+        });
+    };
+    if (document.body) start();
+    else document.addEventListener('DOMContentLoaded', start);
+})();'''
+
 def connect_to_manager():
     QueueManager.register('get_queue')
     QueueManager.register('get_stop_event')
@@ -19,102 +98,246 @@ def connect_to_manager():
         print("   Make sure queue_manager.py is running first")
         sys.exit(1)
 
-def scrape_pump_fun():
-    data_queue, stop_event = connect_to_manager()
+def handle_popups(page):
+    print("🔄 Handling popups...")
+    for _ in range(3):
+        try:
+            page.click('button[data-test-id="how-it-works-button"]', timeout=8000)
+            time.sleep(2)
+            page.evaluate('''() => {
+                const closeImg = document.querySelector('img[alt="close"][src*="close_icon"]');
+                if (closeImg) closeImg.closest('button').click();
+            }''')
+            time.sleep(3)
+            break
+        except:
+            continue
+
+def stream_coins(page, stop_event):
+    """Let the injected observer push coins until stopped.
+
+    Playwright's sync API only dispatches exposed-function calls while
+    Python is inside a Playwright call, hence the short waits.
+    """
+    print("📡 Streaming new coins as they are listed...")
+    while not stop_event.is_set():
+        page.wait_for_timeout(100)
+
+def poll_coins(page, stop_event, emit):
+    """Original mode: read the visible rows every POLL_INTERVAL seconds"""
+    while not stop_event.is_set():
+        try:
+            # Wait for coin list
+            print("🔍 Locating newest coins at top of list...")
+            page.wait_for_selector('div[data-testid="virtuoso-item-list"]', timeout=60000)
+            
+            # Get visible coins
+            print("📦 Processing newest coins...")
+            coins = page.evaluate('''() => {
+                const extractCoin = ''' + EXTRACT_COIN_JS + ''';
+                const mainList = document.querySelector('div[data-testid="virtuoso-item-list"]');
+                if (!mainList) return [];
+                
+                const coins = [];
+                const items = mainList.querySelectorAll('div[data-index]');
+                
+                for (let i = 0; i < items.length; i++) {
+                    const item = items[i];
+                    const rect = item.getBoundingClientRect();
+                    const isVisible = (
+                        rect.top >= 0 &&
+                        rect.left >= 0 &&
+                        rect.bottom <= (window.innerHeight || document.documentElement.clientHeight) &&
+                        rect.right <= (window.innerWidth || document.documentElement.clientWidth)
+                    );
+                    
+                    const coin = isVisible && extractCoin(item);
+                    if (coin) {
+                        const created = Number(item.getAttribute('data-created'));  // Fixture rows only
+                        if (created) coin.latency_ms = Date.now() - created;
+                        coins.push(coin);
+                    }
+                }
+                return coins;
+            }''')
+            
+            for coin in coins:
+                emit(coin)
+            
+            # Wait before next scrape (interruptible)
+            print(f"🔄 Waiting {POLL_INTERVAL} seconds before next scrape...")
+            deadline = time.time() + POLL_INTERVAL
+            while not stop_event.is_set() and time.time() < deadline:
+                page.wait_for_timeout(100)
+                    
+        except Exception as e:
+            print(f"⚠️ Scraping error: {str(e)}")
+            if stop_event.is_set():
+                break
+            time.sleep(5)
+            continue
+
+def block_heavy_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        route.abort()
+    else:
+        route.continue_()
+
+class HeadlessScraper:
+    """The listing page in its own headless context, feeding ``emit``.
+
+    The page runs the injected observer. Image, font and media requests
+    are aborted (an <img> keeps its src attribute, so coin dicts are
+    unchanged), and a crashed or closed page is reopened by ``run``.
+    """
+    def __init__(self, browser, url, emit):
+        self.browser = browser
+        self.url = url
+        self.emit = emit
+        self.page = None
+        self.reported = 0  # Coins the observer reported, before dedupe
+        self.broken = False
+
+    def _report(self, coin):
+        self.reported += 1
+        self.emit(coin)
+
+    def open(self):
+        context = self.browser.new_context(user_agent=USER_AGENT, viewport=HEADLESS_VIEWPORT)
+        context.route("**/*", block_heavy_resources)
+        context.expose_function('__onNewCoin', self._report)
+        context.add_init_script(OBSERVER_JS)
+        page = context.new_page()
+        page.on('crash', lambda _page: setattr(self, 'broken', True))
+        print(f"🚀 Opening {self.url.split('?')[0]}...")
+        self.page = page
+        page.goto(self.url, timeout=120000)
+        if self.url == PUMP_FUN_URL:
+            handle_popups(page)
+        return page
+
+    def close(self):
+        page, self.page = self.page, None
+        if page is not None:
+            try:
+                page.context.close()
+            except Exception:
+                pass
+
+    def reopen(self):
+        self.broken = False
+        self.close()
+        try:
+            self.open()
+        except Exception as e:
+            print(f"⚠️ Could not open {self.url.split('?')[0]}: {str(e)}")
+            self.broken = True
+
+    def run(self, stop_event):
+        try:
+            self.open()
+        except Exception as e:
+            print(f"⚠️ Could not open {self.url.split('?')[0]}: {str(e)}")
+            self.broken = True
+
+        print("📡 Streaming new coins (headless)...")
+        next_check = time.time() + HEALTH_INTERVAL
+        while not stop_event.is_set():
+            if self.page is not None and not self.page.is_closed():
+                self.page.wait_for_timeout(100)  # Dispatches observer callbacks
+            else:
+                time.sleep(0.1)
+            if time.time() >= next_check:
+                next_check = time.time() + HEALTH_INTERVAL
+                if self.broken or self.page is None or self.page.is_closed():
+                    print(f"♻️ Reopening {self.url.split('?')[0]}")
+                    self.reopen()
+
+    def metrics(self):
+        """Renderer CPU time and JS heap from the DevTools Performance domain"""
+        try:
+            session = self.page.context.new_cdp_session(self.page)
+            session.send('Performance.enable')
+            values = {m['name']: m['value'] for m in session.send('Performance.getMetrics')['metrics']}
+            session.detach()
+            return {
+                'task_seconds': values.get('TaskDuration', 0.0),
+                'heap_mb': values.get('JSHeapUsedSize', 0.0) / 1e6,
+                'nodes': int(values.get('Nodes', 0))
+            }
+        except Exception as e:
+            return {'error': str(e)}
+
+def scrape_pump_fun(url=PUMP_FUN_URL, mode=SCRAPE_MODE, headless=HEADLESS, sink=None, stop_event=None,
+                    on_scraper=None):
+    """Scrape new coins into ``sink`` (the manager queue by default).
+
+    'headless' mode calls ``on_scraper(scraper)`` once it has stopped,
+    before the browser closes.
+    """
+    if sink is None:
+        data_queue, stop_event = connect_to_manager()
+        sink = data_queue.put
+    # Mints already sent: each goes to the queue once (survives page reloads,
+    # bounded memory); the consumer retries any it could not price
+    sent = Deduper(window=DEDUP_WINDOW, remember_all=False)
+
+    def emit(coin):
+        latency_ms = coin.pop('latency_ms', None)
+        if not all(coin.values()) or sent.seen(coin['mint']):
+            return
+        discovered = time.time()
+        mint = coin['mint'].replace('-latest', '')
+        trace_id = coin['trace_id'] = new_trace_id()
+        if latency_ms is not None:
+            tracer.mark(mint, 'listed', discovered - latency_ms / 1000, trace_id)
+        tracer.mark(mint, 'discovered', discovered, trace_id)
+        coin['queued_at'] = time.time()
+        sink(dict(coin))  # Convert to regular dict
+        tracer.mark(mint, 'queue_put', trace_id=trace_id)
+        latency = f" ({latency_ms:.0f}ms after listing)" if latency_ms is not None else ""
+        print(f"📤 Sent to queue: {coin['symbol']}{latency}")
     
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
+        browser = p.chromium.launch(headless=headless)
+
+        if mode == 'headless':
+            scraper = HeadlessScraper(browser, url, emit)
+            try:
+                scraper.run(stop_event)
+            except Exception as e:
+                print(f"\n❌ Main error: {str(e)}")
+            finally:
+                if on_scraper:
+                    on_scraper(scraper)
+                scraper.close()
+                browser.close()
+                print("✅ Scraper shutdown complete")
+            return
+
         context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            user_agent=USER_AGENT,
             viewport={"width": 1600, "height": 1400},
             device_scale_factor=1.5
         )
         page = context.new_page()
 
         try:
-            print("🚀 Navigating to pump.fun...")
-            page.goto("https://pump.fun/advanced?include-nsfw=true", timeout=120000)
+            if mode == 'stream':
+                # Registered before navigation so they survive reloads
+                page.expose_function('__onNewCoin', emit)
+                page.add_init_script(OBSERVER_JS)
+
+            print(f"🚀 Navigating to {url.split('?')[0]}...")
+            page.goto(url, timeout=120000)
             
-            # Handle popups
-            print("🔄 Handling popups...")
-            for _ in range(3):
-                try:
-                    page.click('button[data-test-id="how-it-works-button"]', timeout=8000)
-                    time.sleep(2)
-                    page.evaluate('''() => {
-                        const closeImg = document.querySelector('img[alt="close"][src*="close_icon"]');
-                        if (closeImg) closeImg.closest('button').click();
-                    }''')
-                    time.sleep(3)
-                    break
-                except:
-                    continue
+            if url == PUMP_FUN_URL:
+                handle_popups(page)
             
-            while not stop_event.is_set():
-                try:
-                    # Wait for coin list
-                    print("🔍 Locating newest coins at top of list...")
-                    page.wait_for_selector('div[data-testid="virtuoso-item-list"]', timeout=60000)
-                    
-                    # Get visible coins
-                    print("📦 Processing newest coins...")
-                    coins = page.evaluate('''() => {
-                        const mainList = document.querySelector('div[data-testid="virtuoso-item-list"]');
-                        if (!mainList) return [];
-                        
-                        const coins = [];
-                        const items = mainList.querySelectorAll('div[data-index]');
-                        
-                        for (let i = 0; i < items.length; i++) {
-                            const item = items[i];
-                            const coinDiv = item.querySelector('div[data-coin-mint]');
-                            if (!coinDiv) continue;
-                            
-                            const rect = item.getBoundingClientRect();
-                            const isVisible = (
-                                rect.top >= 0 &&
-                                rect.left >= 0 &&
-                                rect.bottom <= (window.innerHeight || document.documentElement.clientHeight) &&
-                                rect.right <= (window.innerWidth || document.documentElement.clientWidth)
-                            );
-                            
-                            if (isVisible) {
-                                const nameElement = item.querySelector('div.truncate.font-semibold.text-gray-300') || 
-                                                    item.querySelector('div.font-semibold.text-gray-300');
-                                const symbolElement = item.querySelector('div.mr-2.truncate.font-bold.text-white') || 
-                                                     item.querySelector('div.font-bold.text-white');
-                                
-                                coins.push({
-                                    mint: coinDiv.getAttribute('data-coin-mint'),
-                                    name: nameElement?.innerText,
-                                    symbol: symbolElement?.innerText,
-                                    img: item.querySelector('img[alt="coin"]')?.src,
-                                    timestamp: new Date().toISOString()
-                                });
-                            }
-                        }
-                        return coins;
-                    }''')
-                    
-                    # Put valid coins into queue
-                    for coin in coins:
-                        if all(coin.values()):
-                            data_queue.put(dict(coin))  # Convert to regular dict
-                            print(f"📤 Sent to queue: {coin['symbol']}")
-                    
-                    # Wait before next scrape (interruptible)
-                    print("🔄 Waiting 10 seconds before next scrape...")
-                    for _ in range(10):
-                        if stop_event.is_set():
-                            break
-                        time.sleep(1)
-                            
-                except Exception as e:
-                    print(f"⚠️ Scraping error: {str(e)}")
-                    if stop_event.is_set():
-                        break
-                    time.sleep(5)
-                    continue
+            if mode == 'stream':
+                stream_coins(page, stop_event)
+            else:
+                poll_coins(page, stop_event, emit)
                     
         except Exception as e:
             print(f"\n❌ Main error: {str(e)}")
@@ -124,6 +347,48 @@ def scrape_pump_fun():
             browser.close()
             print("✅ Scraper shutdown complete")
 
+def fixture_url(count, interval_ms):
+    from urllib.request import pathname2url
+    return f"file:{pathname2url(FIXTURE_PAGE)}?interval={interval_ms}&count={count}&recycle=1"
+
+def run_fixture(mode=SCRAPE_MODE, count=20, interval_ms=300):
+    """Run the scraper headless against the local fixture page and report throughput"""
+    tracer.enabled = False  # Keep fixture mints out of the latency traces
+    url = fixture_url(count, interval_ms)
+    stop_event = threading.Event()
+    coins = []
+    start = time.time()
+    deadline = start + count * interval_ms / 1000 + POLL_INTERVAL + 5
+
+    def sink(coin):
+        coins.append(coin)
+        if len(coins) >= count:
+            stop_event.set()
+
+    def report(scraper):
+        elapsed = time.time() - start
+        m = scraper.metrics()
+        if 'error' in m:
+            print(f"Page: {scraper.reported} reported, metrics unavailable")
+        else:
+            print(f"Page: {scraper.reported} reported, CPU {m['task_seconds'] / elapsed * 100:.1f}%, "
+                  f"heap {m['heap_mb']:.1f}MB, {m['nodes']} nodes")
+        try:
+            import psutil
+            browser_procs = [proc for proc in psutil.process_iter(['name', 'memory_info'])
+                             if 'chrom' in (proc.info['name'] or '').lower()]
+            rss = sum(proc.info['memory_info'].rss for proc in browser_procs if proc.info['memory_info'])
+            print(f"Browser processes: {len(browser_procs)}, total RSS {rss / 1e6:.0f}MB")
+        except ImportError:
+            pass
+
+    threading.Thread(target=lambda: (time.sleep(max(0, deadline - time.time())), stop_event.set()),
+                     daemon=True).start()
+    scrape_pump_fun(url=url, mode=mode, headless=True, sink=sink, stop_event=stop_event, on_scraper=report)
+    elapsed = time.time() - start
+    print(f"🧪 {mode}: {len(coins)}/{count} unique fixture coins, "
+          f"{len(coins) / elapsed * 60:.0f} mints/min over {elapsed:.1f}s")
+
 def main():
     def shutdown(signum, frame):
         print("\n🛑 Shutdown signal received")
@@ -132,8 +397,12 @@ def main():
     signal.signal(signal.SIGINT, shutdown)
     signal.signal(signal.SIGTERM, shutdown)
 
+    if len(sys.argv) > 1 and sys.argv[1] == 'fixture':
+        run_fixture(sys.argv[2] if len(sys.argv) > 2 else SCRAPE_MODE)
+        return
+
     print("🔄 Starting scraper - connecting to queue manager...")
     scrape_pump_fun()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
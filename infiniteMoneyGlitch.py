@@ -2,11 +2,21 @@ from multiprocessing.managers import BaseManager
 import time
 import signal
 import sys
-import json
+import threading
+import concurrent.futures
 from datetime import datetime
-import math
 import requests
 from collections import deque
+from rateLimiter import RateLimiter
+from queueManager import get_json_queue, send_pin
+from priceFrames import FrameAssembler
+from walletCache import WalletCache
+from ruleEngine import RuleEngine, NUMERIC_FIELDS, columns_from_dicts, load_strategies, relax_strategies
+from latencyTrace import Tracer
+from consoleDashboard import Dashboard, format_latencies
+from tradeJournal import TradeJournal, JOURNAL_FILE
+from timingWheel import TimingWheel
+from quoteCache import QuoteCache
 
 class QueueManager(BaseManager):
     pass
@@ -14,37 +24,108 @@ class QueueManager(BaseManager):
 # Configuration
 SOLANA_MINT = "So11111111111111111111111111111111111111112"
 BASE_URL = "http://localhost:3000/swap/quote-and-execute"
+QUOTE_URL = "http://localhost:3000/swap/quote"      # Quote only (prefetch)
+EXECUTE_URL = "http://localhost:3000/swap/execute"  # Execute a quoteResponse
 AUTO_SELL_URL = "http://localhost:3000/auto-sell/start"
 RPC_URL = "https://api.mainnet-beta.solana.com"
 DEFAULT_SLIPPAGE_BPS = 7000
 WALLET_ADDRESS = "YOUR_WALLET_ADDRESS_HERE"
 
+# Per-endpoint request budgets: (requests per second, burst)
+rate_limiter = RateLimiter({
+    'swap': (2.0, 3),
+    'swap_quote': (5.0, 5),
+    'solana_rpc': (5.0, 5),
+    'coingecko': (0.5, 2)
+})
+
+# Entry strategies (see ruleEngine.py for the rule format). The first
+# enabled strategy a token meets is reported as its condition_met.
+ENTRY_STRATEGIES = [
+    {'name': '1', 'enabled': False, 'all': [
+        {'field': 't_30s', 'op': '>', 'value': 30.0},
+        {'field': 't_1m', 'op': '>', 'value': 40.0},
+        {'count': ['t_2s', 't_5s', 't_2m'], 'below': -5.0, 'op': '<=', 'value': 0},
+        {'field': 'price', 'op': '>', 'value': 15e-06},
+        {'present': ['t_10s', 't_30s', 't_1m', 't_2m', 't_5m']}
+    ]},
+    {'name': '2', 'all': [
+        {'field': 'price', 'op': '>', 'value': 6.5e-05},
+        {'missing': ['t_5m', 't_10m']}
+    ]},
+    {'name': '3', 'enabled': False, 'all': [
+        {'any': [
+            {'field': 't_10s', 'op': '>', 'value': 300.0},
+            {'field': 't_30s', 'op': '>', 'value': 300.0}
+        ]},
+        {'field': 'price', 'op': '>', 'value': 3e-05},
+        {'count': ['t_2s', 't_5s', 't_10s', 't_30s', 't_1m', 't_2m'], 'below': -20.0, 'op': '==', 'value': 0}
+    ]}
+]
+STRATEGY_FILE = None  # Path to a JSON list of strategies, overrides ENTRY_STRATEGIES
+
+# Quote prefetch: tokens within PREFETCH_MARGIN of a strategy's price threshold
+# get a quote ahead of time, so a buy signal can go straight to execution.
+# Needs the NestJS API's split QUOTE_URL/EXECUTE_URL endpoints
+QUOTE_PREFETCH = False
+PREFETCH_MARGIN = 0.15         # Fraction of the threshold, e.g. price > 5.5e-05 for a 6.5e-05 rule
+QUOTE_TTL = 5.0                # Seconds a prefetched quote may be executed (frames come every ~3s)
+QUOTE_AMOUNT_TOLERANCE = 0.05  # Max relative gap between the quoted and the current buy amount
+
+strategies = load_strategies(STRATEGY_FILE) if STRATEGY_FILE else ENTRY_STRATEGIES
+entry_rules = RuleEngine(strategies)
+prefetch_rules = RuleEngine(relax_strategies(strategies, PREFETCH_MARGIN))
+
 bought_tokens = {}  # Stores {token_id: purchase_timestamp}
-purchase_queue = deque()
-processing_tokens = set()
+bought_expiry = TimingWheel()  # Cooldown deadline per bought token, guarded by bought_lock
+bought_lock = threading.Lock()
+BOUGHT_COOLDOWN = 16 * 60  # Seconds before a bought token may be bought again
+PURCHASE_WORKERS = 4      # Concurrent purchases in flight
+SIGNAL_MAX_AGE = 5.0      # Seconds; older signals are dropped instead of bought late
+BUY_USD = 940             # Target buy size in USD
+BALANCE_FRACTION = 0.1    # Max share of the wallet balance per buy
+BALANCE_TTL = 5.0         # Seconds between background balance refreshes
+SOL_PRICE_TTL = 30.0      # Seconds between background SOL/USD refreshes
+MAX_BALANCE_AGE = 30.0    # Older cached balance is refreshed inline before sizing
+MAX_SOL_PRICE_AGE = 120.0 # Older cached SOL/USD is refreshed inline before sizing
+TRACE_LATENCY = True      # Log signal, buy request/response and auto-sell times per mint (see latencyTrace.py)
+QUIET = '--quiet' in sys.argv  # No dashboard: python infiniteMoneyGlitch.py --quiet
+DASHBOARD_INTERVAL = 1.0  # Seconds between dashboard renders (only if something changed)
+JOURNAL_TRADES = True     # Journal signals and buys to JOURNAL_FILE; bought_tokens is recovered from it on start
+
+tracer = Tracer('infiniteMoneyGlitch', enabled=TRACE_LATENCY)
+dashboard = None  # Dashboard, started by main() unless QUIET
+journal = None    # TradeJournal, opened by main() if JOURNAL_TRADES
+pin_queue = None  # Manager queue: jupitersPrices keeps tokens in their cooldown in every frame, set by main()
+
+def track_bought(token_id, purchase_time):
+    with bought_lock:
+        bought_tokens[token_id] = purchase_time
+        bought_expiry.schedule(token_id, purchase_time + BOUGHT_COOLDOWN)
+    if pin_queue is not None:
+        send_pin(pin_queue, token_id)
 
 def clean_expired_tokens():
-    """Remove tokens that have been in bought_tokens for more than 13 minutes"""
-    current_time = time.time()
-    expired_tokens = [
-        token_id for token_id, purchase_time in bought_tokens.items()
-        if current_time - purchase_time > 16 * 60  # 13 minutes in seconds
-    ]
+    """Remove tokens that have been in bought_tokens for more than BOUGHT_COOLDOWN.
+
+    Only the cooldowns that ran out since the last call are touched, not
+    every bought token.
+    """
+    now = time.time()
+    expired_tokens = []
+    with bought_lock:
+        for token_id in bought_expiry.advance(now):
+            bought = bought_tokens.get(token_id)
+            if bought is not None and now - bought >= BOUGHT_COOLDOWN:
+                del bought_tokens[token_id]
+                expired_tokens.append(token_id)
     for token_id in expired_tokens:
-        bought_tokens.pop(token_id, None)
+        if pin_queue is not None:
+            send_pin(pin_queue, token_id, pinned=False)
         print(f"♻️ Removed expired token from tracking: {token_id}")
 
-def safe_convert(value):
-    try:
-        if isinstance(value, str):
-            value = value.replace('%', '').strip()
-            if value.lower() in ('', 'nan', 'none', 'null', 'n/a'):
-                return float('nan')
-        return float(value)
-    except:
-        return float('nan')
-
-def get40(wallet_address: str) -> int:
+def fetch_balance(wallet_address: str) -> int:
+    """Wallet balance in lamports from the Solana RPC"""
     payload = {
         "jsonrpc": "2.0",
         "id": 1,
@@ -52,25 +133,49 @@ def get40(wallet_address: str) -> int:
         "params": [wallet_address]
     }
     try:
+        rate_limiter.acquire('solana_rpc')
         response = requests.post(RPC_URL, json=payload, timeout=10)
+        rate_limiter.record_response('solana_rpc', response)
         response.raise_for_status()
         data = response.json()
         if "error" in data:
             raise Exception(f"RPC Error: {data['error']}")
-        return int(data["result"]["value"] * 0.1)
+        return int(data["result"]["value"])
     except Exception as e:
         raise Exception(f"Failed to fetch balance: {str(e)}")
 
-def usd_to_lamports() -> int:
+def fetch_sol_usd() -> float:
+    """SOL/USD price from CoinGecko"""
     try:
         url = "https://api.coingecko.com/api/v3/simple/price?ids=solana&vs_currencies=usd"
+        rate_limiter.acquire('coingecko')
         response = requests.get(url, timeout=10)
+        rate_limiter.record_response('coingecko', response)
         response.raise_for_status()
         data = response.json()
-        sol_price = data['solana']['usd']
-        return int((940 / sol_price) * 1_000_000_000)
+        return float(data['solana']['usd'])
     except Exception as e:
-        raise Exception(f"Error calculating USD to lamports: {str(e)}")
+        raise Exception(f"Error fetching SOL price: {str(e)}")
+
+wallet_cache = WalletCache(
+    lambda: fetch_balance(WALLET_ADDRESS), fetch_sol_usd,
+    balance_ttl=BALANCE_TTL, price_ttl=SOL_PRICE_TTL,
+    max_balance_age=MAX_BALANCE_AGE, max_price_age=MAX_SOL_PRICE_AGE
+)
+
+def get40(wallet_address: str = None) -> int:
+    """10% of the cached wallet balance, in lamports"""
+    return int(wallet_cache.balance() * BALANCE_FRACTION)
+
+def usd_to_lamports() -> int:
+    """Lamports worth BUY_USD at the cached SOL/USD price"""
+    return wallet_cache.usd_to_lamports(BUY_USD)
+
+def buy_amount() -> int:
+    return min(get40(WALLET_ADDRESS), usd_to_lamports())
+
+# One keep-alive connection pool for every swap API call
+swap_session = requests.Session()
 
 def buy(output_mint: str, amount: int) -> dict:
     """Execute a token buy with retry logic (3 total attempts)"""
@@ -92,7 +197,9 @@ def buy(output_mint: str, amount: int) -> dict:
         attempt += 1
         try:
             print("attempt:", attempt)
-            response = requests.get(url, params=params, timeout=30)
+            rate_limiter.acquire('swap')
+            response = swap_session.get(url, params=params, timeout=30)
+            rate_limiter.record_response('swap', response)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -113,6 +220,48 @@ def buy(output_mint: str, amount: int) -> dict:
         f"Details: {error_details}, Error: {str(last_exception)}"
     )
 
+def fetch_quote(output_mint: str, amount: int) -> dict:
+    """quoteResponse for buying ``output_mint`` with ``amount`` lamports"""
+    rate_limiter.acquire('swap_quote')
+    response = swap_session.get(
+        f"{QUOTE_URL}/{SOLANA_MINT}/{output_mint}/{amount}",
+        params={"slippage": DEFAULT_SLIPPAGE_BPS, "dynamicSlippage": "true"},
+        timeout=10
+    )
+    rate_limiter.record_response('swap_quote', response)
+    response.raise_for_status()
+    return response.json()
+
+def execute_quote(quote: dict) -> dict:
+    """Execute a prefetched quote; returns the same shape as buy()"""
+    rate_limiter.acquire('swap')
+    response = swap_session.post(
+        EXECUTE_URL,
+        json={
+            "quoteResponse": quote,
+            "priorityLevel": "high",
+            "maxPriorityFee": 100000,
+            "maxRetries": 3,
+            "commitment": "confirmed"
+        },
+        timeout=30
+    )
+    rate_limiter.record_response('swap', response)
+    response.raise_for_status()
+    return response.json()
+
+quote_cache = QuoteCache(lambda mint: fetch_quote(mint, buy_amount()), ttl=QUOTE_TTL) if QUOTE_PREFETCH else None
+
+def place_order(token_mint: str, amount: int) -> dict:
+    """Buy with a prefetched quote when a fresh one matches ``amount``, else quote and execute"""
+    quote = quote_cache.take(token_mint, amount, QUOTE_AMOUNT_TOLERANCE) if quote_cache is not None else None
+    if quote is not None:
+        try:
+            return execute_quote(quote)
+        except Exception as e:
+            print(f"⚠️ Prefetched quote failed for {token_mint}, requoting: {str(e)}")
+    return buy(output_mint=token_mint, amount=amount)
+
 def start_auto_sell(buy_response: dict, output_mint: str):
     """Start auto-sell process using the buy response data"""
     try:
@@ -126,7 +275,7 @@ def start_auto_sell(buy_response: dict, output_mint: str):
             "maxRetries": 20
         }
         
-        response = requests.post(
+        response = swap_session.post(
             AUTO_SELL_URL,
             json=payload,
             headers={'Content-Type': 'application/json'},
@@ -140,170 +289,237 @@ def start_auto_sell(buy_response: dict, output_mint: str):
         print(f"⚠️ Failed to start auto-sell: {str(e)}")
         raise
 
-import time
-from time import sleep
+class PurchasePipeline:
+    """Runs purchases on a worker pool so batch analysis never waits on a swap.
+
+    Each mint has at most one purchase pending or in flight. Signals carry a
+    'signal_time'; one that waited longer than ``max_age`` for a worker is
+    dropped. Signal-to-order latency is the time from the signal to the buy
+    request being sent ('order_time', set by ``execute``).
+    """
+    def __init__(self, execute, workers=PURCHASE_WORKERS, max_age=SIGNAL_MAX_AGE):
+        self.execute = execute
+        self.max_age = max_age
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='purchase')
+        self.lock = threading.Lock()
+        self.pending = {}  # mint -> future
+        self.latencies = deque(maxlen=1000)
+        self.dropped_stale = 0
 
-def process_purchase_queue():
-    while purchase_queue:
-        signal = purchase_queue[0]
+    def submit(self, signal):
+        """Queue a purchase; returns False if the mint is pending or already bought"""
+        token_mint = signal['id']
+        signal.setdefault('signal_time', time.time())
+        with self.lock:
+            if token_mint in self.pending or token_mint in bought_tokens:
+                return False
+            self.pending[token_mint] = self.pool.submit(self._run, signal)
+        return True
+
+    def _run(self, signal):
         token_mint = signal['id']
-        
-        if token_mint in processing_tokens or token_mint in bought_tokens:
-            purchase_queue.popleft()
-            continue
-            
-        processing_tokens.add(token_mint)
-        print(f"\n🛒 Processing purchase for {token_mint}")
-        
         try:
-            # Execute purchase
-            buy_response = buy(
-                output_mint=token_mint,
-                amount=min(get40(WALLET_ADDRESS), usd_to_lamports())
-            )
-            print("✓ Purchase executed successfully")
-            
-            # Update signal with swap USD value
-            swap_value = float(buy_response['quoteResponse']['swapUsdValue'])
-            signal['price'] = swap_value  # Now storing just the swap value
-            
-            # Track purchase time
-            bought_tokens[token_mint] = time.time()
-            
-            # Start auto-sell process with retries
-            max_retries = 4
-            retry_delay = 1  # seconds
-            for attempt in range(max_retries):
-                try:
-                    start_auto_sell(buy_response, token_mint)
-                    break  # Success, exit retry loop
-                except Exception as e:
-                    if attempt == max_retries - 1:  # Last attempt failed
-                        print(f"✗ Failed to start auto-sell after {max_retries} attempts: {str(e)}")
-                    else:
-                        print(f"⚠️ Auto-sell attempt {attempt + 1} failed, retrying in {retry_delay}s...")
-                        sleep(retry_delay)
-            
-            print(f"⏱️ Total processing time: {time.time() - purchase_time:.1f}s")
-                        
+            age = time.time() - signal['signal_time']
+            if age > self.max_age:
+                self.dropped_stale += 1
+                print(f"⌛ Dropped stale signal for {token_mint} ({age:.1f}s old)")
+                return
+            self.execute(signal)
+            if 'order_time' in signal:
+                self.latencies.append(signal['order_time'] - signal['signal_time'])
+                tracer.observe('signal_to_order', signal['order_time'] - signal['signal_time'])
         except Exception as e:
             print(f"✗ Purchase failed: {str(e)}")
         finally:
-            processing_tokens.discard(token_mint)
-            purchase_queue.popleft()
+            with self.lock:
+                self.pending.pop(token_mint, None)
+
+    def latency_summary(self):
+        if not self.latencies:
+            return "no orders yet"
+        ordered = sorted(self.latencies)
+        p50 = ordered[len(ordered) // 2]
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return f"signal→order p50 {p50 * 1000:.0f}ms, p95 {p95 * 1000:.0f}ms ({len(ordered)} orders, {self.dropped_stale} stale)"
+
+    def shutdown(self, wait=True):
+        self.pool.shutdown(wait=wait, cancel_futures=not wait)
+
+def execute_purchase(signal):
+    """Buy one token and hand it to auto-sell"""
+    token_mint = signal['id']
+    print(f"\n🛒 Processing purchase for {token_mint}")
+
+    amount = buy_amount()
+    signal['order_time'] = time.time()
+    tracer.mark(token_mint, 'buy_request', signal['order_time'])
+    buy_response = place_order(token_mint, amount)
+    response_time = time.time()
+    tracer.mark(token_mint, 'buy_response', response_time)
+    tracer.observe('buy_call', response_time - signal['order_time'])
+    wallet_cache.debit(amount)
+    print("✓ Purchase executed successfully")
+
+    # Update signal with swap USD value
+    entry_price = signal['price']
+    swap_value = float(buy_response['quoteResponse']['swapUsdValue'])
+    signal['price'] = swap_value  # Now storing just the swap value
+
+    # Track purchase time
+    purchase_time = time.time()
+    track_bought(token_mint, purchase_time)
+    if journal is not None:
+        journal.buy(token_mint, entry_price, buy_response['quoteResponse'], purchase_time)
+        journal.flush()  # Durable before auto-sell, so a restart can't rebuy it
+
+    # Start auto-sell process with retries
+    max_retries = 4
+    retry_delay = 1  # seconds
+    for attempt in range(max_retries):
+        try:
+            start_auto_sell(buy_response, token_mint)
+            tracer.mark(token_mint, 'auto_sell')
+            tracer.observe('response_to_auto_sell', time.time() - response_time)
+            break  # Success, exit retry loop
+        except Exception as e:
+            if attempt == max_retries - 1:  # Last attempt failed
+                print(f"✗ Failed to start auto-sell after {max_retries} attempts: {str(e)}")
+            else:
+                print(f"⚠️ Auto-sell attempt {attempt + 1} failed, retrying in {retry_delay}s...")
+                time.sleep(retry_delay)
+
+    print(f"⏱️ Total processing time: {time.time() - signal['signal_time']:.1f}s")
+
+purchase_pipeline = PurchasePipeline(execute_purchase)
+
+def prefetch_quotes(tokens, columns, matched):
+    """Request quotes for tokens within PREFETCH_MARGIN of an entry strategy"""
+    matched = set(matched.tolist())
+    for index in prefetch_rules.matches(columns)[0].tolist():
+        if index in matched:
+            continue  # Already a signal this batch
+        token = tokens[index]
+        mint = str(token.get('id', token.get('token', '')))
+        if mint not in bought_tokens and mint not in purchase_pipeline.pending:
+            quote_cache.prefetch(mint)
 
-def check_token(token):
+def check_batch(batch):
+    """Evaluate every entry strategy over the whole batch and build buy signals"""
+    tokens = [token for token in batch if isinstance(token, dict)]
+    if not tokens:
+        return []
     try:
+        columns = columns_from_dicts(tokens)
+        indices, condition_names, masks = entry_rules.matches(columns)
+        if quote_cache is not None:
+            prefetch_quotes(tokens, columns, indices)
+    except Exception as e:
+        print(f"Error in check_batch: {str(e)}")
+        return []
+
+    signal_time = time.time()
+    analysis_time = datetime.fromtimestamp(signal_time).strftime("%H:%M:%S.%f")
+    signals = []
+    for index, condition_met in zip(indices.tolist(), condition_names):
+        token = tokens[index]
         converted = {
             'token': str(token.get('token', '')),
-            'price': safe_convert(token.get('price')),
-            't_2s': safe_convert(token.get('t_2s')),
-            't_5s': safe_convert(token.get('t_5s')),
-            't_10s': safe_convert(token.get('t_10s')),
-            't_30s': safe_convert(token.get('t_30s')),
-            't_1m': safe_convert(token.get('t_1m')),
-            't_2m': safe_convert(token.get('t_2m')),
-            't_5m': safe_convert(token.get('t_5m')),
-            't_10m': safe_convert(token.get('t_10m')),
+            **{field: float(columns[field][index]) for field in NUMERIC_FIELDS},
             'id': str(token.get('id', token.get('token', ''))),
             'time': str(token.get('time', ''))
         }
-
-        # Calculate retrace counts for different conditions
-        retrace_count_c1 = sum(1 for key in ['t_2s', 't_5s', 't_2m'] if converted[key] < -5.0)
-        retrace_count_c3 = sum(1 for key in ['t_2s', 't_5s', 't_10s','t_30s', 't_1m','t_2m'] if converted[key] < -20.0)
-
-        # Check required fields for each condition
-        required_c1 = ['t_10s', 't_30s', 't_1m', 't_2m', 't_5m']
-        isRequired_c1 = not any(math.isnan(converted[field]) for field in required_c1)
-        
-        isRequired_NA_c2 = all(
-            token.get(field) is None 
-            for field in ['t_5m', 't_10m']
-        )
-        
-        # condition1 = all([
-        #     converted['t_30s'] > 30.0,
-        #     converted['t_1m'] > 40.0,
-        #     retrace_count_c1 <= 0,
-        #     converted['price'] > 15e-06,
-        #     converted['id'] not in bought_tokens,
-        #     isRequired_c1
-        # ])
-        
-        condition2 = all([
-            converted['price'] > 6.5e-05,
-            isRequired_NA_c2
-        ])
-
-        # condition3 = all([
-        #     (converted['t_10s'] > 300.0 or
-        #      converted['t_30s'] > 300.0),
-        #     #  converted['t_1m'] > 300.0),
-        #     converted['price'] > 3e-05,
-        #     # isRequired_NA_c3,
-        #     retrace_count_c3 == 0
-        # ])
-
-        # Check if any condition is met
-        if condition2:
-            # or condition1 or condition3:
-            condition_met = "2"
-            return {
-                **converted,
-                'signal': "BUY",
-                'analysis_time': datetime.now().strftime("%H:%M:%S.%f"),
-                'condition_met': condition_met,
-                'retrace_check': f"C1:{retrace_count_c1}/C3:{retrace_count_c3}",
-                'conditions': {
-                    # 'condition1': condition1,
-                    'condition2': condition2,
-                    # 'condition3': condition3
-                }
-            }
-        return None
-    except Exception as e:
-        print(f"Error in check_token: {str(e)}")
-        return None
+        retrace_counts = entry_rules.retrace_counts(columns, index)
+        signals.append({
+            **converted,
+            'signal': "BUY",
+            'analysis_time': analysis_time,
+            'signal_time': signal_time,
+            'condition_met': condition_met,
+            'retrace_check': "/".join(
+                f"C{name}:{','.join(map(str, counts))}" for name, counts in retrace_counts.items() if counts),
+            'conditions': {name: bool(mask[index]) for name, mask in masks.items()}
+        })
+    return signals
 
 def process_batch(batch):
     clean_expired_tokens()  # Clean expired tokens before processing new batch
     start_time = time.time()
-    print(f"\n📊 Processing {len(batch)} tokens @ {datetime.now().strftime('%H:%M:%S.%f')}")
     
     buy_signals = []
-    for token in batch:
-        if isinstance(token, dict):
-            signal = check_token(token)
-            if signal and signal['id'] not in processing_tokens:
-                buy_signals.append(signal)
-                purchase_queue.append(signal)
-    
-    process_purchase_queue()
+    for signal in check_batch(batch):
+        if purchase_pipeline.submit(signal):
+            tracer.mark(signal['id'], 'signal', signal['signal_time'])
+            if journal is not None:
+                journal.signal(signal)
+            buy_signals.append(signal)
     
-    print(f"✅ Processed in {(time.time() - start_time)*1000:.2f}ms")
-    if buy_signals:
-        print("\n🔥 BUY SIGNALS DETECTED 🔥")
-        for signal in buy_signals:
-            print(json.dumps(signal, indent=2))
-    print("=" * 60)
+    elapsed = time.time() - start_time
+    tracer.observe('batch', elapsed)
+    if dashboard is not None:
+        dashboard.update(batch_size=len(batch), batch_ms=elapsed * 1000, batch_time=start_time)
+        dashboard.count('batches')
+        dashboard.count('signals', len(buy_signals))
+    for signal in buy_signals:
+        print(f"🔥 BUY {signal['token']} C{signal['condition_met']} @ {signal['price']:.10f} "
+              f"({signal['retrace_check'] or 'no retrace rules'}) {signal['id']}")
+
+def render_dashboard(state):
+    """Dashboard lines: batch counters, purchases and held tokens (runs on the render thread)"""
+    now = time.time()
+    with bought_lock:
+        held = sorted(bought_tokens.items(), key=lambda item: item[1])
+    lines = [
+        f"🧠 Buy Signal Producer  {datetime.now().strftime('%H:%M:%S')}  "
+        f"strategies {','.join(entry_rules.names) or 'none'}",
+        f"   batches {state.get('batches', 0)}  last {state.get('batch_size', 0)} tokens in "
+        f"{state.get('batch_ms', 0):.2f}ms ({now - state.get('batch_time', now):.1f}s ago)  "
+        f"signals {state.get('signals', 0)}",
+        f"   purchases in flight {len(purchase_pipeline.pending)}  {purchase_pipeline.latency_summary()}",
+        f"   {quote_cache.summary() if quote_cache is not None else 'quote prefetch off'}",
+        "",
+        f"💼 Bought in the last {BOUGHT_COOLDOWN // 60}m ({len(held)})"
+    ]
+    lines += [f"  {mint:<44} {int(now - bought) // 60:>3}m{int(now - bought) % 60:02d}s" for mint, bought in held[-10:]]
+    latencies = format_latencies(tracer.summary())
+    if latencies:
+        lines += ["", "⏱️ Stage latencies"] + latencies
+    return lines
 
 def connect_to_manager():
     QueueManager.register('get_json_queue')
     QueueManager.register('get_stop_event')
+    QueueManager.register('get_pin_queue')
     manager = QueueManager(address=('localhost', 50000), authkey=b'abc123')
     try:
         manager.connect()
-        return (
-            manager.get_json_queue(),
-            manager.get_stop_event()
-        )
     except ConnectionRefusedError:
         print("❌ Could not connect to queue manager")
         sys.exit(1)
+    try:
+        pins = manager.get_pin_queue()
+    except Exception as e:
+        print(f"⚠ Pin queue unavailable (restart queueManager.py?): {str(e)}")
+        pins = None
+    return get_json_queue(manager), manager.get_stop_event(), pins
+
+def open_journal():
+    """Open the trade journal and restore bought_tokens still in their cooldown"""
+    start = time.perf_counter()
+    opened = TradeJournal(JOURNAL_FILE, source='infiniteMoneyGlitch')
+    for token_id, purchase_time in opened.recent_buys(time.time() - BOUGHT_COOLDOWN).items():
+        track_bought(token_id, purchase_time)
+    print(f"📒 Recovered {len(bought_tokens)} recent buys from {JOURNAL_FILE} "
+          f"in {(time.perf_counter() - start) * 1000:.1f}ms")
+    return opened
 
 def main():
+    global dashboard, journal, pin_queue
+
     def shutdown(signum, frame):
+        if dashboard is not None:
+            dashboard.stop()
+        if journal is not None:
+            journal.close()
         print("\n🛑 Shutdown signal received")
         sys.exit(0)
 
@@ -314,19 +530,151 @@ def main():
         print("❌ Please set your wallet address")
         sys.exit(1)
 
-    json_queue, stop_event = connect_to_manager()
+    json_queue, stop_event, pin_queue = connect_to_manager()
+    if JOURNAL_TRADES:
+        journal = open_journal()
+    wallet_cache.start()
+    if not QUIET:
+        dashboard = Dashboard(render_dashboard, DASHBOARD_INTERVAL).start()
+    frame_assembler = FrameAssembler()
     print("\n🚀 Buy signal producer ready")
 
     while not stop_event.is_set():
         try:
             batch = json_queue.get(timeout=1)
-            if isinstance(batch, list):
-                process_batch(batch)
+            if isinstance(batch, (list, dict)):
+                # Keyframes and full frames check every token, deltas only the changed ones
+                process_batch(frame_assembler.apply(batch))
         except Exception:
             if stop_event.is_set():
                 break
 
+    purchase_pipeline.shutdown(wait=False)
+    if quote_cache is not None:
+        quote_cache.shutdown()
+    wallet_cache.stop()
+    if dashboard is not None:
+        dashboard.stop()
+    if journal is not None:
+        journal.close()
+    print(f"📈 {purchase_pipeline.latency_summary()}")
     print("✅ Shutdown complete")
 
+def run_benchmark(frames=10, signals_per_frame=2, frame_interval=0.5, pre_order=0.2, order=0.4):
+    """Signal-to-order latency: inline purchases (old) vs. PurchasePipeline.
+
+    Frames arrive on a fixed schedule whether or not the consumer is ready;
+    latency counts from a frame's arrival. Purchases are simulated with
+    sleeps: ``pre_order`` seconds of balance and price lookups before the
+    buy request, ``order`` seconds for the swap.
+    """
+    tracer.enabled = False  # Keep simulated purchases out of the latency traces
+
+    def simulated(signal):
+        time.sleep(pre_order)
+        signal['order_time'] = time.time()
+        time.sleep(order)
+
+    def signals_for(frame, start):
+        arrival = start + frame * frame_interval
+        time.sleep(max(0, arrival - time.time()))
+        return [{'id': f"mint{frame}_{i}", 'signal_time': arrival} for i in range(signals_per_frame)]
+
+    def summarize(label, latencies, dropped, elapsed):
+        ordered = sorted(latencies)
+        p50 = ordered[len(ordered) // 2] * 1000 if ordered else float('nan')
+        worst = ordered[-1] * 1000 if ordered else float('nan')
+        print(f"{label:<10} {p50:>9.0f}ms {worst:>9.0f}ms {len(ordered):>7} {dropped:>8} {elapsed:>9.1f}s")
+
+    print(f"🔬 {frames} frames every {frame_interval}s, {signals_per_frame} signals each, "
+          f"{pre_order + order:.1f}s per purchase")
+    print(f"{'Mode':<10} {'p50':>11} {'max':>11} {'Orders':>7} {'Stale':>8} {'Analysis':>10}")
+
+    # Old behaviour: each frame's purchases run before the next frame is read
+    latencies, dropped = [], 0
+    start = time.time()
+    for frame in range(frames):
+        for signal in signals_for(frame, start):
+            if time.time() - signal['signal_time'] > SIGNAL_MAX_AGE:
+                dropped += 1
+                continue
+            simulated(signal)
+            latencies.append(signal['order_time'] - signal['signal_time'])
+    summarize("inline", latencies, dropped, time.time() - start)
+
+    pipeline = PurchasePipeline(simulated, workers=PURCHASE_WORKERS)
+    start = time.time()
+    for frame in range(frames):
+        for signal in signals_for(frame, start):
+            pipeline.submit(signal)
+    analysis = time.time() - start
+    pipeline.shutdown(wait=True)
+    summarize("pipeline", pipeline.latencies, pipeline.dropped_stale, analysis)
+
+def run_quote_benchmark(tokens=8, frames=8, frame_interval=1.0, quote_latency=0.25, execute_latency=0.35):
+    """Signal-to-fill latency with and without quote prefetching, against swapStub.
+
+    ``tokens`` mints climb 5% a frame from below strategy 2's price
+    threshold, each starting a frame later, so signals fire on different
+    frames; prefetching quotes them while they are within PREFETCH_MARGIN.
+    Latency counts from the signal to the swap response.
+    """
+    global BASE_URL, QUOTE_URL, EXECUTE_URL, AUTO_SELL_URL, quote_cache
+    from swapStub import SwapStub
+    tracer.enabled = False
+    stub = SwapStub(0, quote_latency, execute_latency).start()
+    BASE_URL, QUOTE_URL = f"{stub.url}/swap/quote-and-execute", f"{stub.url}/swap/quote"
+    EXECUTE_URL, AUTO_SELL_URL = f"{stub.url}/swap/execute", f"{stub.url}/auto-sell/start"
+    amount = 6_000_000_000
+    threshold = 6.5e-05
+
+    def frame(index):
+        batch = []
+        for token in range(tokens):
+            price = threshold * 0.8 * 1.05 ** max(0, index - token)
+            batch.append({'token': f"T{token}", 'id': f"{token:040d}pump", 'price': price,
+                          **{key: None for key in NUMERIC_FIELDS if key != 'price'}})
+        return batch
+
+    def run(cache):
+        global quote_cache
+        quote_cache = cache
+        bought_tokens.clear()
+        latencies = []
+
+        def purchase(signal):
+            place_order(signal['id'], amount)
+            latencies.append(time.time() - signal['signal_time'])
+            track_bought(signal['id'], time.time())
+
+        pipeline = PurchasePipeline(purchase)
+        for index in range(frames + tokens):
+            start = time.time()
+            for signal in check_batch(frame(index)):
+                pipeline.submit(signal)
+            time.sleep(max(0, frame_interval - (time.time() - start)))
+        pipeline.shutdown(wait=True)
+        return sorted(latencies)
+
+    print(f"🔬 {tokens} tokens crossing {threshold:g}, frames every {frame_interval}s, "
+          f"stub quote {quote_latency * 1000:.0f}ms + execute {execute_latency * 1000:.0f}ms")
+    print(f"{'Mode':<10} {'p50':>9} {'max':>9} {'Buys':>5}  Quotes")
+    for label, cache in (("cold", None),
+                         ("prefetch", QuoteCache(lambda mint: fetch_quote(mint, amount), ttl=QUOTE_TTL))):
+        latencies = run(cache)
+        p50 = latencies[len(latencies) // 2] * 1000 if latencies else float('nan')
+        worst = latencies[-1] * 1000 if latencies else float('nan')
+        print(f"{label:<10} {p50:>7.0f}ms {worst:>7.0f}ms {len(latencies):>5}  "
+              f"{cache.summary() if cache is not None else '-'}")
+        if cache is not None:
+            cache.shutdown()
+    print(f"   stub requests: {stub.requests}")
+    stub.stop()
+
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == 'bench':
+        run_benchmark()
+    elif len(sys.argv) > 1 and sys.argv[1] == 'bench-quotes':
+        run_quote_benchmark()
+    else:
+        main()
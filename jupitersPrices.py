@@ -1,21 +1,32 @@
 import random
+import asyncio
 import requests
 import time
 import threading
 import queue
 import warnings
 import json
-import math
 import socket
 import sys
 import concurrent.futures
+import numpy as np
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from multiprocessing.managers import BaseManager
-from datetime import datetime, timedelta
-from collections import defaultdict, deque
-from bisect import bisect_left
+from datetime import datetime
 from urllib.parse import quote
+from rateLimiter import RateLimiter
+from queueManager import (get_json_queue, publish_price_feed, JSON_TRANSPORT, HORIZON_KEYS,
+                          records_from_dicts, dicts_from_records)
+from priceFrames import DeltaPublisher
+from snapshotFile import write_json_snapshot, write_binary_snapshot
+from dedup import Deduper
+from timingWheel import TimingWheel
+from tokenState import ShardedTokenState
+from trackerPool import TrackerPool
+from replay import ReplayRecorder
+from latencyTrace import Tracer
+from consoleDashboard import Dashboard, format_change, format_latencies, top_movers
 
 # Disable warnings
 warnings.filterwarnings("ignore")
@@ -26,11 +37,36 @@ TOKEN_CHUNK_SIZE = 99   # Max tokens per API call
 MAX_TOKENS = 1500      # Support 20,000 tokens
 MAX_RETRIES = 2         # Reduced retries for speed
 MAX_HISTORY_HOURS = 24  # 24 hours price history
+HISTORY_CAPACITY = int(MAX_HISTORY_HOURS * 3600 / UPDATE_INTERVAL)  # Samples per token ring buffer
 MIN_HISTORY_FOR_CHANGES = 2
 JSON_OUTPUT_FILE = 'token_prices.json'
-API_CALL_DELAY = 0.04   # 40ms between API calls
+SNAPSHOT_FORMAT = 'json'  # 'json' (compact) or 'binary' (fixed-width, mmap-readable)
+BINARY_OUTPUT_FILE = 'token_prices.bin'
+API_CALL_DELAY = 0.04   # 40ms between API calls (sustained rate)
+API_CALL_BURST = 5      # Calls allowed back to back before pacing kicks in
 API_TIMEOUT = 10        # Reduced timeout
+RETRY_STATUSES = [429, 500, 502, 503, 504]
 MAX_WORKERS = 50        # Thread pool size for parallel processing
+DELTA_PUBLISHING = False    # Send keyframes + deltas to json_queue instead of full frames
+DELTA_PRICE_EPSILON = 1e-4  # Relative price move that counts as a change
+DELTA_CHANGE_EPSILON = 0.01 # Horizon change move (percentage points) that counts as a change
+KEYFRAME_INTERVAL = 20      # Full frame every N cycles (~60s)
+TRACKER_PROCESSES = 1   # >1: partition mints across processes, each tracking up to MAX_TOKENS
+STATE_SHARDS = 8        # Lock shards for token state (fetch workers contend per shard)
+EVICTION_POLICY = 'lru'  # At MAX_TOKENS evict by: 'lru' (stalest price), 'volatility' (flattest) or 'listing' (oldest)
+RETRY_TTL = 600         # Seconds after its last attempt that an unpriced mint's retry count is forgotten
+PRICE_ATTEMPTS = 6      # Price lookups for a new mint before it is dropped
+RETRY_BACKOFF = 5.0     # Seconds before an unpriced mint is looked up again, doubling per attempt
+RETRY_BACKOFF_MAX = 60.0  # Longest wait between lookups (5+10+20+40+60s over PRICE_ATTEMPTS)
+DEDUP_WINDOW = 600      # Seconds a mint from funPump is ignored after it was first received
+RECORD_REPLAY = False   # Append every published frame and funPump mint event to REPLAY_FILE
+REPLAY_FILE = 'recordings/session.replay'  # Replay/backtest with: python replay.py backtest <file>
+TRACE_LATENCY = True    # Log queue_get, first price and first-frame/horizon times per mint (see latencyTrace.py)
+QUIET = '--quiet' in sys.argv  # No dashboard: python jupitersPrices.py --quiet
+DASHBOARD_INTERVAL = 1.0  # Seconds between dashboard renders (only if something changed)
+DASHBOARD_TOP_N = 10      # Gainers and losers shown
+DASHBOARD_HORIZON = 't_1m'  # Horizon the movers are ranked by
+FETCH_MODE = 'threads'  # 'threads' (ThreadPoolExecutor + requests) or 'async' (one pooled aiohttp session)
 
 # SOCKS5 Proxy Configuration
 PROXY_USERNAME = "72dbb58e5f3bc021aebe"
@@ -43,6 +79,7 @@ TIME_INTERVALS = {
     '2s': 2, '5s': 5, '10s': 10, '30s': 30,
     '1m': 60, '2m': 120, '5m': 300, '10m': 600
 }
+HORIZON_SECONDS = list(TIME_INTERVALS.values())
 
 # Jupiter API
 JUPITER_API_URL = 'https://lite-api.jup.ag/price/v2'
@@ -50,16 +87,22 @@ JUPITER_API_URL = 'https://lite-api.jup.ag/price/v2'
 class QueueManager(BaseManager): pass
 
 # Global variables
-price_data = {}
-price_history = defaultdict(deque)
 token_queue = queue.Queue()
-data_lock = threading.Lock()
-active_tokens = set()
+# Prices, history, active/pending sets, retry counts and eviction index, sharded by mint
+token_state = ShardedTokenState(STATE_SHARDS, HISTORY_CAPACITY, MAX_TOKENS, EVICTION_POLICY, RETRY_TTL)
 stop_event = threading.Event()
-last_api_call_time = 0
-api_call_lock = threading.Lock()
-pending_tokens = set()
-token_retry_counts = defaultdict(int)
+rate_limiter = RateLimiter({'jupiter_price': (1 / API_CALL_DELAY, API_CALL_BURST)})
+# Repeats are dropped before they reach token_queue or the state locks. funPump sends
+# each mint once, so unpriced mints are retried here (retry_wheel); one that runs out
+# of PRICE_ATTEMPTS is forgotten, letting a resend (e.g. funPump restarted) try again
+mint_dedup = Deduper(window=DEDUP_WINDOW, remember_all=False)
+retry_wheel = TimingWheel(tick=0.5)  # Unpriced mint -> when to look it up again
+retry_lock = threading.Lock()
+recorder = None  # ReplayRecorder, opened by main() when RECORD_REPLAY is set
+tracer = Tracer('jupitersPrices', enabled=TRACE_LATENCY)
+dashboard = None  # Dashboard, started by main() unless QUIET
+price_feed = None  # Manager queue the sell monitor subscribes to ('queue' transport), set by main()
+forget_upstream = None  # Set in tracker processes: hands forgotten mints to the coordinator's mint_dedup
 
 class ProxyManager:
     """Handles SOCKS5 proxy configuration for API calls"""
@@ -84,20 +127,24 @@ class ProxyManager:
         except Exception as e:
             print(f"⚠ Proxy configuration warning: {str(e)}")
 
+    def get_proxy_url(self):
+        """Return the SOCKS5 proxy URL with encoded credentials"""
+        encoded_username = quote(PROXY_USERNAME)
+        encoded_password = quote(PROXY_PASSWORD)
+        return f"socks5://{encoded_username}:{encoded_password}@{PROXY_HOST}:{PROXY_PORT}"
+
     def get_session(self):
         """Return a requests session with proxy configuration"""
         session = requests.Session()
         if self.proxy_configured:
-            encoded_username = quote(PROXY_USERNAME)
-            encoded_password = quote(PROXY_PASSWORD)
-            proxy_url = f"socks5://{encoded_username}:{encoded_password}@{PROXY_HOST}:{PROXY_PORT}"
+            proxy_url = self.get_proxy_url()
             session.proxies = {'http': proxy_url, 'https': proxy_url}
         
         # Configure retry strategy
         retry_strategy = Retry(
             total=MAX_RETRIES,
             backoff_factor=0.5,  # Reduced backoff for speed
-            status_forcelist=[429, 500, 502, 503, 504],
+            status_forcelist=RETRY_STATUSES,
             allowed_methods=["GET"],
             respect_retry_after_header=False  # Disabled for speed
         )
@@ -110,9 +157,95 @@ class ProxyManager:
         session.mount("https://", adapter)
         return session
 
+    def get_async_connector(self, limit):
+        """Return a pooled aiohttp connector, routed through the proxy when available"""
+        import aiohttp
+        if self.proxy_configured:
+            try:
+                from aiohttp_socks import ProxyConnector
+                return ProxyConnector.from_url(self.get_proxy_url(), limit=limit, rdns=True)
+            except ImportError as e:
+                print(f"⚠ Async proxy configuration warning: {str(e)}")
+        return aiohttp.TCPConnector(limit=limit)
+
+class AsyncPriceFetcher:
+    """Fetches price chunks concurrently over one long-lived aiohttp session.
+
+    The session and its connection pool live on a private event loop thread,
+    so connections (and TLS sessions) through the proxy are reused across
+    chunks and cycles. Worker threads call ``fetch_chunks`` synchronously.
+    """
+    def __init__(self, max_connections=MAX_WORKERS):
+        self.max_connections = max_connections
+        self.loop = None
+        self.session = None
+        self.thread = None
+        self.ready = threading.Event()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+        self.ready.wait()
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._open_session())
+        self.ready.set()
+        self.loop.run_forever()
+
+    async def _open_session(self):
+        import aiohttp
+        self.session = aiohttp.ClientSession(
+            connector=proxy_manager.get_async_connector(self.max_connections),
+            timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
+            headers={'User-Agent': 'JupiterPriceTracker/4.0'}
+        )
+
+    async def _fetch(self, token_ids):
+        if not token_ids:
+            return {}
+        
+        for attempt in range(MAX_RETRIES + 1):
+            await rate_limiter.acquire_async('jupiter_price')
+            try:
+                async with self.session.get(JUPITER_API_URL, params={'ids': ','.join(token_ids)}) as response:
+                    rate_limiter.record_response('jupiter_price', response)
+                    status = response.status
+                    if status == 200:
+                        return parse_price_response(await response.json(content_type=None))
+            except Exception:
+                status = None  # Connection error or timeout: backed off and retried like a 5xx
+            
+            if (status is not None and status not in RETRY_STATUSES) or attempt == MAX_RETRIES:
+                return None
+            await asyncio.sleep(0.5 * (2 ** attempt))  # Same backoff as the requests Retry
+
+    async def _fetch_all(self, token_chunks):
+        return await asyncio.gather(*(self._fetch(chunk) for chunk in token_chunks))
+
+    def fetch_chunks(self, token_chunks):
+        """Fetch every chunk concurrently; returns one result per chunk (None on failure)"""
+        return asyncio.run_coroutine_threadsafe(self._fetch_all(token_chunks), self.loop).result()
+
+    def close(self):
+        if self.loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.session.close(), self.loop).result(timeout=2)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
 # Initialize proxy manager and thread pool
 proxy_manager = ProxyManager()
 executor = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS)
+async_fetcher = AsyncPriceFetcher() if FETCH_MODE == 'async' else None
+# Shared-memory snapshots always hold the latest full frame, so deltas only apply to the queue
+delta_publisher = (
+    DeltaPublisher(DELTA_PRICE_EPSILON, DELTA_CHANGE_EPSILON, KEYFRAME_INTERVAL)
+    if DELTA_PUBLISHING and JSON_TRANSPORT == 'queue' else None
+)
 
 def connect_to_manager():
     """Connect to multiprocessing manager without proxy"""
@@ -126,85 +259,49 @@ def connect_to_manager():
         QueueManager.register('get_stop_event')
         manager = QueueManager(address=('localhost', 50000), authkey=b'abc123')
         manager.connect()
-        return manager.get_queue(), manager.get_json_queue(), manager.get_stop_event()
+        return manager.get_queue(), get_json_queue(manager), manager.get_stop_event()
     except Exception as e:
         print(f"❌ Queue manager error: {str(e)}")
         return None, None, None
     finally:
         socket.socket = original_socket
 
-def interpolate_price(history, target_time):
-    """Optimized price interpolation"""
-    if not history:
+def connect_pin_queue():
+    """Manager queue of pin/unpin requests for held mints (see queueManager.send_pin)"""
+    try:
+        QueueManager.register('get_pin_queue')
+        manager = QueueManager(address=('localhost', 50000), authkey=b'abc123')
+        manager.connect()
+        return manager.get_pin_queue()
+    except Exception as e:
+        print(f"⚠ Pin queue unavailable (restart queueManager.py?): {str(e)}")
         return None
-        
-    history_list = list(history)
-    timestamps = [point[0] for point in history_list]
-    pos = bisect_left(timestamps, target_time)
-    
-    if pos == 0:
-        return history_list[0][1]
-    if pos == len(timestamps):
-        return history_list[-1][1]
-    
-    t_prev, p_prev = history_list[pos-1]
-    t_next, p_next = history_list[pos]
-    
-    if t_next == t_prev:
-        return p_prev
-    
-    factor = (target_time - t_prev).total_seconds() / (t_next - t_prev).total_seconds()
-    return p_prev + factor * (p_next - p_prev)
 
-def calculate_percentage_changes(token_id, current_price, current_time):
-    """Optimized percentage change calculation"""
-    changes = {interval: math.nan for interval in TIME_INTERVALS}
-    
+def connect_price_feed():
+    """Manager queue for the sell monitor's price feed (None on 'shm': it reads the snapshot buffer)"""
+    if JSON_TRANSPORT == 'shm':
+        return None
     try:
-        history = price_history.get(token_id, deque())
-        if not history:
-            return changes
-            
-        oldest_time = history[0][0]
-        
-        for interval, seconds in TIME_INTERVALS.items():
-            if (current_time - oldest_time).total_seconds() < seconds:
-                continue
-                
-            target_time = current_time - timedelta(seconds=seconds)
-            historical_price = interpolate_price(history, target_time)
-            
-            if historical_price and historical_price > 0:
-                changes[interval] = ((current_price - historical_price) / historical_price) * 100
-    except Exception:
-        pass
-    
-    return changes
+        QueueManager.register('get_price_feed')
+        manager = QueueManager(address=('localhost', 50000), authkey=b'abc123')
+        manager.connect()
+        return manager.get_price_feed()
+    except Exception as e:
+        print(f"⚠ Price feed unavailable (restart queueManager.py?): {str(e)}")
+        return None
 
 def cleanup_old_history():
     """Optimized history cleanup"""
-    cutoff_time = datetime.now() - timedelta(hours=MAX_HISTORY_HOURS)
-    with data_lock:
-        for token_id in list(price_history.keys()):
-            while price_history[token_id] and price_history[token_id][0][0] < cutoff_time:
-                price_history[token_id].popleft()
-            
-            if not price_history[token_id]:
-                del price_history[token_id]
+    cutoff_time = time.time() - MAX_HISTORY_HOURS * 3600
+    token_state.cleanup(cutoff_time)
 
 def fetch_token_prices_batch(token_ids):
     """Fetch prices for a batch of tokens with minimal overhead"""
     if not token_ids:
         return {}
     
-    # Enforce minimum delay between API calls
-    global last_api_call_time
-    with api_call_lock:
-        current_time = time.time()
-        elapsed = current_time - last_api_call_time
-        if elapsed < API_CALL_DELAY:
-            time.sleep(API_CALL_DELAY - elapsed)
-        last_api_call_time = time.time()
+    # Wait for a slot in the shared token bucket (sleeps outside any lock)
+    rate_limiter.acquire('jupiter_price')
     
     try:
         session = proxy_manager.get_session()
@@ -215,51 +312,45 @@ def fetch_token_prices_batch(token_ids):
             timeout=API_TIMEOUT,
             headers={'User-Agent': 'JupiterPriceTracker/4.0'}
         )
+        rate_limiter.record_response('jupiter_price', response)
         
         if response.status_code != 200:
             return None
         
-        data = response.json().get('data', {})
-        return {
-            token_id: {
-                'price': token_data['price'],
-                'symbol': token_data.get('symbol', token_id[:4] + '...'),
-                'timestamp': datetime.now().strftime('%H:%M:%S')
-            }
-            for token_id, token_data in data.items()
-            if 'price' in token_data and token_data['price'] != '0'
-        }
+        return parse_price_response(response.json())
     except Exception:
         return None
 
+def parse_price_response(payload):
+    """Convert a price/v2 response body into per-token price data"""
+    data = payload.get('data') or {}
+    return {
+        token_id: {
+            'price': token_data['price'],
+            'symbol': token_data.get('symbol', token_id[:4] + '...'),
+            'timestamp': datetime.now().strftime('%H:%M:%S')
+        }
+        for token_id, token_data in data.items()
+        if token_data and 'price' in token_data and token_data['price'] != '0'
+    }
+
+def fetch_prices(token_ids):
+    """Fetch one batch of prices using the configured FETCH_MODE"""
+    if async_fetcher is not None:
+        return async_fetcher.fetch_chunks([token_ids])[0]
+    return fetch_token_prices_batch(token_ids)
+
 def process_token_chunk(chunk):
     """Process a chunk of tokens in parallel"""
-    chunk_data = fetch_token_prices_batch(chunk)
-    if not chunk_data:
-        return 0
-    
-    current_time = datetime.now()
-    updated_count = 0
-    
-    with data_lock:
-        for token_id, data in chunk_data.items():
-            try:
-                price = float(data['price'])
-                if price <= 0:
-                    continue
-                    
-                price_data[token_id] = data
-                price_history[token_id].append((current_time, price))
-                updated_count += 1
-            except (ValueError, KeyError):
-                continue
-    
-    return updated_count
+    return store_chunk_prices(fetch_token_prices_batch(chunk))
+
+def store_chunk_prices(chunk_data):
+    """Record fetched prices and history samples for one chunk"""
+    return token_state.store_prices(chunk_data)
 
 def update_all_prices():
     """Update all token prices in parallel"""
-    with data_lock:
-        current_tokens = list(active_tokens)
+    current_tokens = token_state.active_tokens()
     
     if not current_tokens:
         return 0
@@ -268,6 +359,11 @@ def update_all_prices():
     token_chunks = [current_tokens[i:i+TOKEN_CHUNK_SIZE] 
                    for i in range(0, len(current_tokens), TOKEN_CHUNK_SIZE)]
     
+    if async_fetcher is not None:
+        # Pipeline every chunk over the shared session, then store the results
+        return sum(store_chunk_prices(chunk_data)
+                   for chunk_data in async_fetcher.fetch_chunks(token_chunks))
+    
     # Process chunks in parallel
     futures = [executor.submit(process_token_chunk, chunk) for chunk in token_chunks]
     results = [f.result() for f in concurrent.futures.as_completed(futures)]
@@ -275,105 +371,143 @@ def update_all_prices():
     return sum(results)
 
 def write_to_json(data):
-    """Optimized JSON writing"""
+    """Atomic snapshot write (temp file + rename, so readers never see a partial file)"""
     try:
-        with open(JSON_OUTPUT_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
+        if SNAPSHOT_FORMAT == 'binary':
+            write_binary_snapshot(BINARY_OUTPUT_FILE, data)
+        else:
+            write_json_snapshot(JSON_OUTPUT_FILE, data)
     except Exception:
         pass
 
-def prepare_output_data(current_tokens):
+def prepare_output_data():
     """Prepare output data efficiently"""
-    output_data = []
-    current_time = datetime.now()
+    # All horizons for all active tokens, one vectorized pass per shard
+    now = time.time()
+    token_ids, prices, changes, timestamps = token_state.snapshot(now, HORIZON_SECONDS)
+    if not token_ids:
+        return []
+    tracer.mark_frame(token_ids, ~np.isnan(changes) & (prices > 0)[:, None], now)
     
-    for token_id in current_tokens:
-        data = price_data.get(token_id)
-        if not data:
-            continue
-            
+    changes = np.round(changes, 2)
+    change_rows = np.where(np.isnan(changes), None, changes).tolist()
+    
+    return [
+        {
+            "token": token_id[:8],
+            "price": current_price,
+            "t_2s": t_2s,
+            "t_5s": t_5s,
+            "t_10s": t_10s,
+            "t_30s": t_30s,
+            "t_1m": t_1m,
+            "t_2m": t_2m,
+            "t_5m": t_5m,
+            "t_10m": t_10m,
+            "id": token_id,
+            "time": timestamp
+        }
+        for token_id, current_price, (t_2s, t_5s, t_10s, t_30s, t_1m, t_2m, t_5m, t_10m), timestamp
+        in zip(token_ids, prices.tolist(), change_rows, timestamps)
+        if current_price > 0
+    ]
+
+def render_dashboard(state):
+    """Dashboard lines from the latest published frame (runs on the render thread)"""
+    frame = state.get('frame', [])
+    age = time.time() - state.get('published', time.time())
+    columns = ' '.join(f"{key[2:]:<8}" for key in HORIZON_KEYS)
+    header = f"  {'Token':<8} {'Price':<14} {columns} {'ID':<44}"
+
+    def rows(items):
+        return [f"  {item['token']:<8} {item['price']:<14.8f} "
+                f"{' '.join(f'{format_change(item[key]):<8}' for key in HORIZON_KEYS)} {item['id']:<44}"
+                for item in items]
+
+    gainers, losers = top_movers(frame, DASHBOARD_HORIZON, DASHBOARD_TOP_N)
+    lines = [
+        f"🚀 Jupiter Price Tracker  {datetime.now().strftime('%H:%M:%S')}  "
+        f"tokens {len(frame)}/{MAX_TOKENS}  frames {state.get('frames', 0)}  last frame {age:.1f}s ago",
+        f"   mints received {mint_dedup.misses}  repeats dropped {mint_dedup.hits}"
+        + (f"  recording to {REPLAY_FILE}" if recorder is not None else ""),
+        "",
+        f"📈 Top gainers ({DASHBOARD_HORIZON})", header, *rows(gainers),
+        f"📉 Top losers ({DASHBOARD_HORIZON})", header, *rows(losers)
+    ]
+    latencies = format_latencies(tracer.summary())
+    if latencies:
+        lines += ["", "⏱️ Stage latencies"] + latencies
+    return lines
+
+def pin_token(mint):
+    """Track ``mint`` and never evict it at MAX_TOKENS (e.g. while a position is held)"""
+    token_state.pin(mint)
+    token_queue.put({'mint': mint})  # Bypasses mint_dedup; a no-op if already tracked
+
+def unpin_token(mint):
+    token_state.unpin(mint)
+
+def apply_pin(mint, pinned):
+    if pinned:
+        pin_token(mint)
+    else:
+        unpin_token(mint)
+
+def pin_consumer(pin_queue, apply=apply_pin):
+    """Apply pin/unpin requests from the buyers and sell monitor (``apply`` routes them in tracker mode)"""
+    while not stop_event.is_set():
         try:
-            current_price = float(data.get('price', 0))
-            if current_price <= 0:
-                continue
-                
-            changes = calculate_percentage_changes(token_id, current_price, current_time)
-            
-            output_data.append({
-                "token": token_id[:8],
-                "price": current_price,
-                "t_2s": None if math.isnan(changes['2s']) else round(changes['2s'], 2),
-                "t_5s": None if math.isnan(changes['5s']) else round(changes['5s'], 2),
-                "t_10s": None if math.isnan(changes['10s']) else round(changes['10s'], 2),
-                "t_30s": None if math.isnan(changes['30s']) else round(changes['30s'], 2),
-                "t_1m": None if math.isnan(changes['1m']) else round(changes['1m'], 2),
-                "t_2m": None if math.isnan(changes['2m']) else round(changes['2m'], 2),
-                "t_5m": None if math.isnan(changes['5m']) else round(changes['5m'], 2),
-                "t_10m": None if math.isnan(changes['10m']) else round(changes['10m'], 2),
-                "id": token_id,
-                "time": data.get('timestamp', '')
-            })
-        except Exception:
+            message = pin_queue.get(timeout=0.5)
+            apply(message['mint'], message['pin'])
+        except queue.Empty:
             continue
-    
-    return output_data
-
-def print_console_output(output_data):
-    """Print formatted console output"""
-    print("\n" + "="*180)
-    header = f"{'Token':<8} {'Price':<15} {'2s':<8} {'5s':<8} {'10s':<8} {'30s':<8} {'1m':<8} {'2m':<8} {'5m':<8} {'10m':<8} {'ID':<50} {'Time':<8}"
-    print(header)
-    print("-"*180)
-    
-    for item in output_data:
-        # Create formatted strings for each change value first
-        t_2s = 'N/A' if item['t_2s'] is None else f"{item['t_2s']:.2f}%"
-        t_5s = 'N/A' if item['t_5s'] is None else f"{item['t_5s']:.2f}%"
-        t_10s = 'N/A' if item['t_10s'] is None else f"{item['t_10s']:.2f}%"
-        t_30s = 'N/A' if item['t_30s'] is None else f"{item['t_30s']:.2f}%"
-        t_1m = 'N/A' if item['t_1m'] is None else f"{item['t_1m']:.2f}%"
-        t_2m = 'N/A' if item['t_2m'] is None else f"{item['t_2m']:.2f}%"
-        t_5m = 'N/A' if item['t_5m'] is None else f"{item['t_5m']:.2f}%"
-        t_10m = 'N/A' if item['t_10m'] is None else f"{item['t_10m']:.2f}%"
-        
-        line = (f"{item['token']:<8} {item['price']:<15.8f} "
-               f"{t_2s:<8} {t_5s:<8} {t_10s:<8} {t_30s:<8} "
-               f"{t_1m:<8} {t_2m:<8} {t_5m:<8} {t_10m:<8} "
-               f"{item['id']:<50} {item['time']:<8}")
-        print(line)
-    
-    print("="*180)
+        except Exception:
+            if stop_event.is_set():
+                break
+            time.sleep(0.5)
+
+def schedule_retry(mint, attempts):
+    """Look ``mint`` up again after a backoff that doubles with each attempt"""
+    delay = min(RETRY_BACKOFF * 2 ** (attempts - 1), RETRY_BACKOFF_MAX)
+    with retry_lock:
+        retry_wheel.schedule(mint, time.time() + delay)
+
+def requeue_due_retries():
+    """Put unpriced mints whose backoff ran out back on token_queue"""
+    with retry_lock:
+        due = retry_wheel.advance()
+    for mint in due:
+        token_queue.put({'mint': mint + '-latest'})
+
+def forget_mint(mint):
+    """Let a later resend of ``mint`` through the deduper"""
+    if forget_upstream is not None:
+        forget_upstream(mint)
+    else:
+        mint_dedup.forget(mint)
 
 def process_new_tokens():
     """Process new tokens in parallel"""
     while not stop_event.is_set():
         try:
+            requeue_due_retries()
             coin = token_queue.get(timeout=0.1)
             mint = coin['mint'].replace('-latest', '')
             
-            with data_lock:
-                if mint in active_tokens or mint in pending_tokens:
-                    continue
-                    
-                if len(active_tokens) >= MAX_TOKENS:
-                    # Remove oldest token
-                    if not active_tokens:
-                        continue
-                    oldest_token = min(
-                        active_tokens,
-                        key=lambda x: price_history[x][-1][0] if price_history.get(x) else datetime.min
-                    )
-                    active_tokens.remove(oldest_token)
-                    price_data.pop(oldest_token, None)
-                    price_history.pop(oldest_token, None)
-                
-                pending_tokens.add(mint)
-                token_retry_counts[mint] = token_retry_counts.get(mint, 0) + 1
-                
-                if token_retry_counts[mint] > 6:
-                    pending_tokens.discard(mint)
-                    token_retry_counts.pop(mint, None)
-                    continue
+            attempts = token_state.reserve(mint)
+            if not attempts:
+                continue  # Already active or pending
+            with retry_lock:
+                retry_wheel.cancel(mint)  # Resent before its retry came up
+            
+            if attempts > PRICE_ATTEMPTS:
+                token_state.release(mint, forget=True)
+                forget_mint(mint)
+                continue
+            
+            if len(token_state) >= MAX_TOKENS:
+                # Evict per EVICTION_POLICY (if everything is pinned, go over the cap)
+                token_state.evict_one()
             
             # Process token addition in parallel
             executor.submit(process_single_token, mint)
@@ -385,63 +519,82 @@ def process_new_tokens():
 
 def process_single_token(mint):
     """Process a single token addition"""
-    price_data = fetch_token_prices_batch([mint])
+    price_data = fetch_prices([mint])
     if not price_data or mint not in price_data:
-        with data_lock:
-            pending_tokens.discard(mint)
-            if token_retry_counts.get(mint, 0) <= 2:
-                token_queue.put({'mint': mint + '-latest'})
+        attempts = token_state.attempts(mint)
+        if attempts < PRICE_ATTEMPTS:
+            token_state.release(mint)
+            schedule_retry(mint, attempts)
+        else:
+            token_state.release(mint, forget=True)
+            forget_mint(mint)
         return
     
     try:
-        price = float(price_data[mint]['price'])
-        with data_lock:
-            active_tokens.add(mint)
-            price_history[mint].append((datetime.now(), price))
-            pending_tokens.discard(mint)
-            token_retry_counts.pop(mint, None)
+        token_state.activate(mint, float(price_data[mint]['price']))
+        tracer.mark(mint, 'first_price')
     except Exception:
-        with data_lock:
-            pending_tokens.discard(mint)
+        token_state.release(mint)
+
+def publish_output(output_data, json_queue):
+    """Dashboard, snapshot file and json_queue for one frame"""
+    # The dashboard formats the frame on its own thread, at most once per DASHBOARD_INTERVAL
+    if dashboard is not None:
+        dashboard.update(frame=output_data, published=time.time())
+        dashboard.count('frames')
+    
+    # Write to JSON
+    write_to_json(output_data)
+
+    if recorder is not None or price_feed is not None:
+        records = records_from_dicts(output_data)
+        if recorder is not None:
+            recorder.record_frame(records)
+            recorder.flush()
+        if price_feed is not None:
+            try:
+                publish_price_feed(price_feed, records)
+            except Exception:
+                pass
+    
+    # Send to queue if available
+    if json_queue:
+        try:
+            if delta_publisher is not None:
+                json_queue.put(delta_publisher.encode(output_data))
+            else:
+                json_queue.put(output_data)
+        except Exception:
+            pass
 
-def update_price_data(json_queue):
+def update_price_data(json_queue, publish=None):
     """Main data processing loop with parallel execution"""
+    publish = publish or (lambda output_data: publish_output(output_data, json_queue))
     while not stop_event.is_set():
         start_time = time.time()
         
         # Clean up old history occasionally
         if random.random() < 0.05:
             cleanup_old_history()
+        token_state.expire_retries()  # Only touches retry counts that are due
         
         # Update all prices in parallel
         updated_count = update_all_prices()
+        fetched_time = time.time()
+        tracer.observe('fetch_cycle', fetched_time - start_time)
         
         if updated_count > 0:
-            with data_lock:
-                current_tokens = list(active_tokens)
-            
-            output_data = prepare_output_data(current_tokens)
-            
-            # Print to console
-            print_console_output(output_data)
-            
-            # Write to JSON
-            write_to_json(output_data)
-            
-            # Send to queue if available
-            if json_queue:
-                try:
-                    json_queue.put(output_data)
-                except Exception:
-                    pass
+            publish(prepare_output_data())
+            tracer.observe('frame_publish', time.time() - fetched_time)
         
         # Adjust sleep time based on actual processing time
         elapsed = time.time() - start_time
         sleep_time = max(0.1, UPDATE_INTERVAL - elapsed)
         time.sleep(sleep_time)
 
-def queue_consumer():
-    """Optimized queue consumer"""
+def queue_consumer(route=None):
+    """Optimized queue consumer (``route`` hands coins to tracker processes)"""
+    route = route or token_queue.put
     mp_queue, json_queue, mp_stop_event = connect_to_manager()
     if mp_queue is None:
         stop_event.set()
@@ -450,7 +603,16 @@ def queue_consumer():
     while not stop_event.is_set():
         try:
             coin = mp_queue.get(timeout=0.1)
-            token_queue.put(coin)
+            if recorder is not None:
+                recorder.record_mint(coin)
+            mint = coin['mint'].replace('-latest', '')
+            if mint_dedup.seen(mint):
+                continue
+            if 'queued_at' in coin:
+                received = time.time()
+                tracer.mark(mint, 'queue_get', received, coin.get('trace_id'))
+                tracer.observe('queue_wait', received - coin['queued_at'])
+            route(coin)
         except queue.Empty:
             continue
         except Exception:
@@ -458,8 +620,86 @@ def queue_consumer():
                 break
             time.sleep(0.1)
 
+def tracker_worker(index, processes, mint_queue, frame_queue, stop):
+    """One tracker process: owns its share of mints, their history and horizons"""
+    global forget_upstream
+    forget_upstream = lambda mint: frame_queue.put((index, ('forget', mint)))
+    # The Jupiter budget is per IP, so split it between processes
+    rate_limiter.add_budget('jupiter_price', 1 / API_CALL_DELAY / processes, API_CALL_BURST)
+    if async_fetcher is not None:
+        async_fetcher.start()
+    
+    def feed():
+        while not stop.is_set():
+            try:
+                coin = mint_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if 'pin' in coin:
+                apply_pin(coin['mint'], coin['pin'])
+            else:
+                token_queue.put(coin)
+        stop_event.set()
+    
+    for target in (feed, process_new_tokens):
+        threading.Thread(target=target, daemon=True).start()
+    
+    try:
+        update_price_data(None, publish=lambda output_data: frame_queue.put(
+            (index, records_from_dicts(output_data))))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=False)
+        if async_fetcher is not None:
+            async_fetcher.close()
+
+def run_coordinator(json_queue):
+    """Route mints to TRACKER_PROCESSES workers and publish their merged frames"""
+    pool = TrackerPool(TRACKER_PROCESSES, tracker_worker, stale_after=3 * UPDATE_INTERVAL,
+                       max_routed=MAX_TOKENS, on_forget=mint_dedup.forget).start()
+    threading.Thread(target=queue_consumer, args=(pool.route,), daemon=True).start()
+    pin_queue = connect_pin_queue()
+    if pin_queue is not None:
+        threading.Thread(target=pin_consumer, args=(pin_queue, pool.pin), daemon=True).start()
+    print(f"🧩 Tracking across {TRACKER_PROCESSES} processes")
+    
+    try:
+        while not stop_event.is_set():
+            if pool.collect(UPDATE_INTERVAL):
+                records = pool.merged()
+                if len(records):
+                    publish_output(dicts_from_records(records), json_queue)
+            pool.check_workers()
+    except KeyboardInterrupt:
+        print("\n🛑 Shutdown signal received")
+    finally:
+        stop_event.set()
+        pool.close()
+        print("🧹 Cleanup complete")
+
 def main():
+    global recorder, dashboard, price_feed
     print("🚀 Starting Jupiter Price Tracker (High Performance)")
+    price_feed = connect_price_feed()
+    if RECORD_REPLAY:
+        recorder = ReplayRecorder(REPLAY_FILE)
+        print(f"⏺️ Recording frames and mint events to {REPLAY_FILE}")
+    if not QUIET:
+        dashboard = Dashboard(render_dashboard, DASHBOARD_INTERVAL).start()
+    
+    if TRACKER_PROCESSES > 1:
+        _, json_queue, _ = connect_to_manager()
+        try:
+            run_coordinator(json_queue)
+        finally:
+            if dashboard is not None:
+                dashboard.stop()
+        return
+    
+    if async_fetcher is not None:
+        async_fetcher.start()
     
     _, json_queue, _ = connect_to_manager()
     
@@ -468,6 +708,9 @@ def main():
         threading.Thread(target=process_new_tokens, daemon=True),
         threading.Thread(target=update_price_data, args=(json_queue,), daemon=True)
     ]
+    pin_queue = connect_pin_queue()
+    if pin_queue is not None:
+        threads.append(threading.Thread(target=pin_consumer, args=(pin_queue,), daemon=True))
     
     for t in threads:
         t.start()
@@ -480,9 +723,90 @@ def main():
     finally:
         stop_event.set()
         executor.shutdown(wait=False)
+        if async_fetcher is not None:
+            async_fetcher.close()
         for t in threads:
             t.join(timeout=1)
+        if dashboard is not None:
+            dashboard.stop()
         print("🧹 Cleanup complete")
 
+def run_fetch_benchmark(tokens=1500, cycles=3, latency=0.2, error_rate=0.05, drop_rate=0.05):
+    """Threads vs. async fetch mode against a local /price/v2 stub.
+
+    The stub answers after ``latency`` seconds, returns 503 for
+    ``error_rate`` of requests and closes the connection without answering
+    for ``drop_rate`` of them. Reports cycle time, tokens priced, chunks
+    lost after retries and TCP connections the stub accepted.
+    """
+    global JUPITER_API_URL
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlparse, parse_qs
+    rng = random.Random(0)
+    connections = [0]
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            connections[0] += 1
+            super().setup()
+
+        def do_GET(self):
+            ids = parse_qs(urlparse(self.path).query).get('ids', [''])[0].split(',')
+            time.sleep(latency)
+            roll = rng.random()
+            if roll < drop_rate:
+                self.close_connection = True  # No response at all
+                return
+            if roll < drop_rate + error_rate:
+                body, status = b'{"error": "unavailable"}', 503
+            else:
+                body = json.dumps({'data': {mint: {'id': mint, 'type': 'derivedPrice', 'price': '0.0000123'}
+                                            for mint in ids}}).encode()
+                status = 200
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    JUPITER_API_URL = f"http://127.0.0.1:{server.server_port}/price/v2"
+    proxy_manager.proxy_configured = False
+    rate_limiter.add_budget('jupiter_price', 1 / API_CALL_DELAY, API_CALL_BURST)
+
+    mints = [f"{i:040d}pump" for i in range(tokens)]
+    chunks = [mints[i:i + TOKEN_CHUNK_SIZE] for i in range(0, tokens, TOKEN_CHUNK_SIZE)]
+    fetcher = AsyncPriceFetcher()
+    fetcher.start()
+    modes = {
+        'threads': lambda: list(executor.map(fetch_token_prices_batch, chunks)),
+        'async': lambda: fetcher.fetch_chunks(chunks)
+    }
+    print(f"🔬 {tokens} tokens in {len(chunks)} chunks, stub latency {latency * 1000:.0f}ms, "
+          f"{error_rate:.0%} 503s, {drop_rate:.0%} dropped connections, {cycles} cycles")
+    print(f"{'Mode':<8} {'Cycle':>9} {'Priced':>8} {'Lost':>6} {'Connections':>12}")
+    for mode, fetch in modes.items():
+        connections[0] = 0
+        elapsed, priced, lost = 0.0, 0, 0
+        for _ in range(cycles):
+            start = time.perf_counter()
+            results = fetch()
+            elapsed += time.perf_counter() - start
+            priced += sum(len(result) for result in results if result)
+            lost += sum(1 for result in results if result is None)
+        print(f"{mode:<8} {elapsed / cycles * 1000:>7.0f}ms {priced // cycles:>8} {lost:>6} {connections[0]:>12}")
+    fetcher.close()
+    server.shutdown()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == 'bench':
+        run_fetch_benchmark()
+    else:
+        main()
\ No newline at end of file
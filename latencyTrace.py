@@ -0,0 +1,268 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+import numpy as np
+from queueManager import HORIZON_KEYS
+from snapshotFile import atomic_write
+
+TRACE_DIR = 'traces'
+EXPORT_INTERVAL = 10.0  # Seconds between event-log flushes and metrics file writes
+TRACE_PORT = 9464
+TRACE_MAX_BYTES = 20_000_000  # Event log size at which a process rotates it (one previous log kept)
+TRACE_MAX_AGE = 7 * 86400     # Seconds; older trace files (e.g. of past runs) are deleted when tracing starts
+
+# A mint's journey, in order. 'listed' comes from the page's own listing time;
+# horizon_* is the first frame in which that horizon stopped being N/A
+TRACE_STAGES = (
+    ['listed', 'discovered', 'queue_put', 'queue_get', 'first_price', 'frame'] +
+    [f"horizon_{key}" for key in HORIZON_KEYS] +
+    ['signal', 'buy_request', 'buy_response', 'auto_sell']
+)
+
+# Stage each 'step' latency is measured from (horizons and the signal hang off
+# the first frame: a signal can fire before the longer horizons fill in)
+TRACE_STEPS = {
+    'discovered': 'listed', 'queue_put': 'discovered', 'queue_get': 'queue_put',
+    'first_price': 'queue_get', 'frame': 'first_price',
+    **{f"horizon_{key}": 'frame' for key in HORIZON_KEYS},
+    'signal': 'frame', 'buy_request': 'signal', 'buy_response': 'buy_request', 'auto_sell': 'buy_response'
+}
+
+def new_trace_id():
+    return uuid.uuid4().hex[:16]
+
+def percentiles(samples):
+    if not len(samples):
+        return {'count': 0}
+    p50, p95, p99 = np.percentile(np.asarray(samples, dtype=np.float64), [50, 95, 99])
+    return {'count': len(samples), 'p50_ms': p50 * 1000, 'p95_ms': p95 * 1000, 'p99_ms': p99 * 1000}
+
+class Tracer:
+    """Per-process latency tracing.
+
+    ``mark`` appends a (mint, stage, time) event to this process's log in
+    TRACE_DIR; ``report`` joins the logs of every process by mint, so one
+    mint's journey can be followed from funPump to auto-sell. ``observe``
+    keeps durations this process can measure on its own (e.g. batch time),
+    exported as p50/p95/p99 every EXPORT_INTERVAL. Nothing is written until
+    the first mark or observation, and a disabled tracer does nothing.
+
+    Output is bounded: the event log rotates at TRACE_MAX_BYTES, keeping
+    one previous log, and files older than TRACE_MAX_AGE are pruned.
+    """
+    def __init__(self, process, enabled=True, directory=TRACE_DIR, max_samples=10000):
+        self.process = process
+        self.enabled = enabled
+        self.directory = directory
+        self.max_samples = max_samples
+        self.lock = threading.Lock()
+        self.events = []
+        self.samples = {}  # name -> deque of seconds
+        self.horizons = {}  # mint -> bitmask of horizons already marked
+        self.file = None
+
+    @property
+    def _prefix(self):
+        return os.path.join(self.directory, f"{self.process}.{os.getpid()}")
+
+    def _start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        prune(self.directory)
+        self.file = open(f"{self._prefix}.trace.jsonl", 'a')
+        threading.Thread(target=self._export_loop, daemon=True, name=f"{self.process}-trace").start()
+        atexit.register(self.export)
+
+    def mark(self, mint, stage, t=None, trace_id=None):
+        if not self.enabled:
+            return
+        event = {'mint': mint, 'stage': stage, 't': time.time() if t is None else t}
+        if trace_id:
+            event['trace'] = trace_id
+        with self.lock:
+            if self.file is None:
+                self._start()
+            self.events.append(event)
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            if self.file is None:
+                self._start()
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.max_samples)
+            self.samples[name].append(seconds)
+
+    def mark_frame(self, mints, available, t=None):
+        """First frame per mint and first frame each horizon was available.
+
+        ``available`` is a (tokens, horizons) bool array; one vectorized
+        pass plus a dict lookup per token.
+        """
+        if not self.enabled or not len(mints):
+            return
+        t = time.time() if t is None else t
+        bits = (np.asarray(available, dtype=np.int64) << np.arange(len(HORIZON_KEYS))).sum(axis=1)
+        frame_bit = 1 << len(HORIZON_KEYS)
+        bits |= frame_bit
+        seen = np.fromiter((self.horizons.get(mint, 0) for mint in mints), dtype=np.int64, count=len(mints))
+        new = bits & ~seen
+        for i in np.flatnonzero(new).tolist():
+            mint = mints[i]
+            self.horizons[mint] = int(seen[i] | new[i])
+            if new[i] & frame_bit:
+                self.mark(mint, 'frame', t)
+            for j, key in enumerate(HORIZON_KEYS):
+                if new[i] >> j & 1:
+                    self.mark(mint, f"horizon_{key}", t)
+        if len(self.horizons) > 4 * len(mints) + 1000:
+            current = set(mints)
+            self.horizons = {mint: mask for mint, mask in self.horizons.items() if mint in current}
+
+    def summary(self):
+        with self.lock:
+            samples = {name: list(values) for name, values in self.samples.items()}
+        return {name: percentiles(values) for name, values in samples.items()}
+
+    def export(self):
+        """Flush buffered events and write this process's metrics file"""
+        with self.lock:
+            if self.file is None:
+                return
+            events, self.events = self.events, []
+            for event in events:
+                self.file.write(json.dumps(event, separators=(',', ':')) + '\n')
+            self.file.flush()
+            if self.file.tell() >= TRACE_MAX_BYTES:
+                # Still matches *.trace.jsonl, so report() reads both logs
+                self.file.close()
+                os.replace(f"{self._prefix}.trace.jsonl", f"{self._prefix}.previous.trace.jsonl")
+                self.file = open(f"{self._prefix}.trace.jsonl", 'a')
+        payload = json.dumps({'process': self.process, 'pid': os.getpid(), 'time': time.time(),
+                              'stages': self.summary()}, indent=2).encode()
+        atomic_write(f"{self._prefix}.metrics.json", lambda f: f.write(payload))
+
+    def _export_loop(self):
+        while True:
+            time.sleep(EXPORT_INTERVAL)
+            try:
+                self.export()
+            except Exception as e:
+                print(f"⚠️ Trace export failed: {e}")
+
+def prune(directory=TRACE_DIR, max_age=TRACE_MAX_AGE):
+    """Delete trace and metrics files not written to for ``max_age`` seconds"""
+    cutoff = time.time() - max_age
+    for pattern in ('*.trace.jsonl', '*.metrics.json'):
+        for path in glob.glob(os.path.join(directory, pattern)):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+def load_events(directory=TRACE_DIR):
+    """Every process's events grouped by mint: {mint: {stage: first time}}"""
+    journeys = {}
+    for path in glob.glob(os.path.join(directory, '*.trace.jsonl')):
+        with open(path) as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # Partially written last line
+                stages = journeys.setdefault(event['mint'], {})
+                if event['stage'] not in stages or event['t'] < stages[event['stage']]:
+                    stages[event['stage']] = event['t']
+                if 'trace' in event:
+                    stages.setdefault('trace', event['trace'])
+    return journeys
+
+def report(directory=TRACE_DIR):
+    """Latency percentiles from the joined event logs.
+
+    'since_discovery' is each stage's time after funPump saw the mint;
+    'step' is the time from the stage before it in TRACE_STEPS.
+    Process-local metrics files are included under 'processes'.
+    """
+    since_discovery = {stage: [] for stage in TRACE_STAGES}
+    steps = {stage: [] for stage in TRACE_STAGES}
+    journeys = load_events(directory)
+    for stages in journeys.values():
+        discovered = stages.get('discovered')
+        for stage in TRACE_STAGES:
+            if stage not in stages:
+                continue
+            if discovered is not None:
+                since_discovery[stage].append(stages[stage] - discovered)
+            previous = TRACE_STEPS.get(stage)
+            if previous in stages:
+                steps[stage].append(stages[stage] - stages[previous])
+    processes = []
+    for path in glob.glob(os.path.join(directory, '*.metrics.json')):
+        with open(path) as f:
+            processes.append(json.load(f))
+    return {
+        'time': time.time(),
+        'mints': len(journeys),
+        'since_discovery': {stage: percentiles(values) for stage, values in since_discovery.items()},
+        'step': {stage: percentiles(values) for stage, values in steps.items()},
+        'processes': processes
+    }
+
+def print_report(data):
+    print(f"⏱️ Latency over {data['mints']} traced mints")
+    print(f"{'Stage':<16} {'Count':>7} {'p50':>9} {'p95':>9} {'p99':>9}   {'Step p50':>9} {'Step p95':>9}")
+    for stage in TRACE_STAGES:
+        total, step = data['since_discovery'][stage], data['step'][stage]
+        if not total['count'] and not step['count']:
+            continue
+        cells = [f"{total[key]:>8.0f}ms" if total['count'] else f"{'-':>10}" for key in ('p50_ms', 'p95_ms', 'p99_ms')]
+        steps = [f"{step[key]:>8.0f}ms" if step['count'] else f"{'-':>10}" for key in ('p50_ms', 'p95_ms')]
+        print(f"{stage:<16} {max(total['count'], step['count']):>7} {' '.join(cells)}   {' '.join(steps)}")
+    for metrics in data['processes']:
+        for name, stats in metrics['stages'].items():
+            if stats['count']:
+                print(f"{metrics['process'] + ' ' + name:<32} {stats['count']:>7} "
+                      f"p50 {stats['p50_ms']:.1f}ms p95 {stats['p95_ms']:.1f}ms p99 {stats['p99_ms']:.1f}ms")
+
+def serve(directory=TRACE_DIR, port=TRACE_PORT):
+    """GET /metrics on localhost returns ``report()`` as JSON"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') != '/metrics':
+                self.send_error(404)
+                return
+            body = json.dumps(report(directory)).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    print(f"📡 Latency metrics at http://127.0.0.1:{port}/metrics")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    # python latencyTrace.py [report | serve [port]]
+    import sys
+    command = sys.argv[1] if len(sys.argv) > 1 else 'report'
+    if command == 'serve':
+        serve(port=int(sys.argv[2]) if len(sys.argv) > 2 else TRACE_PORT)
+    else:
+        data = report()
+        print_report(data)
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        atomic_write(os.path.join(TRACE_DIR, 'latency_report.json'),
+                      lambda f: f.write(json.dumps(data, indent=2).encode()))
@@ -0,0 +1,266 @@
+import time
+import numpy as np
+from timingWheel import TimingWheel
+
+# Take-profit ladder: (held at least this many seconds, minimum profit %, reason),
+# checked longest hold first. Same tiers as TokenSaleDecision.should_sell
+TAKE_PROFIT_LADDER = [
+    (8 * 60, 5.0, "5% Target (8m+)"),
+    (7 * 60, 10.0, "10% Target (7m+)"),
+    (5 * 60, 15.0, "15% Target (5m+)"),
+    (0, 20.0, "20% Target")
+]
+STOP_LOSS = -45.0
+
+class PositionBook:
+    """Open positions in parallel arrays, exits decided for all of them at once.
+
+    Each slot holds a position's entry price and time, the last and highest
+    price seen and how many frames in a row it was missing from. Prices go
+    in per frame (``update_frame`` for FRAME_DTYPE records, ``update_prices``
+    for a {mint: price} dict) and ``evaluate`` applies the stop loss, the
+    take-profit ladder and the optional trailing stop to every position that
+    got a price, as array operations. Closed slots are reused.
+
+    Trailing stop: once a position has been ``trailing_activation`` % up, sell
+    when it falls ``trailing_stop`` % from its high (off by default, as in
+    the legacy monitor). ``max_missing`` sells positions missing from that
+    many consecutive frames at their last price (off by default).
+
+    The ladder's targets drop as a position ages, so a timing wheel wakes
+    each position when it reaches its next tier: ``evaluate`` then checks it
+    at its last price even if no new price came in.
+    Not thread-safe: callers serialise opens and frame updates.
+    """
+    def __init__(self, capacity=1024, stop_loss=STOP_LOSS, ladder=TAKE_PROFIT_LADDER,
+                 trailing_stop=None, trailing_activation=20.0, max_missing=None):
+        self.stop_loss = stop_loss
+        self.ladder = sorted(ladder, key=lambda tier: -tier[0])
+        self.trailing_stop = trailing_stop
+        self.trailing_activation = trailing_activation
+        self.max_missing = max_missing
+        self.tier_ages = sorted({tier[0] for tier in self.ladder if tier[0] > 0})
+        self.tiers = TimingWheel()  # mint -> next ladder tier boundary
+        self.slots = {}  # mint -> slot
+        self.free = []
+        self.mints = np.zeros(0, dtype='S44')
+        self.entry_price = np.zeros(0)
+        self.entry_time = np.zeros(0)
+        self.last_price = np.zeros(0)
+        self.max_price = np.zeros(0)
+        self.missing = np.zeros(0, dtype=np.int32)
+        self.active = np.zeros(0, dtype=bool)
+        self.fresh = np.zeros(0, dtype=bool)  # Got a price since the last evaluate
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        size = len(self.active)
+        for name in ('mints', 'entry_price', 'entry_time', 'last_price', 'max_price', 'missing', 'active', 'fresh'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:size] = old
+            setattr(self, name, new)
+        self.free.extend(range(capacity - 1, size - 1, -1))
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, mint):
+        return mint in self.slots
+
+    def positions(self):
+        return list(self.slots)
+
+    def open(self, mint, entry_price, current_price=None, now=None):
+        """Start tracking a bought token (re-opening replaces the old position)"""
+        if not self.free:
+            self._grow(2 * len(self.active))
+        slot = self.slots.get(mint)
+        if slot is None:
+            slot = self.slots[mint] = self.free.pop()
+        current_price = entry_price if current_price is None else current_price
+        self.mints[slot] = mint.encode()
+        self.entry_price[slot] = entry_price
+        self.entry_time[slot] = time.time() if now is None else now
+        self.last_price[slot] = current_price
+        self.max_price[slot] = max(entry_price, current_price)
+        self.missing[slot] = 0
+        self.active[slot] = True
+        self.fresh[slot] = False
+        self._next_tier(mint, self.entry_time[slot], time.time() if now is None else now)
+
+    def _next_tier(self, mint, entry_time, now):
+        for age in self.tier_ages:
+            if entry_time + age > now:
+                self.tiers.schedule(mint, entry_time + age)
+                return
+        self.tiers.cancel(mint)
+
+    def close(self, mint):
+        slot = self.slots.pop(mint, None)
+        self.tiers.cancel(mint)
+        if slot is not None:
+            self.active[slot] = False
+            self.fresh[slot] = False
+            self.free.append(slot)
+
+    def _apply(self, slots, prices, count_missing=True):
+        valid = prices > 0
+        slots, prices = slots[valid], prices[valid]
+        if count_missing:
+            self.missing[self.active] += 1
+        self.last_price[slots] = prices
+        np.maximum(self.max_price[slots], prices, out=prices)
+        self.max_price[slots] = prices
+        self.missing[slots] = 0
+        self.fresh[slots] = True
+        return len(slots)
+
+    def update_frame(self, records):
+        """Prices from FRAME_DTYPE records; returns how many positions were priced"""
+        if not self.slots or not len(records):
+            self.missing[self.active] += 1
+            return 0
+        order = np.argsort(records['mint'])
+        frame_mints = records['mint'][order]
+        held = np.flatnonzero(self.active)
+        at = np.searchsorted(frame_mints, self.mints[held]).clip(max=len(frame_mints) - 1)
+        found = frame_mints[at] == self.mints[held]
+        return self._apply(held[found], records['price'][order[at[found]]].astype(np.float64))
+
+    def update_prices(self, prices, count_missing=True):
+        """Prices from a {mint: price} dict; returns how many positions were priced.
+
+        Pass ``count_missing=False`` for a top-up of the frame just applied
+        (e.g. API prices for tokens the frame lacked).
+        """
+        pairs = [(slot, prices[mint]) for mint, slot in self.slots.items() if mint in prices]
+        if not pairs:
+            if count_missing:
+                self.missing[self.active] += 1
+            return 0
+        slots, values = zip(*pairs)
+        return self._apply(np.array(slots), np.array(values, dtype=np.float64), count_missing)
+
+    def stale(self, frames=1):
+        """Open positions missing from at least ``frames`` consecutive frames"""
+        return [mint for mint, slot in self.slots.items() if self.missing[slot] >= frames]
+
+    def evaluate(self, now=None, close=True):
+        """Sell decisions for every freshly priced position.
+
+        Returns ``[(mint, price, profit_pct, reason), ...]``; sold positions
+        are closed unless ``close`` is False.
+        """
+        now = time.time() if now is None else now
+        for mint in self.tiers.advance(now):
+            slot = self.slots.get(mint)
+            if slot is not None:
+                self.fresh[slot] = True
+                self._next_tier(mint, self.entry_time[slot], now)
+        candidates = self.fresh & self.active
+        if self.max_missing is not None:
+            stale = self.active & (self.missing >= self.max_missing)
+            candidates |= stale
+        slots = np.flatnonzero(candidates)
+        self.fresh[:] = False
+        if not len(slots):
+            return []
+
+        entry = self.entry_price[slots]
+        price = self.last_price[slots]
+        profit = (price - entry) / entry * 100
+        held = now - self.entry_time[slots]
+
+        reasons = np.full(len(slots), None, dtype=object)
+        # Lowest priority first, so higher-priority rules overwrite
+        assigned = np.zeros(len(slots), dtype=bool)
+        for min_held, target, reason in self.ladder:
+            tier = ~assigned & (held >= min_held)
+            reasons[tier & (profit >= target)] = reason
+            assigned |= tier
+        if self.trailing_stop is not None:
+            high = self.max_price[slots]
+            peak = (high - entry) / entry * 100
+            trailing = (peak >= self.trailing_activation) & ((high - price) / high * 100 >= self.trailing_stop)
+            reasons[trailing & (reasons == None)] = f"TRAILING STOP (-{self.trailing_stop:g}% from high)"  # noqa: E711
+        if self.max_missing is not None:
+            reasons[self.missing[slots] >= self.max_missing] = f"MISSING ({self.max_missing} frames)"
+        reasons[profit <= self.stop_loss] = f"STOP LOSS ({self.stop_loss:g}%)"
+
+        sells = []
+        for i in np.flatnonzero(reasons != None).tolist():  # noqa: E711
+            mint = self.mints[slots[i]].decode()
+            sells.append((mint, float(price[i]), float(profit[i]), reasons[i]))
+            if close:
+                self.close(mint)
+        return sells
+
+    def profits(self):
+        """{mint: current profit %} for every open position"""
+        slots = np.array(list(self.slots.values()), dtype=np.int64)
+        profit = (self.last_price[slots] - self.entry_price[slots]) / self.entry_price[slots] * 100
+        return dict(zip(self.slots, profit.tolist()))
+
+if __name__ == "__main__":
+    # Benchmark: legacy per-position TokenSaleDecision loop vs. the book,
+    # N positions priced from a 1500-token frame (plus the positions)
+    import os
+    import sys
+    from datetime import datetime, timedelta
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Legacy'))
+    from jupitersEdge import TokenSaleDecision
+    from queueManager import FRAME_DTYPE
+
+    rng = np.random.default_rng(0)
+    alphabet = list('123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz')
+    frames = 20
+
+    def random_mints(n):
+        return [''.join(chars) + 'pump' for chars in rng.choice(alphabet, (n, 40))]
+
+    print(f"{'Positions':<10} {'Legacy loop':>12} {'Book (dict)':>12} {'Book (frame)':>13} {'Sells agree':>12}")
+    for count in (100, 1000, 5000):
+        mints = random_mints(count)
+        records = np.zeros(count + 1500, dtype=FRAME_DTYPE)
+        records['mint'] = mints + random_mints(1500)
+        entry = rng.uniform(1e-6, 1e-3, count)
+        ages = rng.uniform(0, 600, count)
+        now = time.time()
+
+        legacy = {}
+        for mint, price, age in zip(mints, entry, ages):
+            decision = TokenSaleDecision(price, price)
+            decision.buy_time = datetime.now() - timedelta(seconds=age)
+            legacy[mint] = decision
+        book_dict, book_frame = PositionBook(), PositionBook()
+        for book in (book_dict, book_frame):
+            for mint, price, age in zip(mints, entry, ages):
+                book.open(mint, price, now=now - age)
+
+        moves = [np.exp(rng.normal(0, 0.15, count)) for _ in range(frames)]
+        legacy_time = dict_time = frame_time = 0.0
+        legacy_sells, dict_sells, frame_sells = set(), set(), set()
+        for move in moves:
+            prices = dict(zip(mints, (entry * move).tolist()))
+            records['price'][:count] = entry * move
+            start = time.perf_counter()
+            for mint, decision in list(legacy.items()):
+                if mint in prices:
+                    decision.update_price(prices[mint])
+                    sell, reason = decision.should_sell()
+                    if sell:
+                        legacy_sells.add(mint)
+                        del legacy[mint]
+            legacy_time += time.perf_counter() - start
+            start = time.perf_counter()
+            book_dict.update_prices(prices)
+            dict_sells.update(mint for mint, *_ in book_dict.evaluate(time.time()))
+            dict_time += time.perf_counter() - start
+            start = time.perf_counter()
+            book_frame.update_frame(records)
+            frame_sells.update(mint for mint, *_ in book_frame.evaluate(time.time()))
+            frame_time += time.perf_counter() - start
+        agree = legacy_sells == dict_sells == frame_sells
+        print(f"{count:<10} {legacy_time / frames * 1000:>10.2f}ms {dict_time / frames * 1000:>10.2f}ms "
+              f"{frame_time / frames * 1000:>11.2f}ms {str(agree):>12}")
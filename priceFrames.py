@@ -0,0 +1,91 @@
+KEYFRAME = 'key'
+DELTA = 'delta'
+
+CHANGE_KEYS = ['t_2s', 't_5s', 't_10s', 't_30s', 't_1m', 't_2m', 't_5m', 't_10m']
+
+class DeltaPublisher:
+    """Turns full jupitersPrices output frames into keyframes and deltas.
+
+    Every ``keyframe_interval`` frames (and the first) carries every token.
+    In between, a delta carries only tokens whose price moved by more than
+    ``price_epsilon`` (relative) or any horizon change by more than
+    ``change_epsilon`` percentage points since the value last *sent*, plus
+    the ids of tokens that left the active set. Frames are dicts with
+    ``type``, ``seq``, ``tokens`` and ``removed``.
+    """
+    def __init__(self, price_epsilon=1e-4, change_epsilon=0.01, keyframe_interval=20):
+        self.price_epsilon = price_epsilon
+        self.change_epsilon = change_epsilon
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.seq = 0
+        self.last_sent = {}
+
+    def _moved(self, old, new):
+        if old is None:
+            return True
+        old_price, new_price = old['price'], new['price']
+        if abs(new_price - old_price) > self.price_epsilon * abs(old_price):
+            return True
+        for key in CHANGE_KEYS:
+            old_change, new_change = old[key], new[key]
+            if old_change is None or new_change is None:
+                if old_change is not new_change:
+                    return True
+            elif abs(new_change - old_change) > self.change_epsilon:
+                return True
+        return False
+
+    def encode(self, output_data):
+        self.seq += 1
+        current = {item['id']: item for item in output_data}
+
+        if (self.seq - 1) % self.keyframe_interval == 0:
+            self.last_sent = current
+            return {'type': KEYFRAME, 'seq': self.seq, 'tokens': output_data, 'removed': []}
+
+        last_sent = self.last_sent
+        changed = [item for token_id, item in current.items()
+                   if self._moved(last_sent.get(token_id), item)]
+        removed = [token_id for token_id in last_sent if token_id not in current]
+        for item in changed:
+            last_sent[item['id']] = item
+        for token_id in removed:
+            del last_sent[token_id]
+        return {'type': DELTA, 'seq': self.seq, 'tokens': changed, 'removed': removed}
+
+class FrameAssembler:
+    """Rebuilds full token state from DeltaPublisher frames.
+
+    Deltas carry absolute values, so after a sequence gap (a lost frame or a
+    restarted publisher) the state is still correct for every token in later
+    deltas; anything else is repaired by the next keyframe. Plain lists from
+    a publisher without delta mode are treated as keyframes.
+    """
+    def __init__(self):
+        self.tokens = {}
+        self.seq = 0
+        self.gaps = 0
+
+    def apply(self, frame):
+        """Apply one frame and return the token dicts it touched"""
+        if isinstance(frame, list):
+            self.tokens = {token['id']: token for token in frame if isinstance(token, dict)}
+            return frame
+
+        seq = frame['seq']
+        if self.seq and seq != self.seq + 1:
+            self.gaps += 1
+        self.seq = seq
+
+        if frame['type'] == KEYFRAME:
+            self.tokens = {token['id']: token for token in frame['tokens']}
+        else:
+            for token in frame['tokens']:
+                self.tokens[token['id']] = token
+            for token_id in frame['removed']:
+                self.tokens.pop(token_id, None)
+        return frame['tokens']
+
+    def snapshot(self):
+        """Current full state as a list, in the same shape as a full frame"""
+        return list(self.tokens.values())
@@ -0,0 +1,271 @@
+import mmap
+
+import numpy as np
+
+
+class PriceHistoryStore:
+    """Per-token price history kept in fixed-capacity ring buffers.
+
+    Every token owns one row of two float64 matrices (epoch-second timestamps
+    and prices). A row is a ring: ``_heads`` points at the oldest sample and
+    ``_counts`` holds how many samples are live, so appends and evictions only
+    move those two integers. Matrices live in anonymous mmaps (NumPy would
+    advise huge pages for a large ``np.empty``), so memory is only committed
+    as samples are written.
+
+    The newest ``recent_window`` samples of each token are also kept in a
+    small mirrored ring, where they always form one contiguous run. The
+    batched ``horizon_changes`` engine works on those compact rows and only
+    touches the full history when a horizon reaches further back.
+    """
+
+    SEARCH_BLOCK_ROWS = 2048
+
+    def __init__(self, capacity, max_tokens, recent_window=256):
+        self.capacity = int(capacity)
+        self.recent_window = int(recent_window)
+        self._slots = {}  # token_id -> row
+        self._free_rows = []
+        self._allocate(max_tokens)
+
+    @staticmethod
+    def _matrix(rows, width):
+        buffer = mmap.mmap(-1, max(rows * width * 8, 1))
+        return np.frombuffer(buffer, dtype=np.float64, count=rows * width).reshape(rows, width)
+
+    def _allocate(self, rows):
+        self._times = self._matrix(rows, self.capacity)
+        self._prices = self._matrix(rows, self.capacity)
+        # (time, price) pairs interleaved so a probe pulls both into cache
+        self._recent = self._matrix(rows, 4 * self.recent_window)
+        self._heads = np.zeros(rows, dtype=np.int64)
+        self._counts = np.zeros(rows, dtype=np.int64)
+        self._writes = np.zeros(rows, dtype=np.int64)
+        self._free_rows = list(range(rows - 1, -1, -1))
+
+    def _grow(self):
+        """Add rows when more tokens are live than planned for (rare)"""
+        old_rows = len(self._heads)
+        new_rows = max(old_rows + old_rows // 4, old_rows + 1)
+        old = (self._times, self._prices, self._recent, self._heads, self._counts, self._writes)
+        self._allocate(new_rows)
+        new = (self._times, self._prices, self._recent, self._heads, self._counts, self._writes)
+        for old_array, new_array in zip(old, new):
+            new_array[:old_rows] = old_array
+        self._free_rows = list(range(new_rows - 1, old_rows - 1, -1))
+
+    def _row_for(self, token_id):
+        row = self._slots.get(token_id)
+        if row is None:
+            if not self._free_rows:
+                self._grow()
+            row = self._free_rows.pop()
+            self._heads[row] = 0
+            self._counts[row] = 0
+            self._writes[row] = 0
+            self._slots[token_id] = row
+        return row
+
+    def __contains__(self, token_id):
+        return token_id in self._slots
+
+    def __len__(self):
+        return len(self._slots)
+
+    def tokens(self):
+        return list(self._slots)
+
+    def append(self, token_id, timestamp, price):
+        """Record a sample, overwriting the oldest one once the row is full"""
+        row = self._row_for(token_id)
+        head = self._heads[row]
+        count = self._counts[row]
+        pos = (head + count) % self.capacity
+        self._times[row, pos] = timestamp
+        self._prices[row, pos] = price
+        if count < self.capacity:
+            self._counts[row] = count + 1
+        else:
+            self._heads[row] = (head + 1) % self.capacity
+
+        # Write the recent ring twice so its newest samples stay contiguous
+        recent_pos = 2 * (self._writes[row] % self.recent_window)
+        mirror_pos = recent_pos + 2 * self.recent_window
+        self._recent[row, recent_pos] = self._recent[row, mirror_pos] = timestamp
+        self._recent[row, recent_pos + 1] = self._recent[row, mirror_pos + 1] = price
+        self._writes[row] += 1
+
+    def pop(self, token_id, default=None):
+        """Drop a token's history and release its row"""
+        row = self._slots.pop(token_id, None)
+        if row is None:
+            return default
+        self._counts[row] = 0
+        self._free_rows.append(row)
+        return row
+
+    def latest_time(self, token_id, default=None):
+        row = self._slots.get(token_id)
+        if row is None or not self._counts[row]:
+            return default
+        pos = (self._heads[row] + self._counts[row] - 1) % self.capacity
+        return float(self._times[row, pos])
+
+    def oldest_time(self, token_id, default=None):
+        row = self._slots.get(token_id)
+        if row is None or not self._counts[row]:
+            return default
+        return float(self._times[row, self._heads[row]])
+
+    def _segments(self, row):
+        """Return the row's live samples as (older, newer) index ranges"""
+        head = int(self._heads[row])
+        end = head + int(self._counts[row])
+        if end <= self.capacity:
+            return (head, end), (0, 0)
+        return (head, self.capacity), (0, end - self.capacity)
+
+    def series(self, token_id):
+        """Copy of a token's history as time-ordered (timestamps, prices)"""
+        row = self._slots.get(token_id)
+        if row is None:
+            return np.empty(0), np.empty(0)
+        (a0, a1), (b0, b1) = self._segments(row)
+        return (np.concatenate((self._times[row, a0:a1], self._times[row, b0:b1])),
+                np.concatenate((self._prices[row, a0:a1], self._prices[row, b0:b1])))
+
+    def _interpolate_row(self, row, targets):
+        count = int(self._counts[row])
+        (a0, a1), (b0, b1) = self._segments(row)
+        times = self._times[row]
+
+        # Older segment timestamps are all <= newer ones, so bisect_left over
+        # the logical sequence is the sum of bisect_left over both segments
+        pos = (np.searchsorted(times[a0:a1], targets, side='left') +
+               np.searchsorted(times[b0:b1], targets, side='left'))
+
+        prev_idx = (self._heads[row] + np.clip(pos - 1, 0, count - 1)) % self.capacity
+        next_idx = (self._heads[row] + np.clip(pos, 0, count - 1)) % self.capacity
+        t_prev, p_prev = times[prev_idx], self._prices[row, prev_idx]
+        t_next, p_next = times[next_idx], self._prices[row, next_idx]
+
+        span = t_next - t_prev
+        with np.errstate(divide='ignore', invalid='ignore'):
+            factor = np.where(span > 0, (targets - t_prev) / span, 0.0)
+        result = p_prev + factor * (p_next - p_prev)
+        result = np.where(pos == 0, p_next, result)
+        return np.where(pos >= count, p_prev, result)
+
+    def interpolate(self, token_id, target_times):
+        """Linearly interpolated prices at ``target_times``.
+
+        Targets before the first or after the last sample clamp to the edge
+        price. Returns None when the token has no history.
+        """
+        row = self._slots.get(token_id)
+        if row is None or not self._counts[row]:
+            return None
+        return self._interpolate_row(row, np.asarray(target_times, dtype=np.float64))
+
+    def evict_before(self, cutoff):
+        """Drop samples older than ``cutoff``; returns tokens left empty"""
+        emptied = []
+        for token_id, row in list(self._slots.items()):
+            count = int(self._counts[row])
+            if not count or self._times[row, self._heads[row]] >= cutoff:
+                continue
+            (a0, a1), (b0, b1) = self._segments(row)
+            stale = (int(np.searchsorted(self._times[row, a0:a1], cutoff, side='left')) +
+                     int(np.searchsorted(self._times[row, b0:b1], cutoff, side='left')))
+            self._heads[row] = (self._heads[row] + stale) % self.capacity
+            self._counts[row] = count - stale
+            if stale == count:
+                emptied.append(token_id)
+        return emptied
+
+    def _search_recent(self, starts, sizes, targets):
+        """Vectorized bisect_left over runs of recent samples (flat sample index)"""
+        times = self._recent.reshape(-1)[::2]
+        base = starts.copy()
+        size = sizes.copy()
+        while True:
+            half = size >> 1
+            if not half.any():
+                break
+            base += half * (times[base + half - 1] < targets)
+            size -= half
+        return base - starts + ((size > 0) & (times[base] < targets))
+
+    def _recent_prices_at(self, starts, sizes, targets):
+        """Interpolated prices at ``targets`` within runs of the recent matrix"""
+        times = self._recent.reshape(-1)[::2]
+        prices = self._recent.reshape(-1)[1::2]
+        offsets = self._search_recent(starts, sizes, targets)
+
+        last = starts + np.maximum(sizes - 1, 0)
+        prev_idx = np.clip(starts + offsets - 1, starts, last)
+        next_idx = np.clip(starts + offsets, starts, last)
+        t_prev, p_prev = times[prev_idx], prices[prev_idx]
+        t_next, p_next = times[next_idx], prices[next_idx]
+
+        span = t_next - t_prev
+        factor = np.where(span > 0, (targets - t_prev) / span, 0.0)
+        result = p_prev + factor * (p_next - p_prev)
+        result = np.where(offsets == 0, p_next, result)
+        return np.where(offsets >= sizes, p_prev, result)
+
+    def horizon_changes(self, token_ids, current_time, horizons):
+        """Percentage changes over every horizon for many tokens in one pass.
+
+        Returns ``(prices, changes)``: the latest price per token and an
+        ``(len(token_ids), len(horizons))`` matrix of percentage changes.
+        Unknown tokens get a NaN price; a change is NaN when the token's
+        history is shorter than the horizon or the historical price is not
+        positive. Matches ``interpolate`` for each (token, horizon) pair.
+        """
+        horizons = np.asarray(horizons, dtype=np.float64)
+        n_horizons = len(horizons)
+        rows = np.fromiter((self._slots.get(token_id, -1) for token_id in token_ids),
+                           dtype=np.int64, count=len(token_ids))
+        known = rows >= 0
+        rows = np.where(known, rows, 0)
+        counts = np.where(known, self._counts[rows], 0)
+        live = counts > 0
+
+        # Each row's newest samples as a contiguous run of the recent matrix
+        run_sizes = np.minimum(counts, self.recent_window)
+        run_ends = (rows * 2 * self.recent_window +
+                    self._writes[rows] % self.recent_window + self.recent_window)
+        run_starts = run_ends - run_sizes
+        recent_times = self._recent.reshape(-1)[::2]
+        prices = np.where(live, self._recent.reshape(-1)[1::2][run_ends - 1], np.nan)
+        oldest = self._times[rows, self._heads[rows]]
+
+        # One (token, horizon) pair per element, searched in blocks of rows
+        # so each block's recent runs stay cache resident across iterations
+        targets = np.tile(current_time - horizons, len(rows))
+        historical = np.empty(len(targets))
+        block = self.SEARCH_BLOCK_ROWS * n_horizons
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for lo in range(0, len(targets), block):
+                hi = lo + block
+                historical[lo:hi] = self._recent_prices_at(
+                    np.repeat(run_starts[lo // n_horizons:hi // n_horizons], n_horizons),
+                    np.repeat(run_sizes[lo // n_horizons:hi // n_horizons], n_horizons),
+                    targets[lo:hi])
+
+            # Targets older than the recent run (sampling faster than the
+            # window covers) are interpolated from the full history instead
+            deeper = np.flatnonzero(
+                (np.repeat(counts > run_sizes, n_horizons)) &
+                (targets <= np.repeat(recent_times[run_starts], n_horizons)))
+            for i in deeper.tolist():
+                historical[i] = self._interpolate_row(rows[i // n_horizons], targets[i:i + 1])[0]
+
+            historical = historical.reshape(len(rows), n_horizons)
+            changes = (prices[:, None] - historical) / historical * 100
+
+        valid = (live[:, None] &
+                 (current_time - oldest[:, None] >= horizons[None, :]) &
+                 (historical > 0))
+        return prices, np.where(valid, changes, np.nan)
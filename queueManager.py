@@ -1,39 +1,376 @@
 
 # queue_manager.py
 from multiprocessing.managers import BaseManager
-from multiprocessing import Queue, Event
+from multiprocessing import Queue, Event, shared_memory, resource_tracker
+from datetime import datetime, timedelta
+import queue
+import time
 import sys
+import numpy as np
+
+# Price frame transport: 'queue' pickles frames through the manager server,
+# 'shm' publishes them into a shared-memory snapshot buffer
+JSON_TRANSPORT = 'queue'
+SNAPSHOT_NAME = 'jupiter_price_frames'
+SNAPSHOT_CAPACITY = 20000  # Max tokens per frame
+PRICE_FEED_DEPTH = 2  # Frames held for the price feed on the 'queue' transport; older ones are dropped
+
+HORIZON_KEYS = ['t_2s', 't_5s', 't_10s', 't_30s', 't_1m', 't_2m', 't_5m', 't_10m']
+
+# Fixed-width record per token: mint, price, horizon changes (NaN = N/A), epoch seconds
+FRAME_DTYPE = np.dtype([
+    ('mint', 'S44'),
+    ('price', '<f8'),
+    ('changes', '<f8', (len(HORIZON_KEYS),)),
+    ('timestamp', '<f8')
+])
+
+# Per-slot header: version (odd while being written), record count, publish sequence
+SLOT_HEADER_DTYPE = np.dtype([('version', '<u8'), ('count', '<u8'), ('seq', '<u8')])
 
 class QueueManager(BaseManager):
     pass
 
+def records_from_dicts(output_data):
+    """Convert jupitersPrices output dicts into FRAME_DTYPE records"""
+    records = np.empty(len(output_data), dtype=FRAME_DTYPE)
+    if not output_data:
+        return records
+    records['mint'] = [item['id'] for item in output_data]
+    records['price'] = [item['price'] for item in output_data]
+    records['changes'] = np.array(
+        [[item[key] for key in HORIZON_KEYS] for item in output_data], dtype=np.float64)
+    # 'time' is an HH:MM:SS string shared by every token of a fetch chunk; it
+    # carries no date, so take the day that puts it nearest now (a label from
+    # just before midnight in a frame built just after it is yesterday's)
+    now = time.time()
+    today = datetime.fromtimestamp(now).date()
+    days = [today - timedelta(days=1), today, today + timedelta(days=1)]
+    epochs = {}
+    for label in {item.get('time', '') for item in output_data}:
+        try:
+            clock = datetime.strptime(label, '%H:%M:%S').time()
+        except ValueError:
+            epochs[label] = now
+            continue
+        epochs[label] = min((datetime.combine(day, clock).timestamp() for day in days),
+                            key=lambda epoch: abs(epoch - now))
+    records['timestamp'] = [epochs[item.get('time', '')] for item in output_data]
+    return records
+
+def dicts_from_records(records):
+    """Convert FRAME_DTYPE records back into the json_queue dict format"""
+    mints = [mint.decode() for mint in records['mint'].tolist()]
+    changes = records['changes']
+    change_rows = np.where(np.isnan(changes), None, changes).tolist()
+    epochs, inverse = np.unique(records['timestamp'], return_inverse=True)
+    labels = [datetime.fromtimestamp(epoch).strftime('%H:%M:%S') for epoch in epochs.tolist()]
+    return [
+        {
+            "token": mint[:8],
+            "price": price,
+            "t_2s": t_2s,
+            "t_5s": t_5s,
+            "t_10s": t_10s,
+            "t_30s": t_30s,
+            "t_1m": t_1m,
+            "t_2m": t_2m,
+            "t_5m": t_5m,
+            "t_10m": t_10m,
+            "id": mint,
+            "time": labels[label]
+        }
+        for mint, price, (t_2s, t_5s, t_10s, t_30s, t_1m, t_2m, t_5m, t_10m), label in zip(
+            mints, records['price'].tolist(), change_rows, inverse.tolist())
+    ]
+
+class SnapshotBuffer:
+    """Latest price frame in shared memory, readable without pickling.
+
+    The segment holds a global sequence counter and two record slots. The
+    writer fills the slot the latest frame is *not* in, guarded by a
+    per-slot seqlock version, then bumps the global sequence. Readers copy
+    (or view) the latest slot and retry if its version moved underneath them.
+    """
+    def __init__(self, shm, capacity, owner):
+        self.shm = shm
+        self.capacity = capacity
+        self.owner = owner
+        self.seq = np.ndarray((1,), dtype='<u8', buffer=shm.buf, offset=0)
+        slot_bytes = SLOT_HEADER_DTYPE.itemsize + capacity * FRAME_DTYPE.itemsize
+        self.headers = []
+        self.slots = []
+        for slot in range(2):
+            offset = 8 + slot * slot_bytes
+            self.headers.append(np.ndarray((1,), dtype=SLOT_HEADER_DTYPE, buffer=shm.buf, offset=offset))
+            self.slots.append(np.ndarray((capacity,), dtype=FRAME_DTYPE, buffer=shm.buf,
+                                         offset=offset + SLOT_HEADER_DTYPE.itemsize))
+
+    @staticmethod
+    def size_for(capacity):
+        return 8 + 2 * (SLOT_HEADER_DTYPE.itemsize + capacity * FRAME_DTYPE.itemsize)
+
+    @classmethod
+    def create(cls, name=SNAPSHOT_NAME, capacity=SNAPSHOT_CAPACITY):
+        try:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        shm = shared_memory.SharedMemory(name=name, create=True, size=cls.size_for(capacity))
+        buffer = cls(shm, capacity, owner=True)
+        buffer.seq[0] = 0
+        for header in buffer.headers:
+            header[0] = (0, 0, 0)
+        return buffer
+
+    @classmethod
+    def attach(cls, name=SNAPSHOT_NAME, capacity=SNAPSHOT_CAPACITY, untrack=True):
+        shm = shared_memory.SharedMemory(name=name)
+        if untrack:
+            # Attaching registers the segment too, and this process's tracker
+            # would unlink it on exit; only the creator should do that. Children
+            # forked from the creator share its tracker and must pass False.
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm, capacity, owner=False)
+
+    def publish(self, records):
+        """Write a frame of FRAME_DTYPE records and make it the latest"""
+        count = min(len(records), self.capacity)
+        seq = int(self.seq[0]) + 1
+        header = self.headers[seq % 2]
+        slot = self.slots[seq % 2]
+        header['version'] += 1  # Odd: slot is being written
+        slot[:count] = records[:count]
+        header['count'] = count
+        header['seq'] = seq
+        header['version'] += 1
+        self.seq[0] = seq
+        return seq
+
+    def latest(self, copy=True):
+        """Return (seq, records) for the latest frame, or (0, None) before the first.
+
+        With ``copy=False`` the records are a view into shared memory that
+        stays valid until the writer publishes two more frames.
+        """
+        while True:
+            seq = int(self.seq[0])
+            if not seq:
+                return 0, None
+            header = self.headers[seq % 2]
+            version = int(header['version'][0])
+            if version % 2:
+                continue
+            records = self.slots[seq % 2][:int(header['count'][0])]
+            if copy:
+                records = records.copy()
+            if int(header['version'][0]) == version and int(header['seq'][0]) == seq:
+                return seq, records
+
+    def wait_for_frame(self, last_seq, timeout=None, poll_interval=0.001):
+        """Block until a frame newer than ``last_seq`` is published"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while int(self.seq[0]) <= last_seq:
+            if deadline is not None and time.monotonic() >= deadline:
+                return last_seq, None
+            time.sleep(poll_interval)
+        return self.latest()
+
+    def close(self):
+        self.seq = self.headers = self.slots = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+class SnapshotQueue:
+    """json_queue-compatible shim over a SnapshotBuffer.
+
+    ``put`` publishes a list of output dicts; ``get`` waits for the next
+    frame and returns it as dicts. Frames that arrive while a consumer is
+    busy are skipped in favour of the newest one, which is what consumers
+    of live prices want anyway.
+    """
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.last_seq = int(buffer.seq[0])
+
+    def put(self, output_data):
+        self.buffer.publish(records_from_dicts(output_data))
+
+    def get_records(self, timeout=None):
+        seq, records = self.buffer.wait_for_frame(self.last_seq, timeout)
+        if records is None:
+            raise queue.Empty
+        self.last_seq = seq
+        return records
+
+    def get(self, timeout=None):
+        return dicts_from_records(self.get_records(timeout))
+
+class PriceFeed:
+    """Subscription to the live price frames for consumers besides json_queue's.
+
+    Frames come as FRAME_DTYPE records and always the newest one: a slow
+    subscriber skips frames rather than falling behind. On the 'shm'
+    transport any number of subscribers read the snapshot buffer; on
+    'queue' the publisher pushes full frames into a small manager queue
+    (one subscriber, see ``publish_price_feed``).
+    """
+    def __init__(self, manager=None):
+        if JSON_TRANSPORT == 'shm':
+            self.snapshots = SnapshotQueue(SnapshotBuffer.attach())
+            self.queue = None
+        else:
+            self.snapshots = None
+            self.queue = manager.get_price_feed()
+
+    def get_records(self, timeout=None):
+        """Block for the next frame; raises queue.Empty after ``timeout``"""
+        if self.snapshots is not None:
+            return self.snapshots.get_records(timeout)
+        records = self.queue.get(timeout=timeout)
+        while True:
+            try:
+                records = self.queue.get_nowait()
+            except queue.Empty:
+                return records
+
+def publish_price_feed(feed_queue, records):
+    """Push a frame into the manager's price feed, dropping the oldest if full"""
+    for _ in range(PRICE_FEED_DEPTH + 1):
+        try:
+            feed_queue.put_nowait(records)
+            return True
+        except queue.Full:
+            try:
+                feed_queue.get_nowait()
+            except queue.Empty:
+                pass
+    return False
+
+def send_pin(pin_queue, mint, pinned=True):
+    """Ask jupitersPrices to track ``mint`` and never evict it (or to stop pinning it)"""
+    try:
+        pin_queue.put({'mint': mint, 'pin': pinned})
+        return True
+    except Exception:
+        return False
+
+def get_json_queue(manager=None):
+    """Return the price frame queue for the configured JSON_TRANSPORT"""
+    if JSON_TRANSPORT == 'shm':
+        return SnapshotQueue(SnapshotBuffer.attach())
+    return manager.get_json_queue()
+
 def run_manager():
     # Create the shared objects
     task_queue = Queue()
     json_queue = Queue()
     buy_signal_queue = Queue()
+    price_feed = Queue(maxsize=PRICE_FEED_DEPTH)
+    pin_queue = Queue()  # {'mint', 'pin'} from the buyers and sell monitor to jupitersPrices
     stop_event = Event()
-    
+    snapshot_buffer = SnapshotBuffer.create() if JSON_TRANSPORT == 'shm' else None
+
     # Register them with the manager
     QueueManager.register('get_queue', callable=lambda: task_queue)
     QueueManager.register('get_json_queue', callable=lambda: json_queue)
     QueueManager.register('get_buy_signal_queue', callable=lambda: buy_signal_queue)
+    QueueManager.register('get_price_feed', callable=lambda: price_feed)
+    QueueManager.register('get_pin_queue', callable=lambda: pin_queue)
     QueueManager.register('get_stop_event', callable=lambda: stop_event)
-    
+
     # Start the manager server
     manager = QueueManager(address=('localhost', 50000), authkey=b'abc123')
     server = manager.get_server()
-    
+
     print("🚀 Queue manager server running - ready for connections")
     print("   Press Ctrl+C to stop the manager")
-    
+
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         print("\n🛑 Shutting down queue manager...")
         # Set stop event when shutting down
         stop_event.set()
+        if snapshot_buffer is not None:
+            snapshot_buffer.close()
         sys.exit(0)
 
+def run_benchmark(frames=20):
+    """Per-frame latency of the manager queue vs. the shared-memory snapshot"""
+    import multiprocessing
+    import random
+
+    def make_frame(n_tokens):
+        now = datetime.now().strftime('%H:%M:%S')
+        return [
+            dict(zip(HORIZON_KEYS, [round(random.uniform(-5, 5), 2) for _ in HORIZON_KEYS]),
+                 token=f"{i:044d}"[:8], price=random.random() * 1e-4, id=f"{i:044d}", time=now)
+            for i in range(n_tokens)
+        ]
+
+    def queue_consumer(json_queue, results, count):
+        for _ in range(count):
+            sent_at, frame = json_queue.get()
+            results.put(time.perf_counter() - sent_at)
+
+    def snapshot_consumer(name, capacity, results, count, as_dicts):
+        buffer = SnapshotBuffer.attach(name, capacity, untrack=False)
+        last_seq = 0
+        for _ in range(count):
+            last_seq, records = buffer.wait_for_frame(last_seq, poll_interval=0.0002)
+            if as_dicts:
+                dicts_from_records(records)
+            results.put(time.perf_counter() - records['timestamp'][0])
+        buffer.close()
+
+    print(f"{'Tokens':<8} {'Transport':<26} {'p50 ms':<9} {'max ms':<9}")
+    for n_tokens in (1500, 20000):
+        frame = make_frame(n_tokens)
+
+        # Pickled through a BaseManager server, as json_queue is today
+        manager_queue = Queue()
+        QueueManager.register('get_bench_queue', callable=lambda: manager_queue)
+        manager = QueueManager(address=('localhost', 0), authkey=b'bench')
+        manager.start()
+        results = multiprocessing.Queue()
+        consumer = multiprocessing.Process(
+            target=queue_consumer, args=(manager.get_bench_queue(), results, frames))
+        consumer.start()
+        producer_queue = manager.get_bench_queue()
+        for _ in range(frames):
+            producer_queue.put((time.perf_counter(), frame))
+            time.sleep(0.2)
+        latencies = sorted(results.get() for _ in range(frames))
+        consumer.join()
+        manager.shutdown()
+        print(f"{n_tokens:<8} {'manager queue':<26} {latencies[frames // 2] * 1000:<9.2f} {latencies[-1] * 1000:<9.2f}")
+
+        # Shared-memory snapshot, read as raw records and as dicts
+        for as_dicts in (False, True):
+            buffer = SnapshotBuffer.create('bench_' + SNAPSHOT_NAME, n_tokens)
+            records = records_from_dicts(frame)
+            results = multiprocessing.Queue()
+            consumer = multiprocessing.Process(
+                target=snapshot_consumer,
+                args=('bench_' + SNAPSHOT_NAME, n_tokens, results, frames, as_dicts))
+            consumer.start()
+            time.sleep(0.5)
+            for _ in range(frames):
+                records['timestamp'][0] = time.perf_counter()  # Carries the send time
+                buffer.publish(records)
+                time.sleep(0.2)
+            latencies = sorted(results.get() for _ in range(frames))
+            consumer.join()
+            buffer.close()
+            label = 'shared memory (dicts)' if as_dicts else 'shared memory (records)'
+            print(f"{n_tokens:<8} {label:<26} {latencies[frames // 2] * 1000:<9.2f} {latencies[-1] * 1000:<9.2f}")
+
 if __name__ == '__main__':
-    run_manager()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == 'bench':
+        run_benchmark()
+    else:
+        run_manager()
@@ -0,0 +1,92 @@
+import concurrent.futures
+import threading
+import time
+from timingWheel import TimingWheel
+
+class QuoteCache:
+    """Swap quotes fetched ahead of a likely buy, kept for ``ttl`` seconds.
+
+    ``prefetch(mint)`` requests a quote on a small worker pool (at most
+    ``max_inflight`` at once, one per mint) and returns immediately, so
+    the batch loop never waits on the swap API. A cached quote is only
+    refreshed once it is older than half its ``ttl``. ``take(mint, amount)``
+    hands out a cached quote once: only if it is younger than ``ttl`` and
+    was quoted for an input amount within ``tolerance`` of ``amount``;
+    otherwise the caller quotes as usual. Expired quotes are dropped via a
+    timing wheel as the cache is used.
+    """
+    def __init__(self, fetch, ttl=5.0, workers=2, max_inflight=8):
+        self.fetch = fetch  # mint -> quoteResponse dict
+        self.ttl = ttl
+        self.max_inflight = max_inflight
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='quote')
+        self.lock = threading.Lock()
+        self.quotes = {}  # mint -> (fetched time, quote)
+        self.inflight = set()
+        self.expiry = TimingWheel(tick=0.25)
+        self.stats = {'requested': 0, 'fetched': 0, 'failed': 0, 'expired': 0, 'hits': 0, 'misses': 0}
+
+    def __len__(self):
+        return len(self.quotes)
+
+    def _expire(self, now):
+        for mint in self.expiry.advance(now):
+            self.quotes.pop(mint, None)
+            self.stats['expired'] += 1
+
+    def prefetch(self, mint):
+        """Start fetching a quote for ``mint`` unless one is fresh or on its way"""
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+            cached = self.quotes.get(mint)
+            if cached is not None and now - cached[0] < self.ttl / 2:
+                return False
+            if mint in self.inflight or len(self.inflight) >= self.max_inflight:
+                return False
+            self.inflight.add(mint)
+            self.stats['requested'] += 1
+        self.pool.submit(self._fetch, mint)
+        return True
+
+    def _fetch(self, mint):
+        try:
+            quote = self.fetch(mint)
+        except Exception as e:
+            with self.lock:
+                self.stats['failed'] += 1
+            print(f"⚠️ Quote prefetch failed for {mint}: {str(e)}")
+            return
+        finally:
+            with self.lock:
+                self.inflight.discard(mint)
+        fetched = time.time()
+        with self.lock:
+            self.quotes[mint] = (fetched, quote)
+            self.expiry.schedule(mint, fetched + self.ttl)
+            self.stats['fetched'] += 1
+
+    def take(self, mint, amount=None, tolerance=0.05):
+        """The cached quote for ``mint`` if still usable (removed either way), else None"""
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+            entry = self.quotes.pop(mint, None)
+            self.expiry.cancel(mint)
+            usable = entry is not None and now - entry[0] <= self.ttl
+            if usable and amount:
+                quoted = int(entry[1].get('inAmount', 0))
+                usable = abs(quoted - amount) <= tolerance * amount
+            self.stats['hits' if usable else 'misses'] += 1
+        return entry[1] if usable else None
+
+    def summary(self):
+        with self.lock:
+            stats = dict(self.stats)
+        used = stats['hits'] + stats['misses']
+        rate = stats['hits'] / used * 100 if used else 0
+        return (f"quotes {stats['fetched']} prefetched, {stats['hits']}/{used} used ({rate:.0f}%), "
+                f"{stats['expired']} expired, {stats['failed']} failed")
+
+    def shutdown(self, wait=False):
+        self.pool.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket with burst and adaptive backoff.
+
+    Callers reserve a token under a short lock and sleep *outside* it, so
+    waiting workers never serialize each other; the bucket simply hands out
+    start times ``1 / rate`` apart once the burst is spent.
+
+    ``record`` feeds response statuses back: a 429 halves the effective rate
+    (down to ``min_rate``) and honours ``Retry-After``, and every success
+    after that raises it again by ``recovery`` of the configured rate.
+    Nothing refills during a ``Retry-After`` pause, so waiters resume at the
+    reduced rate once it ends instead of all firing when it does.
+    """
+    def __init__(self, rate, burst=1, min_rate=None, recovery=0.05):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.min_rate = float(min_rate) if min_rate else self.rate / 16
+        self.recovery = recovery
+        self.current_rate = self.rate
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        # ``updated`` is in the future while paused
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.current_rate)
+            self.updated = now
+
+    def reserve(self, tokens=1):
+        """Take ``tokens`` now and return how long to wait before using them"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= tokens
+            wait = -self.tokens / self.current_rate if self.tokens < 0 else 0.0
+            return max(0.0, self.paused_until - now) + wait
+
+    def try_acquire(self, tokens=1):
+        """Take ``tokens`` only if they are available without waiting"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.tokens < tokens or now < self.paused_until:
+                return False
+            self.tokens -= tokens
+            return True
+
+    def acquire(self, tokens=1):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=1):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record(self, status_code, retry_after=None):
+        """Adapt the rate to a response status (429 backs off, success recovers)"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if status_code == 429:
+                self.current_rate = max(self.min_rate, self.current_rate / 2)
+                self.tokens = min(self.tokens, 0.0)
+                if retry_after:
+                    try:
+                        self.paused_until = max(self.paused_until, now + float(retry_after))
+                        self.updated = max(self.updated, self.paused_until)  # No refill until it ends
+                    except (TypeError, ValueError):
+                        pass
+            elif status_code is not None and status_code < 400 and self.current_rate < self.rate:
+                self.current_rate = min(self.rate, self.current_rate + self.rate * self.recovery)
+
+
+class RateLimiter:
+    """Named per-endpoint budgets, each backed by its own TokenBucket"""
+    def __init__(self, budgets=None):
+        self.buckets = {}
+        for name, budget in (budgets or {}).items():
+            self.add_budget(name, *budget)
+
+    def add_budget(self, name, rate, burst=1):
+        self.buckets[name] = TokenBucket(rate, burst)
+        return self.buckets[name]
+
+    def acquire(self, name, tokens=1):
+        self.buckets[name].acquire(tokens)
+
+    async def acquire_async(self, name, tokens=1):
+        await self.buckets[name].acquire_async(tokens)
+
+    def try_acquire(self, name, tokens=1):
+        return self.buckets[name].try_acquire(tokens)
+
+    def record(self, name, status_code, retry_after=None):
+        self.buckets[name].record(status_code, retry_after)
+
+    def record_response(self, name, response):
+        """Record a requests/aiohttp response (or None for a transport error)"""
+        if response is None:
+            return
+        status = getattr(response, 'status_code', None) or getattr(response, 'status', None)
+        self.record(name, status, response.headers.get('Retry-After'))
+
+
+if __name__ == "__main__":
+    # Benchmark: achieved throughput vs. configured rate against a local stub
+    import concurrent.futures
+    import requests
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    STUB_LATENCY = 0.05
+    WORKERS = 50
+    DURATION = 3.0
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(STUB_LATENCY)
+            body = b'{"data": {}}'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/price/v2"
+
+    print(f"🔬 {WORKERS} workers, {STUB_LATENCY * 1000:.0f}ms stub latency, {DURATION:.0f}s per run")
+    print(f"{'Configured/s':<14} {'Burst':<7} {'Achieved/s':<12} {'Ratio':<6}")
+    for rate, burst in [(10, 1), (25, 1), (25, 10), (100, 1), (250, 10), (500, 20)]:
+        limiter = RateLimiter({'stub': (rate, burst)})
+        local = threading.local()
+        start = time.monotonic()
+        deadline = start + DURATION
+
+        def worker():
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+            done = 0
+            while True:
+                limiter.acquire('stub')
+                if time.monotonic() >= deadline:
+                    return done
+                limiter.record_response('stub', local.session.get(url, timeout=5))
+                done += 1
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            completed = sum(pool.map(lambda _: worker(), range(WORKERS)))
+        achieved = completed / DURATION  # Requests started inside the window
+        print(f"{rate:<14} {burst:<7} {achieved:<12.1f} {achieved / rate:<6.2f}")
+
+    server.shutdown()
@@ -0,0 +1,303 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import numpy as np
+from queueManager import FRAME_DTYPE, records_from_dicts, dicts_from_records
+from ruleEngine import columns_from_records
+from positionBook import TAKE_PROFIT_LADDER, STOP_LOSS
+
+REPLAY_MAGIC = b'JPRPLY01'
+FRAME = 1  # Payload: FRAME_DTYPE records
+MINT = 2   # Payload: funPump coin as UTF-8 JSON
+
+# Every entry: kind, wall-clock time it was recorded, payload size
+ENTRY_HEADER = struct.Struct('<Bdi')
+
+class ReplayRecorder:
+    """Append-only log of json_queue frames and funPump mint events.
+
+    Frames are stored as raw FRAME_DTYPE records (about 120 bytes a token),
+    so a day of 1500-token frames every 3s is roughly 5GB uncompressed and
+    reads back with no parsing. Safe to call from several threads.
+    """
+    def __init__(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'ab', buffering=1024 * 1024)
+        if new_file:
+            self.file.write(REPLAY_MAGIC)
+        self.lock = threading.Lock()
+
+    def _append(self, kind, payload, timestamp=None):
+        header = ENTRY_HEADER.pack(kind, time.time() if timestamp is None else timestamp, len(payload))
+        with self.lock:
+            self.file.write(header)
+            self.file.write(payload)
+
+    def record_frame(self, frame, timestamp=None):
+        """Record one full frame (output dicts or FRAME_DTYPE records)"""
+        records = frame if isinstance(frame, np.ndarray) else records_from_dicts(frame)
+        self._append(FRAME, records.tobytes(), timestamp)
+
+    def record_mint(self, coin, timestamp=None):
+        self._append(MINT, json.dumps(coin, separators=(',', ':')).encode(), timestamp)
+
+    def flush(self):
+        with self.lock:
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+def read_replay(path):
+    """Yield ``(kind, timestamp, payload)`` from a replay log.
+
+    Frame payloads are zero-copy FRAME_DTYPE views into the mapped file;
+    mint payloads are dicts. A truncated final entry (recorder killed
+    mid-write) ends the log.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= len(REPLAY_MAGIC):
+            return
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if data[:len(REPLAY_MAGIC)] != REPLAY_MAGIC:
+        raise ValueError(f"{path} is not a replay log")
+    offset = len(REPLAY_MAGIC)
+    end = len(data)
+    while offset + ENTRY_HEADER.size <= end:
+        kind, timestamp, size = ENTRY_HEADER.unpack_from(data, offset)
+        offset += ENTRY_HEADER.size
+        if offset + size > end:
+            break
+        if kind == FRAME:
+            yield kind, timestamp, np.frombuffer(data, dtype=FRAME_DTYPE,
+                                                 count=size // FRAME_DTYPE.itemsize, offset=offset)
+        elif kind == MINT:
+            yield kind, timestamp, json.loads(data[offset:offset + size])
+        offset += size
+
+def default_exit(profit, held_seconds, stop_loss=STOP_LOSS, ladder=TAKE_PROFIT_LADDER):
+    """Live auto-sell rules: positionBook's stop loss and take-profit ladder"""
+    if profit <= stop_loss:
+        return f"STOP LOSS ({stop_loss:g}%)"
+    for min_held, target, reason in ladder:
+        if held_seconds >= min_held:
+            return reason if profit >= target else None
+    return None
+
+class Backtester:
+    """Deterministic replay of recorded frames through the entry rules.
+
+    Entries come from the same RuleEngine ``check_batch`` uses, evaluated
+    straight on the frame's records. Buys fill at the frame price plus
+    ``slippage``; exits follow ``exit_rule(profit_pct, held_seconds)`` and
+    fill at the frame price minus ``slippage``. A mint is not bought again
+    until ``cooldown`` seconds after its last buy (bought_tokens expiry).
+    Positions still open after ``max_hold`` seconds are closed.
+    """
+    def __init__(self, engine, exit_rule=default_exit, buy_usd=940, slippage=0.02,
+                 cooldown=16 * 60, max_hold=16 * 60):
+        self.engine = engine
+        self.exit_rule = exit_rule
+        self.buy_usd = buy_usd
+        self.slippage = slippage
+        self.cooldown = cooldown
+        self.max_hold = max_hold
+        self.positions = {}  # mint -> (entry price, entry time, condition)
+        self.last_buy = {}
+        self.trades = []
+        self.frames = 0
+        self.rows = 0
+        self.mints = 0
+
+    def _close(self, mint, price, now, reason):
+        entry_price, entry_time, condition = self.positions.pop(mint)
+        exit_price = price * (1 - self.slippage)
+        self.trades.append({
+            'mint': mint,
+            'condition': condition,
+            'entry_time': entry_time,
+            'exit_time': now,
+            'entry_price': entry_price,
+            'exit_price': exit_price,
+            'profit_pct': (exit_price - entry_price) / entry_price * 100,
+            'reason': reason
+        })
+
+    def on_frame(self, records, now, matched=None, rows=None):
+        """Exits then entries for one frame.
+
+        ``matched`` is ``(indices, conditions)`` if the caller already ran
+        the rules, and ``rows`` maps mint bytes to record index; both let
+        a sweep share per-frame work across many backtesters.
+        """
+        self.frames += 1
+        self.rows += len(records)
+        mints = records['mint']
+        prices = records['price']
+
+        if self.positions:
+            if rows is None:
+                held = np.array([mint.encode() for mint in self.positions], dtype=mints.dtype)
+                found = np.flatnonzero(np.isin(mints, held)).tolist()
+            else:
+                found = sorted(rows[key] for key in (mint.encode() for mint in self.positions) if key in rows)
+            for i in found:
+                mint = mints[i].decode()
+                price = float(prices[i])
+                entry_price, entry_time, _ = self.positions[mint]
+                if not price > 0:
+                    continue
+                profit = (price * (1 - self.slippage) - entry_price) / entry_price * 100
+                held_seconds = now - entry_time
+                reason = self.exit_rule(profit, held_seconds)
+                if reason is None and held_seconds >= self.max_hold:
+                    reason = "MAX HOLD"
+                if reason:
+                    self._close(mint, price, now, reason)
+
+        if matched is None:
+            indices, conditions, _ = self.engine.matches(columns_from_records(records))
+        else:
+            indices, conditions = matched
+        for i, condition in zip(indices.tolist(), conditions):
+            mint = mints[i].decode()
+            if mint in self.positions or now - self.last_buy.get(mint, -np.inf) < self.cooldown:
+                continue
+            self.positions[mint] = (float(prices[i]) * (1 + self.slippage), now, condition)
+            self.last_buy[mint] = now
+
+    def run(self, entries):
+        for kind, timestamp, payload in entries:
+            if kind == FRAME:
+                self.on_frame(payload, timestamp)
+            elif kind == MINT:
+                self.mints += 1
+        return self.summary()
+
+    def summary(self):
+        profits = np.array([trade['profit_pct'] for trade in self.trades])
+        pnl = profits / 100 * self.buy_usd
+        equity = np.cumsum(pnl) if len(pnl) else np.zeros(1)
+        return {
+            'frames': self.frames,
+            'rows': self.rows,
+            'mint_events': self.mints,
+            'trades': len(self.trades),
+            'open_positions': len(self.positions),
+            'win_rate': float((profits > 0).mean() * 100) if len(profits) else 0.0,
+            'avg_profit_pct': float(profits.mean()) if len(profits) else 0.0,
+            'total_pnl_usd': float(pnl.sum()),
+            'max_drawdown_usd': float((np.maximum.accumulate(equity) - equity).max()),
+            'by_condition': {
+                name: sum(1 for trade in self.trades if trade['condition'] == name)
+                for name in self.engine.names
+            }
+        }
+
+def feed_queue(entries, json_queue, speed=10.0):
+    """Replay frames into a live json_queue at ``speed`` times real time"""
+    previous = None
+    for kind, timestamp, payload in entries:
+        if kind != FRAME:
+            continue
+        if previous is not None and speed > 0:
+            time.sleep(max(0.0, (timestamp - previous) / speed))
+        previous = timestamp
+        json_queue.put(dicts_from_records(payload))
+
+def synthesize(seed_frame, path, hours=1.0, interval=3.0, seed=0, volatility=0.01, lifetime=1800.0):
+    """Write a replay log from one seed frame (e.g. token_prices.json).
+
+    Every token random-walks from its seed price (log-normal steps with
+    occasional pumps and dumps). Tokens are delisted after about
+    ``lifetime`` seconds and replaced by a new mint (recorded as a mint
+    event), so young tokens with missing horizons keep appearing. Horizon
+    changes are computed from the walked history as jupitersPrices does.
+    Same arguments, same log.
+    """
+    from priceHistory import PriceHistoryStore
+    horizons = [2, 5, 10, 30, 60, 120, 300, 600]
+    rng = np.random.default_rng(seed)
+    mints = [item['id'] for item in seed_frame]
+    seed_prices = np.array([item['price'] for item in seed_frame], dtype=np.float64)
+    prices = seed_prices.copy()
+    history = PriceHistoryStore(int(700 / interval) + 4, len(mints))
+    records = np.zeros(len(mints), dtype=FRAME_DTYPE)
+    recorder = ReplayRecorder(path)
+    start = time.time() - hours * 3600
+    listed = 0
+    for step in range(int(hours * 3600 / interval)):
+        now = start + step * interval
+        for i in np.flatnonzero(rng.random(len(mints)) < interval / lifetime).tolist():
+            history.pop(mints[i], None)
+            listed += 1
+            mints[i] = f"{listed:040d}pump"
+            prices[i] = seed_prices[rng.integers(len(seed_prices))]
+            recorder.record_mint({'mint': mints[i]}, now)
+        shocks = rng.normal(0, volatility, len(prices))
+        jumps = rng.random(len(prices))
+        shocks[jumps < 0.0005] += rng.uniform(0.2, 1.5, (jumps < 0.0005).sum())
+        shocks[jumps > 0.9995] -= rng.uniform(0.2, 0.8, (jumps > 0.9995).sum())
+        prices *= np.exp(shocks)
+        for mint, price in zip(mints, prices.tolist()):
+            history.append(mint, now, price)
+        history.evict_before(now - 700)
+        current, changes = history.horizon_changes(mints, now, horizons)
+        records['mint'] = mints
+        records['price'] = current
+        records['changes'] = np.round(changes, 2)
+        records['timestamp'] = now
+        recorder.record_frame(records, now)
+    recorder.close()
+
+if __name__ == "__main__":
+    # python replay.py synth token_prices.json out.replay [hours]
+    # python replay.py backtest out.replay [strategies.json]
+    # python replay.py feed out.replay [speed]
+    import sys
+    command = sys.argv[1] if len(sys.argv) > 1 else 'backtest'
+
+    if command == 'synth':
+        seed_path = sys.argv[2] if len(sys.argv) > 2 else 'token_prices.json'
+        out_path = sys.argv[3] if len(sys.argv) > 3 else 'recordings/synthetic.replay'
+        hours = float(sys.argv[4]) if len(sys.argv) > 4 else 1.0
+        with open(seed_path) as f:
+            seed_frame = json.load(f)
+        start = time.perf_counter()
+        synthesize(seed_frame, out_path, hours)
+        print(f"🧪 {hours:g}h of {len(seed_frame)}-token frames → {out_path} "
+              f"({os.path.getsize(out_path) / 1e6:.0f}MB) in {time.perf_counter() - start:.1f}s")
+
+    elif command == 'backtest':
+        from ruleEngine import RuleEngine, load_strategies
+        log_path = sys.argv[2] if len(sys.argv) > 2 else 'recordings/synthetic.replay'
+        if len(sys.argv) > 3:
+            engine = RuleEngine(load_strategies(sys.argv[3]))
+        else:
+            from infiniteMoneyGlitch import entry_rules as engine
+        start = time.perf_counter()
+        summary = Backtester(engine).run(read_replay(log_path))
+        elapsed = time.perf_counter() - start
+        print(f"📈 Replayed {summary['frames']} frames ({summary['rows']:,} rows) in {elapsed:.1f}s")
+        print(json.dumps(summary, indent=2))
+
+    elif command == 'feed':
+        from multiprocessing.managers import BaseManager
+        from queueManager import get_json_queue
+        log_path = sys.argv[2] if len(sys.argv) > 2 else 'recordings/synthetic.replay'
+        speed = float(sys.argv[3]) if len(sys.argv) > 3 else 10.0
+
+        class QueueManager(BaseManager):
+            pass
+
+        QueueManager.register('get_json_queue')
+        manager = QueueManager(address=('localhost', 50000), authkey=b'abc123')
+        manager.connect()
+        print(f"▶️ Feeding {log_path} into json_queue at {speed:g}x")
+        feed_queue(read_replay(log_path), get_json_queue(manager), speed)
@@ -0,0 +1,206 @@
+import json
+import operator
+import numpy as np
+from queueManager import HORIZON_KEYS
+
+NUMERIC_FIELDS = ['price'] + HORIZON_KEYS
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+# Strategies are plain data. Each has a name, an optional 'enabled' flag and
+# an 'all' list of rules; a token matches when every rule holds. Rules:
+#   {'field': 't_30s', 'op': '>', 'value': 30.0}   threshold (NaN never passes)
+#   {'count': ['t_2s', 't_5s'], 'below': -5.0, 'op': '<=', 'value': 0}
+#                                                  retrace count (NaN not counted)
+#   {'present': ['t_10s', 't_1m']}                 fields must not be N/A
+#   {'missing': ['t_5m', 't_10m']}                 fields must be N/A
+#   {'any': [rule, ...]}                           at least one sub-rule holds
+#   {'all': [rule, ...]}                           every sub-rule holds
+
+def safe_convert(value):
+    try:
+        if isinstance(value, str):
+            value = value.replace('%', '').strip()
+            if value.lower() in ('', 'nan', 'none', 'null', 'n/a'):
+                return float('nan')
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+def columns_from_dicts(batch, fields=NUMERIC_FIELDS):
+    """Column arrays (float64, NaN = N/A) from a list of token dicts"""
+    columns = {}
+    for field in fields:
+        values = [token.get(field) for token in batch]
+        try:
+            # Fast path: floats and None (None becomes NaN)
+            columns[field] = np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            columns[field] = np.fromiter((safe_convert(value) for value in values),
+                                         dtype=np.float64, count=len(values))
+    return columns
+
+def columns_from_records(records):
+    """Column arrays straight from FRAME_DTYPE records (no per-token work)"""
+    columns = {'price': records['price']}
+    for i, key in enumerate(HORIZON_KEYS):
+        columns[key] = records['changes'][:, i]
+    return columns
+
+class _Evaluation:
+    """One batch's columns plus a cache of rule masks shared across strategies"""
+    def __init__(self, columns):
+        self.columns = columns
+        self.size = len(next(iter(columns.values()))) if columns else 0
+        self.cache = {}
+
+    def column(self, field):
+        if field not in self.columns:
+            self.columns[field] = np.full(self.size, np.nan)
+        return self.columns[field]
+
+class RuleEngine:
+    """Entry strategies compiled once into vectorized batch predicates.
+
+    Every rule compiles to a function of an evaluation context returning a
+    boolean mask over the batch. Identical rules (by their JSON form) share
+    one mask per batch, so dozens of strategies built from the same
+    thresholds cost little more than one.
+    """
+    def __init__(self, strategies):
+        self.strategies = []
+        self.count_rules = {}
+        for strategy in strategies:
+            if not strategy.get('enabled', True):
+                continue
+            name = str(strategy['name'])
+            self.count_rules[name] = []
+            predicate = self._compile({'all': strategy['all']}, name)
+            self.strategies.append((name, predicate))
+
+    @property
+    def names(self):
+        return [name for name, _ in self.strategies]
+
+    def _compile(self, rule, strategy_name):
+        key = json.dumps(rule, sort_keys=True)
+
+        if 'field' in rule:
+            field, compare, value = rule['field'], OPERATORS[rule['op']], float(rule['value'])
+            def evaluate(ctx):
+                return compare(ctx.column(field), value)
+        elif 'count' in rule:
+            fields, below = list(rule['count']), float(rule['below'])
+            compare, value = OPERATORS[rule['op']], rule['value']
+            def counts(ctx):
+                return sum((ctx.column(field) < below).astype(np.int64) for field in fields)
+            self.count_rules[strategy_name].append(counts)
+            def evaluate(ctx):
+                return compare(counts(ctx), value)
+        elif 'present' in rule:
+            fields = list(rule['present'])
+            def evaluate(ctx):
+                return np.logical_and.reduce([~np.isnan(ctx.column(field)) for field in fields])
+        elif 'missing' in rule:
+            fields = list(rule['missing'])
+            def evaluate(ctx):
+                return np.logical_and.reduce([np.isnan(ctx.column(field)) for field in fields])
+        elif 'any' in rule or 'all' in rule:
+            combine = np.logical_or if 'any' in rule else np.logical_and
+            parts = [self._compile(part, strategy_name) for part in rule.get('any', rule.get('all'))]
+            empty = 'all' in rule
+            def evaluate(ctx):
+                if not parts:
+                    return np.full(ctx.size, empty)
+                mask = parts[0](ctx)
+                for part in parts[1:]:
+                    mask = combine(mask, part(ctx))
+                return mask
+        else:
+            raise ValueError(f"Unknown rule: {rule}")
+
+        def cached(ctx):
+            mask = ctx.cache.get(key)
+            if mask is None:
+                mask = ctx.cache[key] = np.asarray(evaluate(ctx), dtype=bool)
+            return mask
+        return cached
+
+    def evaluate(self, columns):
+        """Per-strategy boolean masks over the batch, in strategy order"""
+        ctx = _Evaluation(dict(columns))
+        with np.errstate(invalid='ignore'):
+            return {name: predicate(ctx) for name, predicate in self.strategies}
+
+    def matches(self, columns):
+        """Indices of matching tokens and, for each, the first strategy it met"""
+        masks = self.evaluate(columns)
+        if not masks:
+            return np.empty(0, dtype=np.int64), [], masks
+        stacked = np.vstack(list(masks.values()))
+        hit = stacked.any(axis=0)
+        indices = np.flatnonzero(hit)
+        first = stacked[:, indices].argmax(axis=0)
+        names = self.names
+        return indices, [names[i] for i in first.tolist()], masks
+
+    def retrace_counts(self, columns, index):
+        """Retrace counts of every count rule, per strategy, for one token"""
+        ctx = _Evaluation({field: values[index:index + 1] for field, values in columns.items()})
+        with np.errstate(invalid='ignore'):
+            return {name: [int(counts(ctx)[0]) for counts in rules]
+                    for name, rules in self.count_rules.items()}
+
+def relax_strategies(strategies, margin, fields=('price',)):
+    """Copy of ``strategies`` with thresholds on ``fields`` loosened by ``margin``
+    (a fraction of the threshold), e.g. to find tokens close to matching"""
+    def relax(rule):
+        if 'field' in rule and rule['field'] in fields and rule['op'] in ('>', '>=', '<', '<='):
+            value = float(rule['value'])
+            step = abs(value) * margin
+            return dict(rule, value=value - step if rule['op'] in ('>', '>=') else value + step)
+        if 'any' in rule or 'all' in rule:
+            key = 'any' if 'any' in rule else 'all'
+            return dict(rule, **{key: [relax(part) for part in rule[key]]})
+        return rule
+    return [relax(strategy) for strategy in strategies]
+
+def load_strategies(path):
+    """Strategies from a JSON file (a list in the format above)"""
+    with open(path) as f:
+        return json.load(f)
+
+if __name__ == "__main__":
+    # Benchmark: many strategies over a synthetic 20k-token frame
+    import time
+    rng = np.random.default_rng(0)
+    n = 20000
+    columns = {'price': rng.lognormal(-11, 2, n)}
+    for key in HORIZON_KEYS:
+        values = rng.normal(0, 20, n)
+        values[rng.random(n) < 0.3] = np.nan
+        columns[key] = values
+
+    strategies = []
+    for i in range(48):
+        strategies.append({'name': f"s{i}", 'all': [
+            {'field': 't_30s', 'op': '>', 'value': 10.0 + i},
+            {'field': 'price', 'op': '>', 'value': 1e-6 * (1 + i % 4)},
+            {'count': ['t_2s', 't_5s', 't_2m'], 'below': -5.0, 'op': '<=', 'value': i % 2},
+            {'present': ['t_10s', 't_1m']}
+        ]})
+
+    engine = RuleEngine(strategies)
+    start = time.perf_counter()
+    runs = 20
+    for _ in range(runs):
+        indices, names, _ = engine.matches(columns)
+    elapsed = (time.perf_counter() - start) / runs * 1000
+    print(f"🔬 {len(strategies)} strategies x {n} tokens: {elapsed:.2f}ms per frame, {len(indices)} matches")
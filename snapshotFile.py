@@ -0,0 +1,183 @@
+import json
+import mmap
+import os
+import tempfile
+import time
+import numpy as np
+from queueManager import FRAME_DTYPE, records_from_dicts, dicts_from_records
+
+SNAPSHOT_MAGIC = b'JPSNAP01'
+
+# File header: magic, record count, write time (epoch seconds); records follow,
+# sorted by mint so a reader can bisect the mapped file without parsing it
+FILE_HEADER_DTYPE = np.dtype([('magic', 'S8'), ('count', '<u8'), ('written', '<f8')])
+
+def atomic_write(path, write):
+    """Write through a temp file in the same directory, then rename over ``path``.
+
+    ``os.replace`` is atomic on POSIX and Windows, so readers see either the
+    previous complete file or the new one, never a partial write. The new
+    file keeps the old one's permissions (0644 if there was none), not
+    mkstemp's 0600.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o644
+    fd, temp_path = tempfile.mkstemp(prefix='.snapshot-', dir=directory)
+    try:
+        if hasattr(os, 'fchmod'):
+            os.fchmod(fd, mode)
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+def write_json_snapshot(path, data):
+    """Compact JSON snapshot (same content as before, without indentation)"""
+    payload = json.dumps(data, separators=(',', ':')).encode()
+    atomic_write(path, lambda f: f.write(payload))
+
+def write_binary_snapshot(path, data):
+    """Fixed-width FRAME_DTYPE snapshot from output dicts or records"""
+    records = data if isinstance(data, np.ndarray) else records_from_dicts(data)
+    records = np.sort(records, order='mint')
+    header = np.array([(SNAPSHOT_MAGIC, len(records), time.time())], dtype=FILE_HEADER_DTYPE)
+
+    def write(f):
+        f.write(header.tobytes())
+        f.write(records.tobytes())
+    atomic_write(path, write)
+
+class SnapshotReader:
+    """Memory-mapped reader for binary snapshot files.
+
+    The mapping is refreshed only when the file is replaced (new inode or
+    mtime), so repeated lookups cost a bisect over the mapped mint column.
+    A writer's rename never disturbs an existing mapping: it keeps pointing
+    at the previous, complete file until ``refresh`` picks up the new one.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.stamp = None
+        self.map = None
+        self.header = None
+        self.records = np.empty(0, dtype=FRAME_DTYPE)
+
+    def refresh(self):
+        """Remap if the file changed; returns False when no valid snapshot exists"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp == self.stamp:
+            return self.header is not None
+
+        with open(self.path, 'rb') as f:
+            if stat.st_size < FILE_HEADER_DTYPE.itemsize:
+                return False
+            new_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = np.frombuffer(new_map, dtype=FILE_HEADER_DTYPE, count=1)[0]
+        count = int(header['count'])
+        if (header['magic'] != SNAPSHOT_MAGIC or
+                len(new_map) < FILE_HEADER_DTYPE.itemsize + count * FRAME_DTYPE.itemsize):
+            new_map.close()
+            return False
+
+        self.close()
+        self.map = new_map
+        self.header = header
+        self.records = np.frombuffer(new_map, dtype=FRAME_DTYPE, count=count,
+                                     offset=FILE_HEADER_DTYPE.itemsize)
+        self.stamp = stamp
+        return True
+
+    def age(self):
+        """Seconds since the current snapshot was written (inf if none)"""
+        if not self.refresh():
+            return float('inf')
+        return time.time() - float(self.header['written'])
+
+    def lookup(self, mint):
+        """Record for ``mint`` (a copy), or None"""
+        if not self.refresh():
+            return None
+        key = mint.encode() if isinstance(mint, str) else mint
+        mints = self.records['mint']
+        idx = int(np.searchsorted(mints, key))
+        if idx < len(mints) and mints[idx] == key:
+            return self.records[idx].copy()
+        return None
+
+    def price(self, mint):
+        record = self.lookup(mint)
+        return None if record is None else float(record['price'])
+
+    def prices(self):
+        """Every mint's price as a dict"""
+        if not self.refresh():
+            return {}
+        mints = [mint.decode() for mint in self.records['mint'].tolist()]
+        return dict(zip(mints, self.records['price'].tolist()))
+
+    def to_dicts(self):
+        """Full snapshot in the json_queue dict format"""
+        if not self.refresh():
+            return []
+        return dicts_from_records(self.records)
+
+    def close(self):
+        self.records = np.empty(0, dtype=FRAME_DTYPE)
+        self.header = None
+        self.stamp = None
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                pass  # A caller still holds a view; the GC releases the mapping
+            self.map = None
+
+if __name__ == "__main__":
+    # Benchmark: old indented json.dump vs. atomic compact JSON vs. binary
+    import sys
+    source = sys.argv[1] if len(sys.argv) > 1 else 'token_prices.json'
+    with open(source) as f:
+        data = json.load(f)
+    runs = 20
+    directory = tempfile.mkdtemp()
+
+    def timed(label, fn, path):
+        start = time.perf_counter()
+        for _ in range(runs):
+            fn(path, data)
+        elapsed = (time.perf_counter() - start) / runs * 1000
+        print(f"{label:<28} {elapsed:>8.2f}ms {os.path.getsize(path) / 1024:>9.1f}KB")
+
+    def indented(path, data):
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    print(f"🔬 {len(data)} tokens, {runs} writes each")
+    timed("json.dump(indent=2)", indented, os.path.join(directory, 'a.json'))
+    timed("atomic compact JSON", write_json_snapshot, os.path.join(directory, 'b.json'))
+    binary_path = os.path.join(directory, 'c.bin')
+    timed("atomic binary", write_binary_snapshot, binary_path)
+
+    mints = [item['id'] for item in data]
+    reader = SnapshotReader(binary_path)
+    start = time.perf_counter()
+    for mint in mints:
+        reader.price(mint)
+    print(f"{'mmap lookup':<28} {(time.perf_counter() - start) / len(mints) * 1e6:>8.2f}µs")
+    start = time.perf_counter()
+    with open(os.path.join(directory, 'a.json')) as f:
+        {item['id']: item['price'] for item in json.load(f)}
+    print(f"{'full json.load (old reader)':<28} {(time.perf_counter() - start) * 1000:>8.2f}ms")
+    reader.close()
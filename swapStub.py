@@ -0,0 +1,121 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_PORT = 3000
+QUOTE_LATENCY = 0.25    # Seconds to answer a quote (Jupiter quote API)
+EXECUTE_LATENCY = 0.35  # Seconds to build, sign and send a quoted swap
+TOKEN_PRICE_LAMPORTS = 50  # Lamports per raw output token unit in stub quotes
+
+def stub_quote(input_mint, output_mint, amount, slippage_bps=7000):
+    """A quoteResponse shaped like the NestJS API's (see res.json)"""
+    out_amount = amount // TOKEN_PRICE_LAMPORTS
+    return {
+        'inputMint': input_mint,
+        'inAmount': str(amount),
+        'outputMint': output_mint,
+        'outAmount': str(out_amount),
+        'otherAmountThreshold': str(out_amount * (10000 - slippage_bps) // 10000),
+        'swapMode': 'ExactIn',
+        'slippageBps': slippage_bps,
+        'priceImpactPct': '0.001',
+        'routePlan': [],
+        'contextSlot': 0,
+        'timeTaken': 0.001,
+        'swapUsdValue': str(amount / 1e9 * 150),
+        'quotedAt': time.time()
+    }
+
+def stub_swap(quote):
+    return {
+        'txid': uuid.uuid4().hex,
+        'lastValidBlockHeight': 0,
+        'confirmation': {'err': 'None'},
+        'swapResponse': {'swapTransaction': '', 'prioritizationFeeLamports': 0},
+        'quoteResponse': quote
+    }
+
+class SwapStub:
+    """Local stand-in for the NestJS swap API with configurable latencies.
+
+    Serves ``GET /swap/quote/<in>/<out>/<amount>``, ``POST /swap/execute``
+    (body: ``{"quoteResponse": ...}``), the combined
+    ``GET /swap/quote-and-execute/<in>/<out>/<amount>`` (both latencies,
+    back to back) and ``POST /auto-sell/start``. Counts requests per route.
+    """
+    def __init__(self, port=STUB_PORT, quote_latency=QUOTE_LATENCY, execute_latency=EXECUTE_LATENCY):
+        self.quote_latency = quote_latency
+        self.execute_latency = execute_latency
+        self.requests = {}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, like the Node server
+
+            def do_GET(self):
+                parts = self.path.split('?')[0].strip('/').split('/')
+                if len(parts) == 5 and parts[:2] == ['swap', 'quote']:
+                    stub.count('quote')
+                    time.sleep(stub.quote_latency)
+                    self.reply(stub_quote(parts[2], parts[3], int(parts[4])))
+                elif len(parts) == 5 and parts[:2] == ['swap', 'quote-and-execute']:
+                    stub.count('quote-and-execute')
+                    time.sleep(stub.quote_latency + stub.execute_latency)
+                    self.reply(stub_swap(stub_quote(parts[2], parts[3], int(parts[4]))))
+                else:
+                    self.reply({'message': 'Not Found'}, 404)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                path = self.path.split('?')[0].rstrip('/')
+                if path == '/swap/execute' and 'quoteResponse' in body:
+                    stub.count('execute')
+                    time.sleep(stub.execute_latency)
+                    self.reply(stub_swap(body['quoteResponse']))
+                elif path == '/auto-sell/start':
+                    stub.count('auto-sell')
+                    self.reply({'status': 'started', 'inputMint': body.get('inputMint')})
+                else:
+                    self.reply({'message': 'Not Found'}, 404)
+
+            def reply(self, data, status=200):
+                payload = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+
+    def count(self, route):
+        self.requests[route] = self.requests.get(route, 0) + 1
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True, name='swap-stub').start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+if __name__ == "__main__":
+    # python swapStub.py [port] [quote_ms] [execute_ms]
+    import sys
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else STUB_PORT
+    quote_latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else QUOTE_LATENCY
+    execute_latency = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else EXECUTE_LATENCY
+    stub = SwapStub(port, quote_latency, execute_latency)
+    print(f"🧪 Swap API stub at {stub.url} (quote {quote_latency * 1000:.0f}ms, execute {execute_latency * 1000:.0f}ms)")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,142 @@
+import concurrent.futures
+import copy
+import itertools
+import json
+import multiprocessing
+import random
+import time
+import numpy as np
+from replay import Backtester, read_replay, MINT
+from ruleEngine import RuleEngine, columns_from_records
+
+# Parameters are dotted paths into a strategy ("<name>.all.<rule>.<key>",
+# "<name>.enabled") or a Backtester setting (cooldown, max_hold, slippage)
+SWEEP_GRID = {
+    '2.all.0.value': [3e-05, 6.5e-05, 1e-04],     # Strategy 2 price floor
+    '1.enabled': [False, True],
+    '1.all.2.below': [-2.5, -5.0, -10.0, -20.0],  # Strategy 1 retrace limit
+    '3.enabled': [False, True],
+    '3.all.2.below': [-10.0, -20.0, -30.0],       # Strategy 3 retrace limit
+    'cooldown': [8 * 60, 16 * 60, 24 * 60]        # bought_tokens expiry
+}
+BACKTEST_SETTINGS = ('cooldown', 'max_hold', 'slippage', 'buy_usd')
+SWEEP_PROCESSES = multiprocessing.cpu_count()
+
+def apply_params(strategies, params):
+    """Copy of ``strategies`` with ``params`` applied, plus Backtester kwargs"""
+    strategies = copy.deepcopy(strategies)
+    settings = {}
+    by_name = {str(strategy['name']): strategy for strategy in strategies}
+    for path, value in params.items():
+        if path in BACKTEST_SETTINGS:
+            settings[path] = value
+            continue
+        name, *keys = path.split('.')
+        target = by_name[name]
+        for key in keys[:-1]:
+            target = target[int(key) if isinstance(target, list) else key]
+        target[int(keys[-1]) if isinstance(target, list) else keys[-1]] = value
+    return strategies, settings
+
+def _signature(strategies, settings):
+    """Parameter sets that trade identically (e.g. knobs of a disabled strategy) share this"""
+    enabled = [strategy for strategy in strategies if strategy.get('enabled', True)]
+    return json.dumps([enabled, settings], sort_keys=True)
+
+def grid_params(grid):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+def random_params(grid, count, seed=0):
+    """``count`` distinct draws, each value picked uniformly from the grid's list"""
+    rng = random.Random(seed)
+    total = int(np.prod([len(values) for values in grid.values()]))
+    drawn = {}
+    while len(drawn) < min(count, total):
+        params = {key: rng.choice(values) for key, values in grid.items()}
+        drawn.setdefault(json.dumps(params, sort_keys=True), params)
+    return list(drawn.values())
+
+def _run_batch(log_path, base_strategies, batch):
+    """Worker: one pass over the log for a batch of parameter sets.
+
+    The log is mmapped, so every worker reads the same page-cache pages
+    instead of a private copy. All sets' strategies go into one RuleEngine
+    (names prefixed by set) so identical rules are evaluated once a frame.
+    """
+    strategies, testers, names = [], [], []
+    for index, params in enumerate(batch):
+        applied, settings = apply_params(base_strategies, params)
+        engine = RuleEngine(applied)
+        testers.append(Backtester(engine, **settings))
+        names.append([f"{index}:{name}" for name in engine.names])
+        strategies.extend(dict(strategy, name=f"{index}:{strategy['name']}") for strategy in applied)
+    combined = RuleEngine(strategies)
+
+    for kind, timestamp, records in read_replay(log_path):
+        if kind == MINT:
+            for tester in testers:
+                tester.mints += 1
+            continue
+        masks = combined.evaluate(columns_from_records(records))
+        rows = dict(zip(records['mint'].tolist(), range(len(records))))
+        for tester, set_names in zip(testers, names):
+            if set_names:
+                stacked = np.vstack([masks[name] for name in set_names])
+                indices = np.flatnonzero(stacked.any(axis=0))
+                first = stacked[:, indices].argmax(axis=0).tolist()
+                matched = (indices, [tester.engine.names[i] for i in first])
+            else:
+                matched = (np.empty(0, dtype=np.int64), [])
+            tester.on_frame(records, timestamp, matched, rows)
+    return [tester.summary() for tester in testers]
+
+def sweep(log_path, param_sets, base_strategies, processes=SWEEP_PROCESSES):
+    """Backtest every parameter set; returns ``(params, summary)`` ranked by PnL"""
+    unique = {}
+    for params in param_sets:
+        unique.setdefault(_signature(*apply_params(base_strategies, params)), params)
+    param_sets = list(unique.values())
+    processes = max(1, min(processes, len(param_sets)))
+    batches = [param_sets[i::processes] for i in range(processes)]
+
+    results = []
+    context = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(processes, mp_context=context) as pool:
+        futures = [pool.submit(_run_batch, log_path, base_strategies, batch) for batch in batches]
+        for batch, future in zip(batches, futures):
+            results.extend(zip(batch, future.result()))
+    results.sort(key=lambda result: (-result[1]['total_pnl_usd'], result[1]['max_drawdown_usd']))
+    return results
+
+def print_ranking(results, top=20):
+    varied = [key for key in results[0][0] if len({json.dumps(params[key]) for params, _ in results}) > 1] \
+        if results else []
+    header = '  '.join(f"{key:>14}" for key in varied)
+    print(f"{'#':>3} {'PnL $':>10} {'Trades':>7} {'Hit %':>6} {'Drawdown $':>11}  {header}")
+    for rank, (params, summary) in enumerate(results[:top], 1):
+        values = '  '.join(f"{str(params[key]):>14}" for key in varied)
+        print(f"{rank:>3} {summary['total_pnl_usd']:>10.0f} {summary['trades']:>7} "
+              f"{summary['win_rate']:>6.1f} {summary['max_drawdown_usd']:>11.0f}  {values}")
+
+if __name__ == "__main__":
+    # python sweep.py <log.replay> [grid | random N] [processes]
+    import sys
+    from infiniteMoneyGlitch import ENTRY_STRATEGIES, STRATEGY_FILE
+    from ruleEngine import load_strategies
+    log_path = sys.argv[1] if len(sys.argv) > 1 else 'recordings/synthetic.replay'
+    search = sys.argv[2] if len(sys.argv) > 2 else 'grid'
+    if search == 'random':
+        param_sets = random_params(SWEEP_GRID, int(sys.argv[3]) if len(sys.argv) > 3 else 20)
+        processes = int(sys.argv[4]) if len(sys.argv) > 4 else SWEEP_PROCESSES
+    else:
+        param_sets = grid_params(SWEEP_GRID)
+        processes = int(sys.argv[3]) if len(sys.argv) > 3 else SWEEP_PROCESSES
+    base = load_strategies(STRATEGY_FILE) if STRATEGY_FILE else ENTRY_STRATEGIES
+
+    start = time.perf_counter()
+    results = sweep(log_path, param_sets, base, processes)
+    elapsed = time.perf_counter() - start
+    print(f"🔎 {len(results)} distinct parameter sets ({len(param_sets)} requested) "
+          f"over {log_path} in {elapsed:.1f}s with {processes} process(es)")
+    print_ranking(results)
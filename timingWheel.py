@@ -0,0 +1,144 @@
+import math
+import time
+
+class TimingWheel:
+    """Hierarchical timing wheel: per-key deadlines, expired in O(1) amortised.
+
+    Level 0 has ``slots`` buckets of one ``tick`` each, and every level above
+    covers ``slots`` times the span of the one below. A timer goes in the
+    coarsest bucket that still separates it from now and moves down a level
+    when the wheel reaches that bucket, so ``advance`` only touches buckets
+    whose time has come instead of scanning every timer. Timers fire at most
+    one tick late, never early; deadlines past the top level's span are
+    parked in its furthest bucket and re-placed when it comes round.
+
+    One timer per key: ``schedule`` replaces a key's deadline and ``cancel``
+    drops it, both lazily (the old bucket entry is skipped when reached).
+    Not thread-safe: callers serialise access.
+    """
+    def __init__(self, tick=1.0, slots=64, levels=4, now=None):
+        if slots & (slots - 1):
+            raise ValueError(f"slots must be a power of two: {slots}")
+        self.tick = tick
+        self.slots = slots
+        self.bits = slots.bit_length() - 1
+        self.mask = slots - 1
+        self.levels = levels
+        self.wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.timers = {}  # key -> (deadline, version)
+        self.due = []  # (key, version) at or past their tick, expired by the next advance
+        self.version = 0
+        self.current = math.floor((time.time() if now is None else now) / tick)
+
+    def __len__(self):
+        return len(self.timers)
+
+    def __contains__(self, key):
+        return key in self.timers
+
+    def deadline(self, key):
+        timer = self.timers.get(key)
+        return None if timer is None else timer[0]
+
+    def schedule(self, key, deadline):
+        """Expire ``key`` at ``deadline`` (replacing any earlier schedule)"""
+        self.version += 1
+        self.timers[key] = (deadline, self.version)
+        self._place(key, deadline, self.version)
+
+    def cancel(self, key):
+        return self.timers.pop(key, None) is not None
+
+    def _place(self, key, deadline, version):
+        tick = math.ceil(deadline / self.tick)
+        delta = tick - self.current
+        if delta <= 0:
+            self.due.append((key, version))
+            return
+        level = 0
+        while level < self.levels - 1 and delta >= 1 << (self.bits * (level + 1)):
+            level += 1
+        if delta >= 1 << (self.bits * self.levels):
+            tick = self.current + (1 << (self.bits * self.levels)) - 1  # Re-placed once reached
+        self.wheels[level][(tick >> (self.bits * level)) & self.mask].append((key, version))
+
+    def _expire(self, expired):
+        due, self.due = self.due, []
+        for key, version in due:
+            timer = self.timers.get(key)
+            if timer is None or timer[1] != version:
+                continue  # Cancelled or rescheduled
+            if math.ceil(timer[0] / self.tick) > self.current:
+                self._place(key, timer[0], version)
+                continue
+            del self.timers[key]
+            expired.append(key)
+
+    def advance(self, now=None):
+        """Move the wheel to ``now``; returns the keys whose deadline has passed"""
+        target = math.floor((time.time() if now is None else now) / self.tick)
+        expired = []
+        if target - self.current >= 1 << (self.bits * self.levels) or not self.timers:
+            # Jumping past a whole turn (or with nothing scheduled): re-place instead of stepping
+            self.current = max(self.current, target)
+            self.wheels = [[[] for _ in range(self.slots)] for _ in range(self.levels)]
+            self.due = []
+            for key, (deadline, version) in self.timers.items():
+                self._place(key, deadline, version)
+        self._expire(expired)
+        while self.current < target:
+            self.current += 1
+            # Cascade higher levels whose bucket starts at this tick, top down
+            for level in range(self.levels - 1, 0, -1):
+                if self.current & ((1 << (self.bits * level)) - 1) == 0:
+                    index = (self.current >> (self.bits * level)) & self.mask
+                    bucket, self.wheels[level][index] = self.wheels[level][index], []
+                    for key, version in bucket:
+                        timer = self.timers.get(key)
+                        if timer is not None and timer[1] == version:
+                            self._place(key, timer[0], version)
+            index = self.current & self.mask
+            self.due.extend(self.wheels[0][index])
+            self.wheels[0][index] = []
+            self._expire(expired)
+        return expired
+
+if __name__ == "__main__":
+    # Benchmark: per-batch cost of the old full scan of bought_tokens vs. the
+    # wheel, with N cooldowns of 16 minutes and a batch every 3 seconds
+    import random
+    cooldown = 16 * 60
+    batches = 2000
+    print(f"{'Cooldowns':<10} {'Full scan':>12} {'Wheel':>12} {'Same expiries':>14}")
+    for count in (1000, 10000, 100000):
+        rng = random.Random(0)
+        now = 1_700_000_000.0
+        tokens = {f"{i:044d}": now - rng.uniform(0, cooldown) for i in range(count)}
+        wheel = TimingWheel(now=now)
+        for token, bought in tokens.items():
+            wheel.schedule(token, bought + cooldown)
+        scanned = dict(tokens)
+        scan_time = wheel_time = 0.0
+        scan_expired, wheel_expired = set(), set()
+        for batch in range(batches):
+            now += 3
+            # Replace expiring tokens with new buys so the count stays flat
+            start = time.perf_counter()
+            expired = [token for token, bought in list(scanned.items()) if now - bought > cooldown]
+            for token in expired:
+                scanned.pop(token, None)
+            scan_time += time.perf_counter() - start
+            scan_expired.update(expired)
+            start = time.perf_counter()
+            expired = wheel.advance(now)
+            wheel_time += time.perf_counter() - start
+            wheel_expired.update(expired)
+            for i in range(len(expired)):
+                token = f"n{batch:06d}{i:037d}"
+                scanned[token] = now
+                wheel.schedule(token, now + cooldown)
+        now += 4  # One more step past the last batch's buys, off the 3s grid
+        scan_expired.update(token for token, bought in scanned.items() if now - bought > cooldown)
+        wheel_expired.update(wheel.advance(now))
+        same = scan_expired == wheel_expired
+        print(f"{count:<10} {scan_time / batches * 1e6:>10.1f}µs {wheel_time / batches * 1e6:>10.1f}µs {str(same):>14}")
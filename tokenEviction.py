@@ -0,0 +1,142 @@
+import heapq
+import math
+import time
+
+# 'lru'        evict the token whose price was updated longest ago
+# 'volatility' evict the token with the smallest absolute horizon change
+# 'listing'    evict the token that was added first
+EVICTION_POLICIES = ('lru', 'volatility', 'listing')
+
+class EvictionIndex:
+    """Min-heap of eviction scores with lazy invalidation.
+
+    Rescoring a token pushes a new entry and bumps its version instead of
+    searching the heap; stale entries are skipped when they surface and the
+    heap is rebuilt once they outnumber live ones. Finding a victim is
+    O(log n) amortised instead of a scan over every active token.
+
+    Pinned tokens (held positions) are never returned by ``pop_victim``.
+    Not thread-safe: callers hold the owning shard's lock.
+    """
+    def __init__(self, policy='lru'):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.policy = policy
+        self.heap = []  # (score, version, token)
+        self.entries = {}  # token -> (score, version)
+        self.pinned = set()
+        self.version = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, token):
+        return token in self.entries
+
+    def _push(self, token, score):
+        self.version += 1
+        self.entries[token] = (score, self.version)
+        if token not in self.pinned:
+            heapq.heappush(self.heap, (score, self.version, token))
+            if len(self.heap) > 4 * len(self.entries) + 64:
+                self._rebuild()
+
+    def _rebuild(self):
+        self.heap = [(score, version, token) for token, (score, version) in self.entries.items()
+                     if token not in self.pinned]
+        heapq.heapify(self.heap)
+
+    def add(self, token, now=None):
+        """Start tracking a newly active token"""
+        if token in self.entries:
+            return
+        now = time.time() if now is None else now
+        # Volatility is unknown until the first scoring pass, so don't evict yet
+        self._push(token, math.inf if self.policy == 'volatility' else now)
+
+    def touch(self, token, now=None):
+        """Record a price update (only moves the score under 'lru')"""
+        if self.policy == 'lru' and token in self.entries:
+            self._push(token, time.time() if now is None else now)
+
+    def set_scores(self, tokens, scores):
+        """Replace scores for many tokens at once (the 'volatility' pass)"""
+        for token, score in zip(tokens, scores):
+            if token in self.entries:
+                self.version += 1
+                self.entries[token] = (math.inf if math.isnan(score) else score, self.version)
+        self._rebuild()
+
+    def discard(self, token):
+        """Stop tracking a token; its heap entries go stale"""
+        self.entries.pop(token, None)
+        self.pinned.discard(token)
+
+    def pin(self, token):
+        """Never evict ``token`` (e.g. a held position) until unpinned"""
+        self.pinned.add(token)
+
+    def unpin(self, token):
+        if token in self.pinned:
+            self.pinned.discard(token)
+            entry = self.entries.get(token)
+            if entry is not None:
+                self._push(token, entry[0])
+
+    def peek_score(self):
+        """Score of the next victim without removing it (None if nothing is evictable)"""
+        heap, entries = self.heap, self.entries
+        while heap:
+            score, version, token = heap[0]
+            entry = entries.get(token)
+            if entry is not None and entry[1] == version and token not in self.pinned:
+                return score
+            heapq.heappop(heap)
+        return None
+
+    def pop_victim(self):
+        """Remove and return the token to evict, or None if nothing is evictable"""
+        heap, entries = self.heap, self.entries
+        while heap:
+            score, version, token = heapq.heappop(heap)
+            entry = entries.get(token)
+            if entry is None or entry[1] != version or token in self.pinned:
+                continue  # Stale, removed or pinned since it was pushed
+            del entries[token]
+            return token
+        return None
+
+if __name__ == "__main__":
+    # Benchmark: burst of new mints at MAX_TOKENS, old min() scan vs. the index
+    import random
+    from priceHistory import PriceHistoryStore
+
+    max_tokens = 20000
+    burst = 2000
+    rng = random.Random(0)
+    history = PriceHistoryStore(64, max_tokens + burst)
+    index = EvictionIndex('lru')
+    active = set()
+    start_time = time.time() - 600
+    for i in range(max_tokens):
+        token = f"mint{i}"
+        active.add(token)
+        index.add(token, start_time)
+        for t in sorted(rng.uniform(start_time, start_time + 600) for _ in range(3)):
+            history.append(token, t, 1.0)
+            index.touch(token, t)
+
+    start = time.perf_counter()
+    scanned = set(active)
+    for i in range(burst // 10):
+        victim = min(scanned, key=lambda x: history.latest_time(x, float('-inf')))
+        scanned.remove(victim)
+    scan = (time.perf_counter() - start) / (burst // 10)
+
+    start = time.perf_counter()
+    for i in range(burst):
+        victim = index.pop_victim()
+        index.add(f"new{i}")
+    heap = (time.perf_counter() - start) / burst
+    print(f"🔬 {max_tokens} active tokens: min() scan {scan * 1000:.2f}ms, "
+          f"index {heap * 1e6:.1f}µs per eviction ({scan / heap:.0f}x)")
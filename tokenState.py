@@ -0,0 +1,276 @@
+import threading
+import time
+import warnings
+import numpy as np
+from priceHistory import PriceHistoryStore
+from tokenEviction import EvictionIndex
+from timingWheel import TimingWheel
+
+class TokenShard:
+    """One slice of the token state, guarded by its own lock"""
+    def __init__(self, capacity, max_tokens, eviction_policy):
+        self.lock = threading.Lock()
+        self.price_data = {}
+        self.history = PriceHistoryStore(capacity, max_tokens)
+        self.active = set()
+        self.pending = set()
+        self.retry_counts = {}
+        self.retry_expiry = TimingWheel()  # When each retry count is forgotten
+        self.eviction = EvictionIndex(eviction_policy)
+
+    def forget_retries(self, mint):
+        self.retry_counts.pop(mint, None)
+        self.retry_expiry.cancel(mint)
+
+    def drop(self, mint):
+        self.active.discard(mint)
+        self.price_data.pop(mint, None)
+        self.history.pop(mint, None)
+        self.eviction.discard(mint)
+
+class ShardedTokenState:
+    """Token state for jupitersPrices split across ``shards`` locks by mint hash.
+
+    Each shard owns its mints' latest price data, price history rows,
+    active/pending membership, retry counts and eviction index, so fetch
+    workers writing different mints rarely wait on each other. Writers take
+    a shard lock for just that shard's part of a chunk.
+
+    ``snapshot`` reads each shard under its lock, so every token's price,
+    history and timestamp come from the same moment (no torn reads);
+    different shards may be a few milliseconds apart.
+
+    Retry counts of mints that never got a price are forgotten ``retry_ttl``
+    seconds after the last attempt (see ``expire_retries``).
+    """
+    def __init__(self, shards, capacity, max_tokens, eviction_policy='lru', retry_ttl=600.0):
+        rows = max_tokens // shards + max_tokens // (4 * shards) + 1  # Headroom for hash skew
+        self.shards = [TokenShard(capacity, rows, eviction_policy) for _ in range(shards)]
+        self.eviction_policy = eviction_policy
+        self.retry_ttl = retry_ttl
+
+    def shard(self, mint):
+        return self.shards[hash(mint) % len(self.shards)]
+
+    def _by_shard(self, mints):
+        groups = {}
+        count = len(self.shards)
+        for mint in mints:
+            groups.setdefault(hash(mint) % count, []).append(mint)
+        return groups
+
+    def __len__(self):
+        return sum(len(shard.active) for shard in self.shards)
+
+    def __contains__(self, mint):
+        return mint in self.shard(mint).active
+
+    def active_tokens(self):
+        tokens = []
+        for shard in self.shards:
+            with shard.lock:
+                tokens.extend(shard.active)
+        return tokens
+
+    def store_prices(self, chunk_data, now=None):
+        """Record a chunk of fetched prices; returns how many were stored"""
+        if not chunk_data:
+            return 0
+        now = time.time() if now is None else now
+        updated = 0
+        for index, mints in self._by_shard(chunk_data).items():
+            # Parse outside the lock, then hold it only for the writes
+            rows = []
+            for mint in mints:
+                try:
+                    price = float(chunk_data[mint]['price'])
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if price > 0:
+                    rows.append((mint, price))
+            shard = self.shards[index]
+            with shard.lock:
+                for mint, price in rows:
+                    shard.price_data[mint] = chunk_data[mint]
+                    shard.history.append(mint, now, price)
+                    shard.eviction.touch(mint, now)
+            updated += len(rows)
+        return updated
+
+    def reserve(self, mint):
+        """Mark ``mint`` pending; returns its attempt number, or 0 if already active/pending"""
+        shard = self.shard(mint)
+        with shard.lock:
+            if mint in shard.active or mint in shard.pending:
+                return 0
+            shard.pending.add(mint)
+            attempts = shard.retry_counts[mint] = shard.retry_counts.get(mint, 0) + 1
+            shard.retry_expiry.schedule(mint, time.time() + self.retry_ttl)
+            return attempts
+
+    def attempts(self, mint):
+        shard = self.shard(mint)
+        with shard.lock:
+            return shard.retry_counts.get(mint, 0)
+
+    def release(self, mint, forget=False):
+        """Clear a pending reservation (and its retry count if ``forget``)"""
+        shard = self.shard(mint)
+        with shard.lock:
+            shard.pending.discard(mint)
+            if forget:
+                shard.forget_retries(mint)
+
+    def activate(self, mint, price, now=None):
+        """Move a pending mint to active with its first price sample"""
+        now = time.time() if now is None else now
+        shard = self.shard(mint)
+        with shard.lock:
+            shard.active.add(mint)
+            shard.history.append(mint, now, price)
+            shard.eviction.add(mint, now)
+            shard.pending.discard(mint)
+            shard.forget_retries(mint)
+
+    def evict_one(self):
+        """Evict the globally lowest-scored unpinned token; returns it or None"""
+        best, best_score = None, None
+        for shard in self.shards:
+            with shard.lock:
+                score = shard.eviction.peek_score()
+            if score is not None and (best_score is None or score < best_score):
+                best, best_score = shard, score
+        if best is None:
+            return None
+        with best.lock:
+            victim = best.eviction.pop_victim()
+            if victim is not None:
+                best.drop(victim)
+        return victim
+
+    def pin(self, mint):
+        shard = self.shard(mint)
+        with shard.lock:
+            shard.eviction.pin(mint)
+
+    def unpin(self, mint):
+        shard = self.shard(mint)
+        with shard.lock:
+            shard.eviction.unpin(mint)
+
+    def expire_retries(self, now=None):
+        """Forget retry counts whose TTL ran out; returns how many"""
+        now = time.time() if now is None else now
+        expired = 0
+        for shard in self.shards:
+            with shard.lock:
+                for mint in shard.retry_expiry.advance(now):
+                    if mint in shard.pending:
+                        shard.retry_expiry.schedule(mint, now + self.retry_ttl)  # Attempt still running
+                        continue
+                    shard.retry_counts.pop(mint, None)
+                    expired += 1
+        return expired
+
+    def cleanup(self, cutoff):
+        """Drop history samples older than ``cutoff``"""
+        for shard in self.shards:
+            with shard.lock:
+                for mint in shard.history.evict_before(cutoff):
+                    shard.history.pop(mint)
+
+    def snapshot(self, current_time, horizons):
+        """Consistent read for the output stage.
+
+        Returns ``(token_ids, prices, changes, timestamps)`` for every active
+        token with price data; see ``PriceHistoryStore.horizon_changes``.
+        Under the 'volatility' policy the eviction scores are refreshed from
+        the same changes.
+        """
+        token_ids, prices, changes, timestamps = [], [], [], []
+        for shard in self.shards:
+            with shard.lock:
+                ids = [mint for mint in shard.active if mint in shard.price_data]
+                if not ids:
+                    continue
+                shard_prices, shard_changes = shard.history.horizon_changes(ids, current_time, horizons)
+                if self.eviction_policy == 'volatility':
+                    with np.errstate(all='ignore'), warnings.catch_warnings():
+                        warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN rows stay unscored
+                        shard.eviction.set_scores(ids, np.nanmax(np.abs(shard_changes), axis=1).tolist())
+                timestamps.extend(shard.price_data[mint].get('timestamp', '') for mint in ids)
+            token_ids.extend(ids)
+            prices.append(shard_prices)
+            changes.append(shard_changes)
+        if not token_ids:
+            return [], np.empty(0), np.empty((0, len(horizons))), []
+        return token_ids, np.concatenate(prices), np.concatenate(changes), timestamps
+
+if __name__ == "__main__":
+    # Contention benchmark: 50 fetch workers storing synthetic chunks while
+    # the output stage snapshots, one lock (the old data_lock) vs. shards
+    import concurrent.futures
+    import random
+    import sys
+
+    tokens = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    chunk_size = 100
+    workers = 50
+    cycles = 5
+    horizons = [2, 5, 10, 30, 60, 120, 300, 600]
+    mints = [f"{i:044d}" for i in range(tokens)]
+    chunks = [mints[i:i + chunk_size] for i in range(0, tokens, chunk_size)]
+    rng = random.Random(0)
+    synthetic = [{mint: {'price': str(rng.uniform(1e-6, 1e-3)), 'timestamp': '00:00:00'} for mint in chunk}
+                 for chunk in chunks]
+
+    print(f"🔬 {tokens} tokens, {len(chunks)} chunks of {chunk_size}, {workers} workers, {cycles} cycles")
+    print(f"{'Shards':<8} {'Store/cycle':>12} {'Contended':>10} {'Snapshot':>10} {'Tokens/s':>10}")
+    for shard_count in (1, 4, 8, 16, 64):
+        state = ShardedTokenState(shard_count, 256, tokens)
+        for mint in mints:
+            state.reserve(mint)
+            state.activate(mint, 1e-4, time.time() - 700)
+
+        # Wrap shard locks to count acquisitions that found the lock held
+        # (wait *time* mostly measures GIL scheduling, not lock contention)
+        counts = {'acquired': 0, 'contended': 0}
+
+        class CountingLock:
+            def __init__(self):
+                self.lock = threading.Lock()
+
+            def __enter__(self):
+                counts['acquired'] += 1
+                if not self.lock.acquire(blocking=False):
+                    counts['contended'] += 1
+                    self.lock.acquire()
+
+            def __exit__(self, *exc):
+                self.lock.release()
+
+        for shard in state.shards:
+            shard.lock = CountingLock()
+
+        stop = threading.Event()
+        snapshot_times = []
+
+        def reader():
+            while not stop.is_set():
+                start = time.perf_counter()
+                state.snapshot(time.time(), horizons)
+                snapshot_times.append(time.perf_counter() - start)
+
+        reader_thread = threading.Thread(target=reader, daemon=True)
+        reader_thread.start()
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            for _ in range(cycles):
+                list(pool.map(state.store_prices, synthetic))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        reader_thread.join()
+        snapshot = sum(snapshot_times) / max(len(snapshot_times), 1)
+        contended = counts['contended'] / max(counts['acquired'], 1) * 100
+        print(f"{shard_count:<8} {elapsed / cycles * 1000:>10.1f}ms {contended:>9.1f}% "
+              f"{snapshot * 1000:>8.1f}ms {tokens * cycles / elapsed:>10.0f}")
@@ -0,0 +1,238 @@
+import bisect
+import hashlib
+import multiprocessing
+import queue
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from queueManager import FRAME_DTYPE
+
+class HashRing:
+    """Consistent hashing of mints onto tracker processes.
+
+    Each node owns ``vnodes`` points on a 64-bit ring; a mint belongs to the
+    first point clockwise from its hash. Adding or removing a node only
+    moves the mints next to that node's points.
+    """
+    def __init__(self, nodes, vnodes=64):
+        self.vnodes = vnodes
+        self.points = []  # (hash, node), sorted
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'little')
+
+    def add(self, node):
+        for replica in range(self.vnodes):
+            bisect.insort(self.points, (self._hash(f"{node}#{replica}"), node))
+
+    def remove(self, node):
+        self.points = [point for point in self.points if point[1] != node]
+
+    def node_for(self, key):
+        index = bisect.bisect(self.points, (self._hash(key),))
+        return self.points[index % len(self.points)][1]
+
+class TrackerPool:
+    """Runs ``target(index, processes, mint_queue, frame_queue, stop)`` in N processes.
+
+    The coordinator routes each new mint to its owner with ``route`` and
+    merges the latest partial frame (FRAME_DTYPE records) from every worker
+    with ``merged``. A partial older than ``stale_after`` seconds is left
+    out. Workers may also put ``(index, ('forget', mint))`` on the frame
+    queue for a mint they gave up on; ``collect`` passes it to
+    ``on_forget``. The coordinator remembers the last ``max_routed`` mints
+    routed to each worker, and ``check_workers`` re-routes them to a dead
+    worker's replacement, along with the mints pinned there with ``pin``.
+    """
+    def __init__(self, processes, target, stale_after=10.0, max_routed=None, on_forget=None):
+        self.context = multiprocessing.get_context('spawn')
+        self.processes = processes
+        self.target = target
+        self.stale_after = stale_after
+        self.max_routed = max_routed
+        self.on_forget = on_forget
+        self.ring = HashRing(range(processes))
+        self.mint_queues = [self.context.Queue() for _ in range(processes)]
+        self.frame_queue = self.context.Queue()
+        self.stop = self.context.Event()
+        self.workers = [None] * processes
+        self.partials = {}  # worker index -> (received at, records)
+        self.routed = [OrderedDict() for _ in range(processes)]  # Per worker: mint -> None, oldest first
+        self.pinned = [set() for _ in range(processes)]  # Per worker: mints pinned there
+        self.lock = threading.Lock()  # route runs on the consumer thread, the rest on the coordinator's
+
+    def _spawn(self, index):
+        worker = self.context.Process(
+            target=self.target,
+            args=(index, self.processes, self.mint_queues[index], self.frame_queue, self.stop),
+            daemon=True,
+            name=f"tracker-{index}"
+        )
+        worker.start()
+        self.workers[index] = worker
+
+    def start(self):
+        for index in range(self.processes):
+            self._spawn(index)
+        return self
+
+    def route(self, coin):
+        mint = coin['mint'].replace('-latest', '')
+        index = self.ring.node_for(mint)
+        with self.lock:
+            routed = self.routed[index]
+            routed[mint] = None
+            routed.move_to_end(mint)
+            if self.max_routed and len(routed) > self.max_routed:
+                routed.popitem(last=False)
+        self.mint_queues[index].put(coin)
+
+    def pin(self, mint, pinned=True):
+        """Send ``{'mint', 'pin'}`` to the worker that owns ``mint``"""
+        index = self.ring.node_for(mint)
+        with self.lock:
+            if pinned:
+                self.pinned[index].add(mint)
+            else:
+                self.pinned[index].discard(mint)
+        self.mint_queues[index].put({'mint': mint, 'pin': pinned})
+
+    def _forget(self, index, mint):
+        with self.lock:
+            self.routed[index].pop(mint, None)
+        if self.on_forget is not None:
+            self.on_forget(mint)
+
+    def collect(self, timeout):
+        """Gather partial frames until every live worker has sent one or
+        ``timeout`` seconds pass; returns how many arrived"""
+        deadline = time.time() + timeout
+        fresh = set()
+        live = sum(1 for worker in self.workers if worker is not None and worker.is_alive())
+        while len(fresh) < live:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                index, records = self.frame_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if isinstance(records, tuple) and records[0] == 'forget':
+                self._forget(index, records[1])
+                continue
+            self.partials[index] = (time.time(), records)
+            fresh.add(index)
+        return len(fresh)
+
+    def merged(self):
+        """One frame of FRAME_DTYPE records from every worker's latest partial"""
+        cutoff = time.time() - self.stale_after
+        parts = [records for received, records in self.partials.values() if received >= cutoff]
+        if not parts:
+            return np.empty(0, dtype=FRAME_DTYPE)
+        return np.concatenate(parts)
+
+    def check_workers(self):
+        for index, worker in enumerate(self.workers):
+            if worker is not None and not worker.is_alive() and not self.stop.is_set():
+                print(f"♻️ Restarting tracker process {index} (exit code {worker.exitcode})")
+                self.partials.pop(index, None)
+                self._spawn(index)
+                with self.lock:
+                    mints = list(self.routed[index])
+                    pinned = list(self.pinned[index])
+                for mint in pinned:
+                    self.mint_queues[index].put({'mint': mint, 'pin': True})
+                for mint in mints:
+                    self.mint_queues[index].put({'mint': mint})
+                if mints:
+                    print(f"🔁 Re-routed {len(mints)} mints to tracker process {index}")
+
+    def close(self, timeout=3):
+        self.stop.set()
+        for worker in self.workers:
+            if worker is not None:
+                worker.join(timeout=timeout)
+                if worker.is_alive():
+                    worker.terminate()
+
+def _synthetic_worker(index, processes, mint_queue, frame_queue, stop):
+    """Benchmark worker: tracks its share of synthetic mints with fake fetch results"""
+    import random
+    from tokenState import ShardedTokenState
+    from queueManager import records_from_dicts, HORIZON_KEYS
+
+    mints = []
+    while True:
+        coin = mint_queue.get()
+        if coin is None:
+            break
+        mints.append(coin['mint'])
+    horizons = [2, 5, 10, 30, 60, 120, 300, 600]
+    state = ShardedTokenState(8, 256, len(mints) + 1)
+    start_time = time.time() - 700
+    for mint in mints:
+        state.reserve(mint)
+        state.activate(mint, 1e-4, start_time)
+    rng = random.Random(index)
+    chunks = [mints[i:i + 100] for i in range(0, len(mints), 100)]
+
+    cycles = 0
+    busy = 0.0
+    while not stop.is_set():
+        cycle_start = time.perf_counter()
+        now = time.time()
+        for chunk in chunks:
+            state.store_prices({mint: {'price': str(rng.uniform(1e-6, 1e-3)), 'timestamp': '00:00:00'}
+                                for mint in chunk}, now)
+        token_ids, prices, changes, timestamps = state.snapshot(now, horizons)
+        rows = np.where(np.isnan(changes), None, np.round(changes, 2)).tolist()
+        output = [dict(zip(HORIZON_KEYS, row), id=mint, price=price, time=stamp)
+                  for mint, price, row, stamp in zip(token_ids, prices.tolist(), rows, timestamps)]
+        frame_queue.put((index, records_from_dicts(output)))
+        busy += time.perf_counter() - cycle_start
+        cycles += 1
+    frame_queue.put((index, ('done', cycles, busy, len(mints))))
+
+if __name__ == "__main__":
+    # Benchmark: tokens tracked per second (fetch results stored, horizons,
+    # frame built and merged) as tracker processes are added
+    import os
+    import sys
+    tokens_per_process = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    duration = 6.0
+    cores = os.cpu_count() or 1
+    print(f"🔬 {tokens_per_process} synthetic tokens per process, {duration:.0f}s per run, {cores} CPU(s)")
+    print(f"{'Processes':<10} {'Tokens':>8} {'Cycle':>9} {'Merge':>8} {'Tokens/s':>10}")
+    for processes in sorted({1, 2, 4, cores}):
+        pool = TrackerPool(processes, _synthetic_worker).start()
+        total = tokens_per_process * processes
+        for i in range(total):
+            pool.route({'mint': f"{i:044d}"})
+        for mint_queue in pool.mint_queues:
+            mint_queue.put(None)
+
+        merge_times = []
+        end = time.time() + duration
+        while time.time() < end:
+            pool.collect(0.5)
+            start = time.perf_counter()
+            pool.merged()
+            merge_times.append(time.perf_counter() - start)
+        pool.stop.set()
+
+        stats = {}
+        while len(stats) < processes:
+            index, payload = pool.frame_queue.get(timeout=30)
+            if isinstance(payload, tuple):
+                stats[index] = payload
+        pool.close()
+        cycles = sum(s[1] for s in stats.values())
+        cycle = sum(s[2] for s in stats.values()) / max(cycles, 1)
+        tokens_per_second = sum(s[3] * s[1] for s in stats.values()) / duration  # Ring split is uneven
+        print(f"{processes:<10} {total:>8} {cycle * 1000:>7.0f}ms "
+              f"{np.mean(merge_times) * 1000:>6.2f}ms {tokens_per_second:>10.0f}")
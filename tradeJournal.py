@@ -0,0 +1,203 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+JOURNAL_FILE = 'journal/trades.sqlite3'
+FLUSH_INTERVAL = 0.2  # Seconds between journal commits; one WAL fsync per commit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    source TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    mint TEXT NOT NULL,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS positions (
+    source TEXT NOT NULL,
+    mint TEXT NOT NULL,
+    entry_price REAL,
+    entry_time REAL NOT NULL,
+    out_amount TEXT,
+    usd_value REAL,
+    exit_price REAL,
+    exit_time REAL,
+    reason TEXT,
+    PRIMARY KEY (source, mint)
+);
+CREATE INDEX IF NOT EXISTS positions_open ON positions (source, exit_time);
+CREATE INDEX IF NOT EXISTS positions_entry ON positions (source, entry_time);
+"""
+
+class TradeJournal:
+    """Durable record of signals, buys and sells, shared by every process.
+
+    ``events`` is the append-only history; ``positions`` holds one row per
+    (source, mint) with the latest buy and, once sold, its exit, so startup
+    recovery is an indexed query over the positions still open or recently
+    bought, however many weeks of events precede it.
+
+    Writes are queued and committed by a background thread every
+    ``flush_interval`` seconds, batching a whole interval into one
+    transaction (one fsync in WAL mode) so callers never wait on the disk.
+    ``flush`` blocks until everything queued so far is durable. SQLite
+    handles several processes writing the same file.
+    """
+    def __init__(self, path=JOURNAL_FILE, source='main', flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.source = source
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=FULL')
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.pending = queue.SimpleQueue()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._loop, daemon=True, name=f"{source}-journal")
+        self.thread.start()
+
+    def _event(self, kind, mint, data, t):
+        self.pending.put(('INSERT INTO events (time, source, kind, mint, data) VALUES (?, ?, ?, ?, ?)',
+                          (t, self.source, kind, mint, json.dumps(data, separators=(',', ':'), default=str))))
+
+    def signal(self, signal, t=None):
+        """A buy signal that was submitted for purchase"""
+        self._event('signal', signal['id'], {key: signal.get(key) for key in
+                                             ('token', 'price', 'condition_met', 'retrace_check')},
+                    signal.get('signal_time', time.time()) if t is None else t)
+
+    def buy(self, mint, price=None, quote=None, t=None):
+        """An executed buy; ``quote`` is the swap API's quoteResponse, if any"""
+        t = time.time() if t is None else t
+        quote = quote or {}
+        usd_value = quote.get('swapUsdValue')
+        usd_value = float(usd_value) if usd_value is not None else None
+        self._event('buy', mint, {'price': price, 'quote': quote}, t)
+        self.pending.put(('INSERT OR REPLACE INTO positions (source, mint, entry_price, entry_time, out_amount, usd_value) '
+                          'VALUES (?, ?, ?, ?, ?, ?)',
+                          (self.source, mint, price, t, quote.get('outAmount'), usd_value)))
+
+    def sell(self, mint, price=None, profit=None, reason=None, t=None):
+        t = time.time() if t is None else t
+        self._event('sell', mint, {'price': price, 'profit': profit, 'reason': reason}, t)
+        self.pending.put(('UPDATE positions SET exit_price = ?, exit_time = ?, reason = ? '
+                          'WHERE source = ? AND mint = ? AND exit_time IS NULL',
+                          (price, t, reason, self.source, mint)))
+
+    def _commit(self, batch):
+        with self.lock:
+            self.db.execute('BEGIN')
+            try:
+                for sql, params in batch:
+                    self.db.execute(sql, params)
+                self.db.execute('COMMIT')
+            except BaseException:
+                self.db.execute('ROLLBACK')
+                raise
+
+    def _drain(self):
+        batch, waiters = [], []
+        while True:
+            try:
+                item = self.pending.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            else:
+                batch.append(item)
+        if batch:
+            try:
+                self._commit(batch)
+            except Exception as e:
+                print(f"⚠️ Journal write failed ({len(batch)} entries): {e}")
+        for waiter in waiters:
+            waiter.set()
+
+    def _loop(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self._drain()
+        self._drain()
+
+    def flush(self, timeout=5.0):
+        """Block until every entry queued so far is committed"""
+        done = threading.Event()
+        self.pending.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        self.stop_event.set()
+        self.thread.join(timeout=5)
+        with self.lock:
+            self.db.close()
+
+    def open_positions(self, source=None):
+        """[(mint, entry_price, entry_time)] not sold yet, oldest first"""
+        with self.lock:
+            return self.db.execute('SELECT mint, entry_price, entry_time FROM positions '
+                                   'WHERE source = ? AND exit_time IS NULL ORDER BY entry_time',
+                                   (source or self.source,)).fetchall()
+
+    def recent_buys(self, since, source=None):
+        """{mint: last buy time} for buys at or after ``since``"""
+        with self.lock:
+            return dict(self.db.execute('SELECT mint, entry_time FROM positions WHERE source = ? AND entry_time >= ?',
+                                        (source or self.source, since)).fetchall())
+
+    def trades(self, limit=20, source=None):
+        """Latest journal events, newest first"""
+        query = 'SELECT time, source, kind, mint, data FROM events'
+        params = ()
+        if source:
+            query += ' WHERE source = ?'
+            params = (source,)
+        with self.lock:
+            return self.db.execute(query + ' ORDER BY id DESC LIMIT ?', params + (limit,)).fetchall()
+
+if __name__ == "__main__":
+    # python tradeJournal.py [trades [N] | bench [weeks]]
+    import sys
+    import tempfile
+    command = sys.argv[1] if len(sys.argv) > 1 else 'trades'
+    if command == 'bench':
+        # Weeks of history (a buy every 30s, a signal per buy, a sell for most), then recovery time
+        weeks = float(sys.argv[2]) if len(sys.argv) > 2 else 4
+        path = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+        journal = TradeJournal(path, source='bench')
+        start_time = time.time() - weeks * 7 * 86400
+        buys = int(weeks * 7 * 86400 / 30)
+        events = 0
+        start = time.perf_counter()
+        for i in range(buys):
+            t = start_time + i * 30
+            mint = f"{i:040d}pump"
+            journal.signal({'id': mint, 'token': mint[:8], 'price': 7e-05, 'condition_met': '2'}, t)
+            journal.buy(mint, 7e-05, {'outAmount': '123456789', 'swapUsdValue': '940.0'}, t + 0.5)
+            events += 2
+            if i % 50:
+                journal.sell(mint, 8e-05, 14.3, '10% Target (7m+)', t + 420)
+                events += 1
+        journal.flush(timeout=600)
+        written = time.perf_counter() - start
+        journal.close()
+
+        start = time.perf_counter()
+        journal = TradeJournal(path, source='bench')
+        positions = journal.open_positions()
+        recent = journal.recent_buys(time.time() - 16 * 60)
+        recovered = time.perf_counter() - start
+        journal.close()
+        print(f"📒 {weeks:g} weeks: {events} events ({os.path.getsize(path) / 1e6:.0f}MB) journaled in {written:.1f}s; "
+              f"recovery of {len(positions)} open positions + {len(recent)} recent buys in {recovered * 1000:.1f}ms")
+    else:
+        journal = TradeJournal()
+        for t, source, kind, mint, data in journal.trades(int(sys.argv[2]) if len(sys.argv) > 2 else 20):
+            print(f"{time.strftime('%m-%d %H:%M:%S', time.localtime(t))} {source:<20} {kind:<6} {mint} {data}")
+        journal.close()
@@ -0,0 +1,119 @@
+import threading
+import time
+
+LAMPORTS_PER_SOL = 1_000_000_000
+
+class WalletCache:
+    """Background-refreshed SOL balance and SOL/USD price for buy sizing.
+
+    A daemon thread refreshes the balance every ``balance_ttl`` seconds and
+    the price every ``price_ttl`` seconds, so sizing a buy is a memory read.
+    If a value is older than its ``max_*_age`` (refresher failing or not
+    started) the read refreshes it synchronously instead.
+
+    Buys are debited locally right away. The RPC balance can lag a confirmed
+    swap, so each refresh subtracts the debits it does not reflect yet: a
+    debit is settled, oldest first, once a fetched balance has fallen by its
+    amount since the previous fetch, and dropped regardless after
+    ``settle_seconds``.
+    """
+    def __init__(self, fetch_balance, fetch_sol_usd, balance_ttl=5.0, price_ttl=30.0,
+                 max_balance_age=30.0, max_price_age=120.0, settle_seconds=20.0):
+        self.fetch_balance = fetch_balance
+        self.fetch_sol_usd = fetch_sol_usd
+        self.balance_ttl = balance_ttl
+        self.price_ttl = price_ttl
+        self.max_balance_age = max_balance_age
+        self.max_price_age = max_price_age
+        self.settle_seconds = settle_seconds
+
+        self.lock = threading.Lock()
+        self.balance_lamports = None
+        self.rpc_lamports = None  # Last fetched balance, before debits
+        self.balance_time = 0.0
+        self.sol_usd_price = None
+        self.price_time = 0.0
+        self.debits = []  # (time, lamports) not yet reflected by RPC
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def refresh_balance(self):
+        fetch_start = time.time()
+        lamports = int(self.fetch_balance())
+        with self.lock:
+            drop = self.rpc_lamports - lamports if self.rpc_lamports is not None else 0
+            pending = []
+            for t, amount in self.debits:
+                if t <= fetch_start - self.settle_seconds:
+                    continue
+                if t < fetch_start and drop >= amount:
+                    drop -= amount  # Already in the fetched balance
+                    continue
+                pending.append((t, amount))
+            self.debits = pending
+            self.rpc_lamports = lamports
+            self.balance_lamports = lamports - sum(amount for _, amount in self.debits)
+            self.balance_time = time.time()
+        return self.balance_lamports
+
+    def refresh_price(self):
+        price = float(self.fetch_sol_usd())
+        if price <= 0:
+            raise ValueError(f"Invalid SOL/USD price: {price}")
+        with self.lock:
+            self.sol_usd_price = price
+            self.price_time = time.time()
+        return price
+
+    def balance(self):
+        """Cached wallet balance in lamports (refreshes inline if too old)"""
+        if self.balance_lamports is None or time.time() - self.balance_time > self.max_balance_age:
+            return self.refresh_balance()
+        return self.balance_lamports
+
+    def sol_usd(self):
+        """Cached SOL/USD price (refreshes inline if too old)"""
+        if self.sol_usd_price is None or time.time() - self.price_time > self.max_price_age:
+            return self.refresh_price()
+        return self.sol_usd_price
+
+    def usd_to_lamports(self, usd):
+        return int(usd / self.sol_usd() * LAMPORTS_PER_SOL)
+
+    def debit(self, lamports):
+        """Account for SOL spent on a buy until the RPC balance catches up"""
+        with self.lock:
+            self.debits.append((time.time(), int(lamports)))
+            if self.balance_lamports is not None:
+                self.balance_lamports -= int(lamports)
+
+    def _refresh_loop(self):
+        next_balance = next_price = 0.0
+        while not self.stop_event.is_set():
+            now = time.time()
+            if now >= next_balance:
+                try:
+                    self.refresh_balance()
+                    next_balance = now + self.balance_ttl
+                except Exception as e:
+                    print(f"⚠️ Balance refresh failed: {str(e)}")
+                    next_balance = now + min(self.balance_ttl, 2.0)
+            if now >= next_price:
+                try:
+                    self.refresh_price()
+                    next_price = now + self.price_ttl
+                except Exception as e:
+                    print(f"⚠️ SOL price refresh failed: {str(e)}")
+                    next_price = now + min(self.price_ttl, 5.0)
+            self.stop_event.wait(max(0.05, min(next_balance, next_price) - time.time()))
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._refresh_loop, daemon=True, name='wallet-cache')
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1)